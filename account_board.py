@@ -0,0 +1,138 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+# ==== Account Board ====
+# Shared state of the symbol shards of one account (coordinator.py --shards),
+# in a SQLite file every shard of the account opens. Each shard posts the
+# signals it found in a feed cycle; once every shard has posted, all of them
+# read the same account-wide ranking and trade only their own symbols in its
+# top. Trades are reserved against the daily cap in an IMMEDIATE transaction,
+# so N shards together never open more than MAX_TRADES_PER_DAY.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    feed TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    shard INTEGER NOT NULL,
+    PRIMARY KEY (feed, generation, shard)
+);
+CREATE TABLE IF NOT EXISTS candidates (
+    feed TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    shard INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    PRIMARY KEY (feed, generation, symbol)
+);
+CREATE TABLE IF NOT EXISTS trades (
+    day TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+KEEP_GENERATIONS = 10  # Rankings of older cycles are deleted on post
+
+
+class AccountBoard:
+    def __init__(self, path, shard, shard_count, feed=''):
+        self.path = path
+        self.shard = shard
+        self.shard_count = shard_count
+        self.feed = feed  # Generations restart with every coordinator run, so they are kept per feed
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self.lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def _transaction(self, statements):
+        # BEGIN IMMEDIATE takes the write lock up front, so read-then-write is atomic across shards
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self.db)
+                self.db.execute("COMMIT")
+                return result
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+    # ==== Signal ranking ====
+    def post(self, generation, candidates):
+        # candidates: [(symbol, score, rank)], rank breaking score ties the same way on every shard
+        def write(db):
+            db.execute("DELETE FROM posts WHERE feed != ? OR generation < ?", (self.feed, generation - KEEP_GENERATIONS))
+            db.execute("DELETE FROM candidates WHERE feed != ? OR generation < ?", (self.feed, generation - KEEP_GENERATIONS))
+            db.execute("DELETE FROM candidates WHERE feed = ? AND generation = ? AND shard = ?", (self.feed, generation, self.shard))
+            db.executemany(
+                "INSERT OR REPLACE INTO candidates VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.feed, generation, self.shard, symbol, score, rank) for symbol, score, rank in candidates],
+            )
+            db.execute("INSERT OR REPLACE INTO posts VALUES (?, ?, ?)", (self.feed, generation, self.shard))
+        self._transaction(write)
+
+    def posted(self, generation):
+        with self.lock:
+            return self.db.execute(
+                "SELECT COUNT(*) FROM posts WHERE feed = ? AND generation = ?", (self.feed, generation)
+            ).fetchone()[0]
+
+    def wait(self, generation, timeout, stop_event=None, poll=0.2):
+        # Wait until every shard has posted `generation`; False on timeout or stop
+        deadline = time.monotonic() + timeout
+        while self.posted(generation) < self.shard_count:
+            if time.monotonic() >= deadline or (stop_event and stop_event.is_set()):
+                return False
+            if stop_event:
+                stop_event.wait(poll)
+            else:
+                time.sleep(poll)
+        return True
+
+    def top(self, generation, limit=6):
+        # [(symbol, shard)] of the account's best signals in this cycle
+        with self.lock:
+            return [tuple(row) for row in self.db.execute(
+                "SELECT symbol, shard FROM candidates WHERE feed = ? AND generation = ? "
+                "ORDER BY score DESC, rank, symbol LIMIT ?",
+                (self.feed, generation, limit),
+            )]
+
+    # ==== Daily trade cap ====
+    def reserve(self, day, limit):
+        # Take one of the day's `limit` trades; False once the account has used them all
+        def take(db):
+            row = db.execute("SELECT count FROM trades WHERE day = ?", (day,)).fetchone()
+            count = row[0] if row else 0
+            if count >= limit:
+                return False
+            db.execute("INSERT OR REPLACE INTO trades VALUES (?, ?)", (day, count + 1))
+            return True
+        return self._transaction(take)
+
+    def release(self, day):
+        # Give back a reservation whose trade was not placed
+        self._transaction(lambda db: db.execute("UPDATE trades SET count = MAX(0, count - 1) WHERE day = ?", (day,)))
+
+    def count(self, day):
+        with self.lock:
+            row = self.db.execute("SELECT count FROM trades WHERE day = ?", (day,)).fetchone()
+        return row[0] if row else 0
+
+    def raise_count(self, day, count):
+        # Trades an earlier run placed today; the board never counts fewer than that
+        self._transaction(lambda db: db.execute(
+            "INSERT INTO trades VALUES (?, ?) ON CONFLICT(day) DO UPDATE SET count = MAX(count, excluded.count)", (day, count)
+        ))
@@ -0,0 +1,252 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+import strategy
+from indicators import compute_indicators, rolling_indicators
+from kline_store import KlineStore, INTERVAL_MS
+
+
+# ==== Backtest Engine ====
+# Replays stored klines for many symbols with the live rules: the signal
+# cascade from get_signal, the 24h universe filter from get_usdt_pairs, the
+# quantity/SL/TP math from calculate_order_quantity, apply_buffer and
+# place_trade, and the MAX_TRADES_PER_DAY cap. Indicators and signals are
+# computed for every bar at once; only the scan times and the trades they open
+# are walked in Python. Each bar's indicators cover the LOOKBACK bars ending
+# there, the klines a live scan fetches, so EMA200 and EMA50 carry the same
+# seed as they do live instead of the whole stored history.
+#
+# Fill model: a scan at bar i enters at that bar's close. SL/TP are checked on
+# the following bars' high/low; when both are touched in one bar the stop is
+# assumed to fill first. A stop the market opens through fills at that open.
+# Positions still open at the end close at the last close.
+DAY_OFFSET_MS = 7 * 3_600_000  # Trading days roll over at midnight UTC+7
+LOOKBACK = 210  # get_klines' limit
+
+
+def align_klines(klines_by_symbol):
+    # Stack per-symbol kline arrays onto one shared open-time axis (NaN where a symbol has no bar)
+    symbols = list(klines_by_symbol)
+    times = np.unique(np.concatenate([rows[:, 0] for rows in klines_by_symbol.values() if len(rows)]))
+    shape = (len(symbols), len(times))
+    data = {name: np.full(shape, np.nan) for name in ('open', 'high', 'low', 'close', 'quote_volume')}
+    for row, symbol in enumerate(symbols):
+        rows = klines_by_symbol[symbol]
+        if not len(rows):
+            continue
+        index = np.searchsorted(times, rows[:, 0])
+        data['open'][row, index] = rows[:, 1]
+        data['high'][row, index] = rows[:, 2]
+        data['low'][row, index] = rows[:, 3]
+        data['close'][row, index] = rows[:, 4]
+        data['quote_volume'][row, index] = rows[:, 7]
+    return symbols, times.astype(np.int64), data
+
+
+def universe_mask(close, quote_volume, bars_per_day):
+    # Rolling 24h quote volume and absolute price change, as filtered in get_usdt_pairs
+    volume = np.nan_to_num(quote_volume)
+    cumulative = np.cumsum(volume, axis=1)
+    daily_volume = cumulative.copy()
+    daily_volume[:, bars_per_day:] -= cumulative[:, :-bars_per_day]
+
+    change = np.full(close.shape, np.nan)
+    change[:, bars_per_day:] = np.abs(close[:, bars_per_day:] / close[:, :-bars_per_day] - 1) * 100
+    with np.errstate(invalid='ignore'):
+        return ((daily_volume > strategy.MIN_DAILY_VOLUME)
+                & (change > strategy.MIN_PRICE_CHANGE)
+                & (change < strategy.MAX_PRICE_CHANGE))
+
+
+def find_exit(high, low, start, direction, sl_price, tp_price, chunk=512):
+    # First bar at or after `start` that touches SL or TP, searched in growing chunks
+    n = len(high)
+    while start < n:
+        end = min(n, start + chunk)
+        h = high[start:end]
+        l = low[start:end]
+        if direction == strategy.LONG:
+            hit_sl = l <= sl_price
+            hit_tp = h >= tp_price
+        else:
+            hit_sl = h >= sl_price
+            hit_tp = l <= tp_price
+        hits = hit_sl | hit_tp
+        if hits.any():
+            offset = int(np.argmax(hits))
+            return start + offset, ('SL' if hit_sl[offset] else 'TP')
+        start = end
+        chunk *= 2
+    return None, 'OPEN'
+
+
+def run_backtest(klines_by_symbol, interval='5m', quantity_usdt=1, leverage=20, risk_per_trade=0.5,
+                 tp_usdt=0.5, max_trades_per_day=6, top_signals=6, scan_every=None, scan_offset=0,
+                 fee_rate=0.0005, percent_price=(0.95, 1.05), precisions=None, min_notional=None,
+                 indicators=None, buffer_percentage=0.01, lookback=LOOKBACK, **thresholds):
+    symbols, times, data = align_klines(klines_by_symbol)
+
+    # Every bar of every symbol in one pass; lookback=None seeds the indicators at the first stored bar
+    if indicators is not None:
+        ind = indicators
+    else:
+        ind = rolling_indicators(data['close'], lookback) if lookback else compute_indicators(data['close'])
+    signals = strategy.evaluate_signals(ind, **thresholds)
+    return simulate(
+        symbols, times, data, signals, interval, quantity_usdt, leverage, risk_per_trade, tp_usdt,
+        max_trades_per_day, top_signals, scan_every, scan_offset, fee_rate, percent_price, precisions,
+        min_notional, buffer_percentage,
+    )
+
+
+def simulate(symbols, times, data, signals, interval='5m', quantity_usdt=1, leverage=20, risk_per_trade=0.5,
+             tp_usdt=0.5, max_trades_per_day=6, top_signals=6, scan_every=None, scan_offset=0,
+             fee_rate=0.0005, percent_price=(0.95, 1.05), precisions=None, min_notional=None,
+             buffer_percentage=0.01, universe=None, window=None):
+    # Trade walk over aligned klines and precomputed (direction, attempt, score) signals.
+    # `universe` is a precomputed universe_mask; `window` = (start, end) bars limits the
+    # scans to start <= bar < end and closes positions still open at `end` at its last close.
+    bar_ms = INTERVAL_MS[interval]
+    bars_per_day = 86_400_000 // bar_ms
+    scan_every = scan_every or bars_per_day
+    precisions = precisions or {}
+    min_notional = min_notional or {}
+    start, end = window or (0, len(times))
+
+    close, high, low, open_ = (data[name][:, :end] for name in ('close', 'high', 'low', 'open'))
+    direction, attempt, score = signals
+    if universe is None:
+        universe = universe_mask(data['close'], data['quote_volume'], bars_per_day)
+    eligible = universe & (direction != 0)
+
+    days = (times + DAY_OFFSET_MS) // 86_400_000
+    busy_until = np.full(len(symbols), -1)
+    traded_day = np.full(len(symbols), -1)
+    trades = []
+    current_day = None
+    trades_today = 0
+
+    scan_bars = np.arange(scan_offset, end, scan_every)
+    scan_bars = scan_bars[scan_bars >= start]
+    for bar in scan_bars:
+        if days[bar] != current_day:
+            current_day = days[bar]
+            trades_today = 0
+        if trades_today >= max_trades_per_day:
+            continue
+
+        candidates = np.nonzero(eligible[:, bar] & (busy_until < bar) & (traded_day != current_day))[0]
+        if not len(candidates):
+            continue
+        # Same ordering as the live bot: highest score first, ties keep symbol order
+        candidates = candidates[np.argsort(-score[candidates, bar], kind='stable')][:top_signals]
+
+        for row in candidates:
+            if trades_today >= max_trades_per_day:
+                break
+            symbol = symbols[row]
+            side = int(direction[row, bar])
+            entry = close[row, bar]
+            precision = precisions.get(symbol, 3)
+
+            raw_qty = strategy.order_quantity(entry, leverage, quantity_usdt)
+            if raw_qty * entry < min_notional.get(symbol, 0):
+                continue
+            qty = round(raw_qty, precision)
+            if qty <= 0:
+                continue
+
+            sl_price, tp_price = strategy.initial_sl_tp(side, entry, qty, risk_per_trade, tp_usdt)
+            sl_price, tp_price = strategy.buffered_sl_tp(side, entry, sl_price, tp_price, *percent_price, buffer_percentage)
+            sl_price, tp_price = round(float(sl_price), precision), round(float(tp_price), precision)
+            if sl_price <= 0 or tp_price <= 0:
+                continue
+
+            exit_bar, reason = find_exit(high[row], low[row], bar + 1, side, sl_price, tp_price)
+            if exit_bar is None:
+                last = np.nonzero(~np.isnan(close[row]))[0][-1]
+                exit_bar, exit_price = int(last), close[row, last]
+            elif reason == 'SL':
+                gap = open_[row, exit_bar]
+                exit_price = min(gap, sl_price) if side == strategy.LONG else max(gap, sl_price)
+            else:
+                exit_price = tp_price
+
+            gross = side * (exit_price - entry) * qty
+            fees = fee_rate * qty * (entry + exit_price)
+            trades.append({
+                'symbol': symbol,
+                'signal': 'long' if side == strategy.LONG else 'short',
+                'attempt': int(attempt[row, bar]),
+                'score': int(score[row, bar]),
+                'entry_time': int(times[bar]),
+                'exit_time': int(times[exit_bar]),
+                'entry': entry,
+                'exit': exit_price,
+                'sl': sl_price,
+                'tp': tp_price,
+                'qty': qty,
+                'reason': reason,
+                'pnl': gross - fees,
+            })
+            busy_until[row] = exit_bar
+            traded_day[row] = current_day
+            trades_today += 1
+
+    trades = pd.DataFrame(trades)
+    return trades, summarize(trades)
+
+
+def summarize(trades):
+    if trades.empty:
+        return {'trades': 0, 'wins': 0, 'win_rate': 0.0, 'total_pnl': 0.0, 'max_drawdown': 0.0}
+
+    # Equity is realized PnL in exit order
+    pnl = trades.sort_values('exit_time')['pnl'].to_numpy()
+    equity = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:]
+    wins = int((trades['pnl'] > 0).sum())
+    return {
+        'trades': len(trades),
+        'wins': wins,
+        'win_rate': wins / len(trades) * 100,
+        'total_pnl': float(equity[-1]),
+        'max_drawdown': float((peak - equity).max()),
+    }
+
+
+def load_store(root, interval, symbols=None, bars=None):
+    store = KlineStore(root)
+    if symbols is None:
+        suffix = f"_{interval}.f64"
+        symbols = sorted(name[:-len(suffix)] for name in os.listdir(root) if name.endswith(suffix))
+    return {symbol: store.read(symbol, interval, bars) for symbol in symbols}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backtest the get_signal/place_trade strategy on stored klines.')
+    parser.add_argument('--store', default=os.getenv("KLINE_STORE_DIR", "data/klines"))
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--symbols', nargs='*', help='Defaults to every symbol in the store')
+    parser.add_argument('--days', type=int, help='Only use the most recent N days')
+    parser.add_argument('--scan-every', type=int, help='Bars between scans (default: once a day)')
+    parser.add_argument('--quantity-usdt', type=float, default=float(os.getenv("QUANTITY_USDT", 1)))
+    parser.add_argument('--leverage', type=float, default=float(os.getenv("LEVERAGE", 20)))
+    parser.add_argument('--risk-per-trade', type=float, default=float(os.getenv("RISK_PER_TRADE", 0.5)))
+    parser.add_argument('--tp-usdt', type=float, default=float(os.getenv("TP_USDT", 0.5)))
+    parser.add_argument('--max-trades-per-day', type=int, default=int(os.getenv("MAX_TRADES_PER_DAY", 6)))
+    parser.add_argument('--fee-rate', type=float, default=0.0005)
+    args = parser.parse_args()
+
+    bars = args.days * (86_400_000 // INTERVAL_MS[args.interval]) if args.days else None
+    klines = load_store(args.store, args.interval, args.symbols, bars)
+    print(f"[BACKTEST] Loaded {len(klines)} symbols from {args.store}")
+
+    trades, summary = run_backtest(
+        klines, args.interval, args.quantity_usdt, args.leverage, args.risk_per_trade, args.tp_usdt,
+        args.max_trades_per_day, scan_every=args.scan_every, fee_rate=args.fee_rate,
+    )
+    print(f"[BACKTEST] Trades: {summary['trades']} | Wins: {summary['wins']} | Win rate: {summary['win_rate']:.2f}%")
+    print(f"[BACKTEST] Total PnL: {summary['total_pnl']:.2f} USDT | Max drawdown: {summary['max_drawdown']:.2f} USDT")
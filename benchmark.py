@@ -0,0 +1,276 @@
+import argparse
+import contextlib
+import gc
+import importlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import numpy as np
+from indicators import IndicatorBook
+from kline_store import KlineStore
+from log_setup import setup_logging
+from metrics import Metrics
+from mock_binance import SyntheticMarket
+from price_snapshot import PriceSnapshot
+from scanner import WeightBudget
+from symbol_filters import SymbolFilters
+from universe import SymbolUniverse
+
+
+# ==== Scan-Cycle Benchmarks ====
+# Times the functions main.py trades with on synthetic (mock_binance.py) or
+# recorded (kline store) data, fully offline. main.py is imported like any
+# module (the bot itself only starts in main()) and the runtime state that
+# initialize() would create is replaced with in-memory stubs.
+#
+#   python benchmark.py                        # 50, 200 and 1000 symbols
+#   python benchmark.py --save-baseline        # store results as the baseline
+#   python benchmark.py --compare              # exit 1 on regressions
+#
+# Timings are machine specific, so no baseline is kept in the repository: the
+# benchmark workflow saves one from the pull request's base commit and compares
+# the head commit against it on the same runner. Every run also times a fixed
+# calibration workload that uses none of the bot's code, and comparisons scale
+# the baseline by the calibration ratio of the two runs.
+DEFAULT_SIZES = (50, 200, 1000)
+BASELINE_PATH = 'benchmark_baseline.json'
+KLINE_LIMIT = 210
+
+
+class StubClient:
+    # Serves pre-built exchange responses from memory, shaped like UMFutures
+    def __init__(self, market, klines_by_symbol=None, now_ms=None):
+        now_ms = now_ms or int(time.time() * 1000)
+        self.exchange = market.exchange_info()
+        self.tickers = [market.ticker(s, now_ms) for s in market.symbols]
+        self.marks = {s: market.mark_price(s, now_ms) for s in market.symbols}
+        self.kline_rows = klines_by_symbol or {
+            s: market.klines(s, '5m', KLINE_LIMIT, None, None, now_ms) for s in market.symbols
+        }
+
+    def exchange_info(self):
+        return self.exchange
+
+    def ticker_24hr_price_change(self, symbol=None):
+        return self.tickers
+
+    def mark_price(self, symbol=None):
+        if symbol is None:
+            return list(self.marks.values())
+        return self.marks[symbol]
+
+    def klines(self, symbol, interval, limit=500, **kwargs):
+        return self.kline_rows[symbol][-limit:]
+
+
+class NullNotifier:
+    def send(self, text):
+        pass
+
+
+def load_bot(name='main'):
+    return importlib.import_module(name)
+
+
+def stub_bot(bot, client):
+    stubs = dict(
+        client=client,
+        market=client,
+        telegram=NullNotifier(),
+        metrics=Metrics(),
+        prices=PriceSnapshot(client, max_age=0, ticker_max_age=0),
+        symbol_filters=SymbolFilters(client),
+        weight_budget=WeightBudget(10 ** 9),
+        indicator_book=IndicatorBook(),
+        kline_store=None,
+        universe=SymbolUniverse(),
+        stop_event=threading.Event(),
+        feed=None,
+        user_stream=None,
+        trades_today=0,
+        VERBOSE_SIGNALS=False,
+    )
+    for name, value in stubs.items():
+        setattr(bot, name, value)
+    bot.symbol_precisions = bot.get_symbol_precisions()
+    return bot
+
+
+def calibration_workload():
+    # Fixed mix of NumPy passes and Python-level loops, independent of the bot's code
+    rng = np.random.default_rng(0)
+    matrix = rng.random((200, 210))
+    for _ in range(20):
+        np.cumsum(np.exp(matrix * 0.01), axis=1)
+    rows = {}
+    for i in range(50_000):
+        rows[i % 997] = rows.get(i % 997, 0.0) + i * 0.5
+
+
+def recorded_universe(store_dir, size, interval='5m'):
+    # Symbols and klines from a local kline store, synthetic tickers/filters for the same names
+    store = KlineStore(store_dir)
+    suffix = f"_{interval}.f64"
+    names = sorted(n[:-len(suffix)] for n in os.listdir(store_dir) if n.endswith(suffix))[:size]
+    klines = {}
+    for symbol in names:
+        rows = store.read(symbol, interval, KLINE_LIMIT)
+        klines[symbol] = [[int(r[0]), *(f"{v:.8f}" for v in r[1:6]), int(r[6]), *(f"{v:.8f}" for v in r[7:])] for r in rows]
+    market = SyntheticMarket(len(names))
+    market.symbols = names
+    market.index = {symbol: i for i, symbol in enumerate(names)}
+    return market, klines
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000) if samples else 0.0
+
+
+def measure(run, count, repeat):
+    # `run` returns the per-call latencies (seconds) of one pass over `count` symbols
+    latencies = []
+    passes = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Like timeit, garbage collection is kept out of the timed passes
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                latencies.extend(run())
+                passes.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'symbols_per_sec': count / float(np.median(passes)),
+        'pass_ms': float(np.median(passes) * 1000),
+        'best_ms': min(passes) * 1000,
+        'p50_ms': percentile_ms(latencies, 50),
+        'p99_ms': percentile_ms(latencies, 99),
+        'peak_mib': peak / 2 ** 20,
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def benchmark_universe(size, repeat=5, store_dir=None):
+    if store_dir:
+        market, klines = recorded_universe(store_dir, size)
+    else:
+        market, klines = SyntheticMarket(size), None
+    bot = stub_bot(load_bot(), StubClient(market, klines))
+    symbols = [s for s in market.symbols if s in bot.symbol_precisions]
+    interval = bot.INTERVAL
+
+    frames = {s: bot.get_klines(s, interval) for s in symbols}
+    indicator_frames = {s: bot.generate_indicators(df.copy()) for s, df in frames.items()}
+    marks = {s: float(bot.client.mark_price(s)['markPrice']) for s in symbols}
+
+    def each(fn):
+        return lambda: [timed(fn, s) for s in symbols]
+
+    def order_math(symbol):
+        qty, valid = bot.calculate_order_quantity(symbol, marks[symbol], bot.LEVERAGE, bot.symbol_precisions, bot.QUANTITY_USDT)
+        if valid:
+            bot.validate_prices(symbol, marks[symbol], qty, 'long')
+
+    def cold_scan():
+        bot.indicator_book = IndicatorBook()
+        bot.universe = SymbolUniverse()
+        return [timed(bot.scan_for_signals)]
+
+    def warm_scan():
+        bot.universe = SymbolUniverse()
+        return [timed(bot.scan_for_signals)]
+
+    stages = {
+        'calibration': lambda: [timed(calibration_workload)],
+        'get_usdt_pairs': lambda: [timed(bot.get_usdt_pairs)],
+        'get_klines': each(lambda s: bot.get_klines(s, interval)),
+        'generate_indicators': each(lambda s: bot.generate_indicators(frames[s].copy())),
+        'generate_indicators_batch': lambda: [timed(bot.generate_indicators_batch, [df.copy() for df in frames.values()])],
+        'get_signal': each(lambda s: bot.get_signal(indicator_frames[s])),
+        'order_quantity_and_prices': each(order_math),
+        'scan_cold': cold_scan,
+        'scan_warm': warm_scan,
+    }
+    return {name: measure(run, len(symbols), repeat) for name, run in stages.items()}
+
+
+def compare(results, baseline, tolerance, min_delta_ms=0.5):
+    # A stage regresses when its fastest pass or its p50 latency grows by more
+    # than `tolerance`, ignoring differences under `min_delta_ms` (timer noise).
+    # The baseline is first scaled by how much slower or faster this run did the
+    # calibration workload.
+    regressions = []
+    for size, stages in results.items():
+        reference_stages = baseline.get(size, {})
+        if 'calibration' not in stages or 'calibration' not in reference_stages:
+            continue
+        scale = stages['calibration']['best_ms'] / reference_stages['calibration']['best_ms']
+        for stage, current in stages.items():
+            reference = reference_stages.get(stage)
+            if not reference or stage == 'calibration':
+                continue
+            best_ms, p50_ms = reference['best_ms'] * scale, reference['p50_ms'] * scale
+            if current['best_ms'] > best_ms * (1 + tolerance) and current['best_ms'] - best_ms > min_delta_ms:
+                regressions.append(f"{stage} @ {size}: best pass {current['best_ms']:.3f} ms (baseline {best_ms:.3f} on this run)")
+            if current['p50_ms'] > p50_ms * (1 + tolerance) and current['p50_ms'] - p50_ms > min_delta_ms:
+                regressions.append(f"{stage} @ {size}: p50 {current['p50_ms']:.3f} ms (baseline {p50_ms:.3f} on this run)")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'stage':<28}{'symbols':>8}{'symbols/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak MiB':>10}")
+    for size, stages in results.items():
+        for stage, r in stages.items():
+            print(f"{stage:<28}{size:>8}{r['symbols_per_sec']:>12.0f}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['peak_mib']:>10.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the scan-and-trade cycle on offline data.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Universe sizes to benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed passes per stage')
+    parser.add_argument('--store', help='Use recorded klines from this kline store directory instead of synthetic data')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--compare', action='store_true', help='Fail when a stage regresses against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown before failing')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5, help='Ignore slowdowns smaller than this')
+    args = parser.parse_args()
+
+    # Log records are produced as in a live run but written nowhere
+    setup_logging('INFO', stream=open(os.devnull, 'w'))
+    results = {}
+    for size in args.sizes:
+        print(f"[BENCH] {size} symbols...")
+        results[str(size)] = benchmark_universe(size, args.repeat, args.store)
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"[BENCH] Baseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        for line in regressions:
+            print(f"[REGRESSION] {line}")
+        if regressions:
+            sys.exit(1)
+        print("[BENCH] No regressions against the baseline.")
@@ -0,0 +1,207 @@
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+from indicators import compute_indicators
+from kline_store import KlineStore, fetch_klines, to_array, INTERVAL_MS
+from log_setup import setup_logging
+from market_feed import MarketFeed, TICKER_FIELDS
+from rate_governor import RateGovernor, GovernedUMFutures
+from scanner import WeightBudget, scan_klines
+from symbol_filters import SymbolFilters
+import strategy
+
+log = logging.getLogger('coordinator')
+
+
+# ==== Market-Data Coordinator ====
+# Downloads klines, 24h tickers and mark prices once per candle, computes the
+# indicator matrices for every symbol in one pass and publishes them through a
+# shared-memory market_feed. Workers are ordinary main.py processes started with
+# MARKET_FEED set: one per account env file (own API keys, QUANTITY_USDT,
+# LEVERAGE, ...) and optionally split into symbol shards across cores. Adding an
+# account or shard adds no market-data requests.
+#
+#   python coordinator.py --accounts accounts/main.env accounts/small.env
+#   python coordinator.py --shards 4 --once
+#
+# Each worker keeps its own exclusions, trade journal and income ledger under
+# data/workers/<name>/. The shards of one account share an account_board in
+# data/workers/<account>/board.sqlite: MAX_TRADES_PER_DAY and the top-6 signal
+# ranking apply to the account, and only shard 0 sends the startup and PnL
+# messages. exchange_info is published with the feed, so workers never
+# download it.
+load_dotenv(override=True)
+
+INTERVAL = '5m'
+KLINE_LIMIT = 210
+TESTNET = os.getenv("TESTNET", 'False').lower() in ('true', '1', 't')
+BINANCE_BASE_URL = os.getenv("BINANCE_BASE_URL")
+KLINE_STORE_DIR = os.getenv("KLINE_STORE_DIR", "data/klines")
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", 10))
+SCAN_WEIGHT_PER_MINUTE = int(os.getenv("SCAN_WEIGHT_PER_MINUTE", 1200))
+WEIGHT_LIMIT_PER_MINUTE = int(os.getenv("WEIGHT_LIMIT_PER_MINUTE", 2400))
+ORDER_LIMIT_PER_MINUTE = int(os.getenv("ORDER_LIMIT_PER_MINUTE", 1200))
+FEED_CAPACITY = int(os.getenv("FEED_CAPACITY", 1000))  # Most symbols one cycle can publish
+FEED_PUBLISH_DELAY = float(os.getenv("FEED_PUBLISH_DELAY", 1))  # Seconds after each candle close before fetching
+WORKER_STOP_TIMEOUT = 60  # Seconds workers get to finish after SIGTERM
+
+
+def tradable_symbols(tickers, symbol_filters):
+    # Same universe filter as main.get_usdt_pairs, before per-account exclusions
+    volumes = {}
+    for ticker in tickers:
+        symbol = ticker['symbol']
+        filters = symbol_filters.get(symbol)
+        if not filters or filters['contract_type'] != 'PERPETUAL' or filters['quote_asset'] != 'USDT':
+            continue
+        if any(x in symbol for x in ['BTCDOM', 'DEFI']):
+            continue
+        volume = float(ticker['volume']) * float(ticker['lastPrice'])
+        price_change = abs(float(ticker['priceChangePercent']))
+        if volume > strategy.MIN_DAILY_VOLUME and strategy.MIN_PRICE_CHANGE < price_change < strategy.MAX_PRICE_CHANGE:
+            volumes[symbol] = volume
+    return sorted(volumes, key=volumes.get, reverse=True)
+
+
+def collect_cycle(client, symbol_filters, store, budget):
+    # (symbols, close, close_time, tickers, marks) for every tradable symbol with full history
+    tickers = {t['symbol']: t for t in client.ticker_24hr_price_change()}
+    marks = {m['symbol']: float(m['markPrice']) for m in client.mark_price()}
+    symbols = [s for s in tradable_symbols(tickers.values(), symbol_filters) if s in marks]
+
+    if store:
+        fetch = lambda s: fetch_klines(store, client, s, INTERVAL, KLINE_LIMIT)
+    else:
+        fetch = lambda s: to_array(client.klines(symbol=s, interval=INTERVAL, limit=KLINE_LIMIT))
+
+    published, rows = [], []
+    for symbol, klines, error in scan_klines(symbols, fetch, budget, KLINE_LIMIT, SCAN_WORKERS):
+        if error is not None:
+            log.warning(f"[FEED] Skipping {symbol}: {error}")
+        elif len(klines) == KLINE_LIMIT:
+            # Newer listings with a shorter history cannot have an EMA200 signal yet
+            published.append(symbol)
+            rows.append(klines)
+
+    if not published:
+        return [], None, None, None, None
+    rows = np.stack(rows)
+    ticker_matrix = np.array([[float(tickers[s][field]) for field in TICKER_FIELDS] for s in published])
+    return published, rows[:, :, 4], rows[:, :, 6].astype(np.int64), ticker_matrix, np.array([marks[s] for s in published])
+
+
+def publish_cycle(feed, client, symbol_filters, store, budget):
+    started = time.perf_counter()
+    symbols, close, close_time, tickers, marks = collect_cycle(client, symbol_filters, store, budget)
+    if not symbols:
+        log.warning("[FEED] No symbols to publish this cycle.")
+        return feed.generation
+    generation = feed.publish(symbols, close, close_time, compute_indicators(close), tickers, marks, symbol_filters.info)
+    log.info(f"[FEED] Published cycle {generation}: {len(symbols)} symbols in {time.perf_counter() - started:.1f}s")
+    return generation
+
+
+def worker_env(feed_name, account, shard, shards, daemon):
+    account_name = os.path.splitext(os.path.basename(account))[0] if account else 'default'
+    name = f"{account_name}-shard{shard}" if shards > 1 else account_name
+    data_dir = os.path.join('data', 'workers', name)
+    env = dict(os.environ)
+    env.update(
+        MARKET_FEED=feed_name,
+        SHARD_INDEX=str(shard),
+        SHARD_COUNT=str(shards),
+        DAEMON='True' if daemon else 'False',
+        METRICS_PORT='0',
+        UNIVERSE_PATH=os.path.join(data_dir, 'universe.json'),
+        TRADE_JOURNAL_PATH=os.path.join(data_dir, 'trades.sqlite'),
+        INCOME_LEDGER_PATH=os.path.join(data_dir, 'income.sqlite'),
+        METRICS_SUMMARY_PATH=os.path.join(data_dir, 'metrics_summary.json'),
+        SHARD_BOARD_PATH=os.path.join('data', 'workers', account_name, 'board.sqlite'),
+    )
+    if account:
+        # main.py loads this file over the inherited environment
+        env['ENV_FILE'] = account
+    return name, env
+
+
+def start_workers(feed_name, accounts, shards, daemon):
+    workers = {}
+    root = os.path.dirname(os.path.abspath(__file__))
+    for account in accounts or [None]:
+        for shard in range(shards):
+            name, env = worker_env(feed_name, account, shard, shards, daemon)
+            workers[name] = subprocess.Popen([sys.executable, os.path.join(root, 'main.py')], env=env, cwd=root)
+            log.info(f"[WORKER] Started {name} (pid {workers[name].pid})")
+    return workers
+
+
+def stop_workers(workers):
+    for process in workers.values():
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+    for name, process in workers.items():
+        try:
+            process.wait(WORKER_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            log.warning(f"[WORKER] {name} did not stop in {WORKER_STOP_TIMEOUT}s, killing it")
+            process.kill()
+
+
+def wait_for_next_candle(stop_event):
+    interval = INTERVAL_MS[INTERVAL] / 1000
+    wake_at = (time.time() // interval + 1) * interval + FEED_PUBLISH_DELAY
+    stop_event.wait(max(0, wake_at - time.time()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Publish market data once for several bot workers.')
+    parser.add_argument('--accounts', nargs='*', default=[], help='One env file per account (API keys, QUANTITY_USDT, LEVERAGE, ...)')
+    parser.add_argument('--shards', type=int, default=1, help='Split the symbol universe across this many workers per account')
+    parser.add_argument('--once', action='store_true', help='Publish one cycle, run every worker once and exit')
+    parser.add_argument('--feed-name', help='Shared memory name (default: generated)')
+    args = parser.parse_args()
+
+    setup_logging(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_FORMAT", "text"))
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    base_url = BINANCE_BASE_URL or ('https://testnet.binancefuture.com' if TESTNET else 'https://fapi.binance.com')
+    client = GovernedUMFutures(base_url=base_url, governor=RateGovernor(WEIGHT_LIMIT_PER_MINUTE, ORDER_LIMIT_PER_MINUTE))
+    symbol_filters = SymbolFilters(client)
+    store = KlineStore(KLINE_STORE_DIR) if KLINE_STORE_DIR else None
+    budget = WeightBudget(SCAN_WEIGHT_PER_MINUTE)
+
+    feed = MarketFeed(args.feed_name, FEED_CAPACITY, KLINE_LIMIT)
+    log.info(f"[FEED] Shared memory {feed.name}: capacity {FEED_CAPACITY} symbols x {KLINE_LIMIT} bars")
+    workers = {}
+    try:
+        publish_cycle(feed, client, symbol_filters, store, budget)
+        workers = start_workers(feed.name, args.accounts, args.shards, daemon=not args.once)
+        if args.once:
+            for process in workers.values():
+                process.wait()
+        else:
+            while not stop_event.is_set():
+                wait_for_next_candle(stop_event)
+                if stop_event.is_set():
+                    break
+                try:
+                    publish_cycle(feed, client, symbol_filters, store, budget)
+                except Exception as e:
+                    log.error(f"[FEED] Cycle failed: {e}")
+                for name, process in list(workers.items()):
+                    if process.poll() is not None:
+                        log.warning(f"[WORKER] {name} exited with code {process.returncode}")
+                        del workers[name]
+    finally:
+        stop_workers(workers)
+        feed.close()
+        log.info("[FEED] Coordinator stopped.")
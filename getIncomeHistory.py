@@ -1,11 +1,13 @@
 import logging
+import os
 from datetime import datetime, timedelta, timezone
 from binance.um_futures import UMFutures
-from binance.lib.utils import config_logging
 from binance.error import ClientError
+from income_ledger import IncomeLedger
+from log_setup import setup_logging
 
 # Logging setup
-logging.basicConfig(level=logging.INFO, format='%(message)s')
+setup_logging()
 
 # This is just a test, you can enter your own API key and secret Testnet
 API_KEY = ''
@@ -18,6 +20,9 @@ BASE_URL = 'https://testnet.binancefuture.com' if TESTNET else 'https://fapi.bin
 # Initialize client
 um_futures_client = UMFutures(key=API_KEY, secret=API_SECRET, base_url=BASE_URL)
 
+# Income records are kept locally; each run only downloads the new ones
+ledger = IncomeLedger(os.getenv("INCOME_LEDGER_PATH", "data/income.sqlite"))
+
 # Set timezone to UTC+7 (e.g., Bangkok, Jakarta)
 timezone_offset = timedelta(hours=7)
 tz = timezone(timezone_offset)
@@ -34,38 +39,45 @@ start_of_today = datetime(now_utc7.year, now_utc7.month, now_utc7.day, tzinfo=tz
 end_ts = int(start_of_today.timestamp() * 1000)  # Convert to milliseconds
 
 try:
-    # Fetch income history for yesterday
-    response = um_futures_client.get_income_history(
-        incomeType='REALIZED_PNL',
-        startTime=start_ts,
-        endTime=end_ts,
-        recvWindow=6000
+    # Page through everything after the newest stored record
+    ledger.sync(um_futures_client)
+except ClientError as error:
+    logging.error(
+        f"Found error. status: {error.status_code}, "
+        f"error code: {error.error_code}, "
+        f"error message: {error.error_message}"
     )
 
-    # Filter and log yesterday's REALIZED_PNL
-    if response:
-        yesterday = (now_utc7 - timedelta(days=1)).strftime('%Y-%m-%d')
-        logging.info(f"== YESTERDAY'S REALIZED PNL - {yesterday} ==")
-        total_pnl = 0
-        for entry in response:
-            income = float(entry['income'])
-            if income == 0:
-                continue  # Skip zero profits/losses
+# Filter and log yesterday's REALIZED_PNL
+records = ledger.records(start_ts, end_ts)
+if records:
+    yesterday = (now_utc7 - timedelta(days=1)).strftime('%Y-%m-%d')
+    logging.info(f"== YESTERDAY'S REALIZED PNL - {yesterday} ==")
+    total_pnl = 0
+    for entry in records:
+        income = entry['income']
+        symbol = entry['symbol']
+        time = datetime.fromtimestamp(entry['time'] / 1000).astimezone(tz).strftime('%Y-%m-%d %H:%M:%S')
+        status = "Profit" if income > 0 else "Loss"
+        total_pnl += income
 
-            symbol = entry['symbol']
-            time = datetime.fromtimestamp(entry['time'] / 1000).astimezone(tz).strftime('%Y-%m-%d %H:%M:%S')
-            status = "Profit" if income > 0 else "Loss"
-            total_pnl += income
+        logging.info(f"[{time}] {symbol} | {status}: {income:.2f} USDT")
 
-            logging.info(f"[{time}] {symbol} | {status}: {income:.2f} USDT")
+    logging.info(f"\nTotal Realized PnL for Yesterday: {total_pnl:.2f} USDT")
+else:
+    logging.info("No Realized PnL records found for yesterday.")
 
-        logging.info(f"\nTotal Realized PnL for Yesterday: {total_pnl:.2f} USDT")
-    else:
-        logging.info("No Realized PnL records found for yesterday.")
+# Aggregates over everything stored locally, no further requests
+logging.info("== REALIZED PNL PER DAY ==")
+for day, total, count in ledger.daily_pnl():
+    logging.info(f"{day} | {total:.2f} USDT | {count} records")
 
-except ClientError as error:
-    logging.error(
-        f"Found error. status: {error.status_code}, "
-        f"error code: {error.error_code}, "
-        f"error message: {error.error_message}"
-    )
\ No newline at end of file
+logging.info("== REALIZED PNL PER SYMBOL (yesterday) ==")
+for symbol, total, count in ledger.pnl_by_symbol(start_ts, end_ts):
+    logging.info(f"{symbol} | {total:.2f} USDT | {count} records")
+
+logging.info("== REALIZED PNL PER STRATEGY (yesterday) ==")
+for strategy, total, count in ledger.pnl_by_strategy(start_ts, end_ts):
+    logging.info(f"{strategy} | {total:.2f} USDT | {count} records")
+
+ledger.close()
@@ -0,0 +1,146 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from universe import DAY_OFFSET_HOURS
+
+log = logging.getLogger(__name__)
+
+
+# ==== Income Ledger ====
+# Local copy of the futures income history in an indexed SQLite file. sync()
+# pages through /fapi/v1/income by time cursor, starting at the newest stored
+# record, so each run downloads only what is new and busy days are never cut
+# off at the page limit. Daily, per-symbol and per-strategy PnL are queries on
+# the local file. Strategies are attached with tag() when a trade is opened;
+# an income record belongs to the latest tag of its symbol at or before it.
+PAGE_LIMIT = 1000  # Largest page /fapi/v1/income returns
+INITIAL_LOOKBACK_MS = 7 * 86_400_000  # An empty ledger starts with the last 7 days
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS income (
+    tran_id INTEGER NOT NULL,
+    income_type TEXT NOT NULL,
+    symbol TEXT,
+    asset TEXT,
+    income REAL NOT NULL,
+    time INTEGER NOT NULL,
+    trade_id TEXT,
+    info TEXT,
+    PRIMARY KEY (tran_id, income_type)
+);
+CREATE INDEX IF NOT EXISTS income_type_time ON income (income_type, time);
+CREATE INDEX IF NOT EXISTS income_symbol_time ON income (symbol, time);
+CREATE TABLE IF NOT EXISTS strategy_tags (
+    symbol TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    strategy TEXT NOT NULL,
+    PRIMARY KEY (symbol, time)
+);
+"""
+
+# Latest strategy tag of the record's symbol opened at or before the record
+STRATEGY_OF = """
+COALESCE((SELECT t.strategy FROM strategy_tags t
+          WHERE t.symbol = income.symbol AND t.time <= income.time
+          ORDER BY t.time DESC LIMIT 1), 'untagged')
+"""
+
+
+class IncomeLedger:
+    def __init__(self, path=':memory:', offset_hours=DAY_OFFSET_HOURS):
+        self.path = path
+        self.offset_seconds = offset_hours * 3600
+        directory = os.path.dirname(path) if path != ':memory:' else ''
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    # ==== Sync ====
+    def last_time(self, income_type='REALIZED_PNL'):
+        with self.lock:
+            row = self.db.execute("SELECT MAX(time) FROM income WHERE income_type = ?", (income_type,)).fetchone()
+        return row[0]
+
+    def sync(self, client, income_type='REALIZED_PNL', end_time=None):
+        # Download records newer than the last stored one; returns how many were added.
+        # The cursor starts at the last stored millisecond (duplicates are ignored) so
+        # records sharing a timestamp across a page boundary are never skipped.
+        end_time = end_time or int(time.time() * 1000)
+        cursor = self.last_time(income_type)
+        if cursor is None:
+            cursor = end_time - INITIAL_LOOKBACK_MS
+
+        added = pages = 0
+        while True:
+            page = client.get_income_history(
+                incomeType=income_type, startTime=cursor, endTime=end_time, limit=PAGE_LIMIT, recvWindow=6000
+            )
+            pages += 1
+            added += self.insert(page)
+            if len(page) < PAGE_LIMIT:
+                break
+            next_cursor = int(page[-1]['time'])
+            cursor = next_cursor if next_cursor > cursor else cursor + 1  # A full page inside one millisecond
+        log.info(f"[LEDGER] {added} new {income_type} records in {pages} page(s).")
+        return added
+
+    def insert(self, records):
+        rows = [
+            (int(r['tranId']), r['incomeType'], r.get('symbol') or None, r.get('asset'), float(r['income']),
+             int(r['time']), str(r.get('tradeId', '')), r.get('info'))
+            for r in records
+        ]
+        with self.lock, self.db:
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO income VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return self.db.total_changes - before
+
+    def tag(self, symbol, strategy, at=None):
+        # Attribute this symbol's income from `at` (epoch ms, default now) onward to `strategy`
+        at = at or int(time.time() * 1000)
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO strategy_tags VALUES (?, ?, ?)", (symbol, at, strategy))
+
+    # ==== Queries ====
+    def records(self, start_time, end_time, income_type='REALIZED_PNL', nonzero=True):
+        # Records with start_time <= time < end_time, oldest first
+        query = "SELECT * FROM income WHERE income_type = ? AND time >= ? AND time < ?"
+        if nonzero:
+            query += " AND income != 0"
+        with self.lock:
+            return self.db.execute(query + " ORDER BY time, tran_id", (income_type, start_time, end_time)).fetchall()
+
+    def daily_pnl(self, start_time=0, end_time=2 ** 62, income_type='REALIZED_PNL'):
+        # [(trading day, total, records)] with days split at the ledger's UTC offset
+        with self.lock:
+            return self.db.execute(
+                "SELECT strftime('%Y-%m-%d', time / 1000 + ?, 'unixepoch') AS day, SUM(income), COUNT(*) "
+                "FROM income WHERE income_type = ? AND time >= ? AND time < ? GROUP BY day ORDER BY day",
+                (self.offset_seconds, income_type, start_time, end_time),
+            ).fetchall()
+
+    def pnl_by_symbol(self, start_time=0, end_time=2 ** 62, income_type='REALIZED_PNL'):
+        with self.lock:
+            return self.db.execute(
+                "SELECT symbol, SUM(income) AS total, COUNT(*) FROM income "
+                "WHERE income_type = ? AND time >= ? AND time < ? GROUP BY symbol ORDER BY total DESC",
+                (income_type, start_time, end_time),
+            ).fetchall()
+
+    def pnl_by_strategy(self, start_time=0, end_time=2 ** 62, income_type='REALIZED_PNL'):
+        with self.lock:
+            return self.db.execute(
+                f"SELECT {STRATEGY_OF} AS strategy, SUM(income) AS total, COUNT(*) FROM income "
+                "WHERE income_type = ? AND time >= ? AND time < ? GROUP BY strategy ORDER BY total DESC",
+                (income_type, start_time, end_time),
+            ).fetchall()
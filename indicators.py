@@ -0,0 +1,372 @@
+import numpy as np
+
+
+# ==== Vectorized Indicator Engine ====
+# Every function takes a 2-D close-price matrix (symbols x bars) and computes
+# all symbols together, a block of bars at a time. Results match the `ta` library
+# (pandas ewm with adjust=False and min_periods=window) within float tolerance,
+# NaN gaps included.
+
+def _held_positions(valid):
+    # Index of each bar's latest valid value, the row's first one before it starts
+    positions = np.where(valid, np.arange(valid.shape[1]), -1)
+    positions = np.maximum.accumulate(positions, axis=1)
+    first = np.argmax(valid, axis=1)[:, None]
+    return np.where(positions < 0, first, positions)
+
+
+def _ewm_blocks(values, alpha, block):
+    # y[t] = y[t-1] + alpha * (x[t] - y[t-1]), seeded with the first value.
+    # Inside a block of bars the recursion has the closed form
+    #   y[s+j] = d^(j+1) * (y[s-1] + alpha * sum_k<=j x[s+k] / d^(k+1)),  d = 1 - alpha
+    # so each block is one cumsum over all symbols instead of a Python step per bar.
+    # The block length keeps d^-block far from overflow for every window used here.
+    out = np.empty(values.shape)
+    decay = 1.0 - alpha
+    powers = decay ** np.arange(1, block + 1)
+    weights = alpha / powers
+
+    state = values[:, 0].copy()
+    for start in range(0, values.shape[1], block):
+        chunk = values[:, start:start + block]
+        width = chunk.shape[1]
+        steps = np.cumsum(chunk * weights[:width], axis=1)
+        out[:, start:start + width] = powers[:width] * (state[:, None] + steps)
+        state = out[:, start + width - 1]
+    return out
+
+
+def _ewm_gaps(values, alpha):
+    # pandas' recursion around NaNs, a step per bar: a gap holds the value while its
+    # weight keeps decaying, and the next close is averaged in against what is left
+    decay = 1.0 - alpha
+    out = np.empty(values.shape)
+    state = np.full(len(values), np.nan)
+    weight = np.ones(len(values))
+    for t in range(values.shape[1]):
+        x = values[:, t]
+        seen = ~np.isnan(x)
+        started = ~np.isnan(state)
+        weight = np.where(started, weight * decay, weight)
+        mixed = (weight * state + alpha * x) / (weight + alpha)
+        state = np.where(started, np.where(seen, mixed, state), x)
+        weight = np.where(started & seen, 1.0, weight)
+        out[:, t] = state
+    return out
+
+
+def _ewm(values, alpha, min_periods, block=256):
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    if valid.all():
+        out = _ewm_blocks(values, alpha, block)
+        out[:, :min_periods - 1] = np.nan
+        return out
+
+    # Leading and trailing NaNs keep the closed form: the recursion starts at the first
+    # value and holds the last one. Interior gaps are rare enough in klines to step
+    started = np.maximum.accumulate(valid, axis=1)
+    continues = np.maximum.accumulate(valid[:, ::-1], axis=1)[:, ::-1]
+    gapped = (~valid & started & continues).any(axis=1)
+    out = np.empty(values.shape)
+    if not gapped.all():
+        positions = _held_positions(valid[~gapped])
+        held = _ewm_blocks(np.take_along_axis(values[~gapped], positions, axis=1), alpha, block)
+        out[~gapped] = np.take_along_axis(held, positions, axis=1)
+    if gapped.any():
+        out[gapped] = _ewm_gaps(values[gapped], alpha)
+    out[np.cumsum(valid, axis=1) < min_periods] = np.nan
+    return out
+
+
+def ema(close, window):
+    return _ewm(close, 2.0 / (window + 1), window)
+
+
+def rsi(close, window=14):
+    # Wilder smoothing: alpha = 1/window, the first bar's missing diff counts as 0
+    diff = np.zeros(close.shape)
+    diff[:, 1:] = close[:, 1:] - close[:, :-1]
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+
+    avg_up = _ewm(up, 1.0 / window, window)
+    avg_down = _ewm(down, 1.0 / window, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - (100 / (1 + avg_up / avg_down))
+    return np.where(avg_down == 0, 100.0, values)
+
+
+def macd(close, window_fast=12, window_slow=26, window_sign=9):
+    line = ema(close, window_fast) - ema(close, window_slow)
+    signal = ema(line, window_sign)
+    return line, signal, line - signal
+
+
+def compute_indicators(close):
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    macd_line, signal_line, hist = macd(close, 12, 26, 9)
+    return {
+        'EMA20': ema(close, 20),
+        'EMA50': ema(close, 50),
+        'EMA200': ema(close, 200),
+        'RSI': rsi(close, 14),
+        'MACD': macd_line,
+        'Signal': signal_line,
+        'Hist': hist,
+    }
+
+
+# ==== Incremental Indicator State ====
+# Same recursions as above, kept as running accumulators with one row per
+# symbol, so new closed candles cost one vectorized step over every warm symbol
+# instead of a recompute. The accumulators run over every bar since a symbol
+# was seeded, but the outputs cover exactly the bars of the frame passed in:
+# each recursion forgets its seed geometrically, so moving the seed to the
+# frame's first bar is a decayed correction from the accumulators recorded
+# at that bar. Warm and batch computed frames therefore give the same values.
+INDICATOR_NAMES = ('EMA20', 'EMA50', 'EMA200', 'RSI', 'MACD', 'Signal', 'Hist')
+
+# Accumulator columns: five EMAs of the close, the MACD signal line and RSI's average gain/loss
+EMA20, EMA50, EMA200, EMA12, EMA26, SIGNAL, RSI_UP, RSI_DOWN = range(8)
+ALPHAS = np.array([2.0 / 21, 2.0 / 51, 2.0 / 201, 2.0 / 13, 2.0 / 27, 2.0 / 10, 1.0 / 14, 1.0 / 14])
+DECAYS = 1.0 - ALPHAS
+MIN_PERIODS = np.array([20, 50, 200, 12, 26, 9, 14, 14])
+CLOSE_INPUTS = np.arange(8) != SIGNAL  # Accumulators stepped directly from the candle
+CLOSE_SEEDED = np.isin(np.arange(8), [EMA20, EMA50, EMA200, EMA12, EMA26])  # Seeded with the first close, RSI with 0
+SIGNAL_START = MIN_PERIODS[EMA26] - 1  # Bar of a frame its MACD signal line is seeded at
+
+
+def _seed(closes):
+    # Accumulators (rows x bars x 8) after each column of `closes` (rows x bars)
+    diff = np.zeros(closes.shape)
+    diff[:, 1:] = closes[:, 1:] - closes[:, :-1]
+    inputs = {EMA20: closes, EMA50: closes, EMA200: closes, EMA12: closes, EMA26: closes,
+              RSI_UP: np.where(diff > 0, diff, 0.0), RSI_DOWN: np.where(diff < 0, -diff, 0.0)}
+
+    values = np.empty(closes.shape + (8,))
+    for column, x in inputs.items():
+        values[:, :, column] = _ewm(x, ALPHAS[column], 1)
+
+    # The signal line only starts once the MACD line itself is defined
+    line = values[:, :, EMA12] - values[:, :, EMA26]
+    line[np.cumsum(~np.isnan(closes), axis=1) <= SIGNAL_START] = np.nan
+    values[:, :, SIGNAL] = _ewm(line, ALPHAS[SIGNAL], 1)
+    return values
+
+
+def _counts(bars):
+    # Accumulator counts (rows x 8) after `bars` bars
+    bars = np.asarray(bars)[:, None]
+    return np.where(CLOSE_INPUTS, bars, np.maximum(bars - SIGNAL_START, 0))
+
+
+def _step(value, count, prev_close, close):
+    # (value, count) after one more candle per row; the arguments are left untouched
+    diff = np.where(np.isnan(prev_close), 0.0, close - prev_close)
+    inputs = np.column_stack([close, close, close, close, close, close, np.maximum(diff, 0.0), np.maximum(-diff, 0.0)])
+    stepped = np.where(count == 0, inputs, value + ALPHAS * (inputs - value))
+    value = np.where(CLOSE_INPUTS, stepped, value)
+    count = count + CLOSE_INPUTS
+
+    line = np.where(count[:, EMA26] >= MIN_PERIODS[EMA26], value[:, EMA12] - value[:, EMA26], np.nan)
+    ready = ~np.isnan(line)
+    signal = np.where(count[:, SIGNAL] == 0, line, value[:, SIGNAL] + ALPHAS[SIGNAL] * (line - value[:, SIGNAL]))
+    value[:, SIGNAL] = np.where(ready, signal, value[:, SIGNAL])
+    count[:, SIGNAL] += ready
+    return value, count
+
+
+def _rebase(value, start, lagged, first_close, bars):
+    # Accumulators `value` reseeded at the first of their last `bars` bars, given the
+    # accumulators after that bar (`start`) and SIGNAL_START bars later (`lagged`).
+    # An EMA seeded later differs by decay^span * (its seed - the running value there).
+    span = bars - 1
+    powers = DECAYS ** np.arange(span.max() + 2)[:, None]  # decay^k of every column, looked up by span
+    seed = np.where(CLOSE_SEEDED, first_close[:, None], 0.0)
+    rebased = value + powers[span] * (seed - start)
+
+    # The signal line is an EMA of the MACD line, whose correction is itself a sum of two
+    # geometric series: the signal's own seed at SIGNAL_START, and the fast and slow
+    # EMAs' corrections carried through every bar after it
+    gap = first_close[:, None] - start[:, [EMA12, EMA26]]
+    lead = DECAYS[[EMA12, EMA26]] ** SIGNAL_START * gap
+    line = (lagged[:, EMA12] + lead[:, 0]) - (lagged[:, EMA26] + lead[:, 1])
+    since = powers[np.maximum(span - SIGNAL_START, 0), SIGNAL]
+    carried = [(powers[span + 1, ema] - since * DECAYS[ema] ** (SIGNAL_START + 1)) / (DECAYS[ema] - DECAYS[SIGNAL])
+               for ema in (EMA12, EMA26)]
+    rebased[:, SIGNAL] = (value[:, SIGNAL] + since * (line - lagged[:, SIGNAL])
+                          + ALPHAS[SIGNAL] * (gap[:, 0] * carried[0] - gap[:, 1] * carried[1]))
+    return rebased, _counts(bars)
+
+
+def _outputs(value, count):
+    # Indicator matrix (rows x INDICATOR_NAMES) of the accumulators
+    out = np.where(count >= MIN_PERIODS, value, np.nan)
+    avg_up, avg_down = out[:, RSI_UP], out[:, RSI_DOWN]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi_value = np.where(avg_down == 0, 100.0, 100 - (100 / (1 + avg_up / avg_down)))
+    macd_line = out[:, EMA12] - out[:, EMA26]
+    return np.column_stack([
+        out[:, EMA20], out[:, EMA50], out[:, EMA200], rsi_value, macd_line, out[:, SIGNAL], macd_line - out[:, SIGNAL],
+    ])
+
+
+def rolling_indicators(close, window, cells=1 << 20):
+    # compute_indicators of the `window` bars ending at every bar, as a live scan fetching
+    # that many klines sees them: the accumulators of each bar reseeded at its window's
+    # first bar, or the symbol's first close when it listed later. Windows with a missing
+    # close inside are NaN. Runs a block of symbols at a time to bound memory.
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    out = np.empty(close.shape + (len(INDICATOR_NAMES),))
+    bars = close.shape[1]
+    step = max(1, cells // max(bars, 1))
+    for top in range(0, len(close), step):
+        block = close[top:top + step]
+        values = _seed(block)
+        valid = ~np.isnan(block)
+        rows = np.arange(len(block))[:, None]
+        end = np.arange(bars)[None, :]
+        start = np.minimum(np.maximum(end - window + 1, np.argmax(valid, axis=1)[:, None]), end)
+        lagged = np.minimum(start + SIGNAL_START, end)
+        rebased = _rebase(values.reshape(-1, 8), values[rows, start].reshape(-1, 8), values[rows, lagged].reshape(-1, 8),
+                          block[rows, start].ravel(), (end - start + 1).ravel())
+        result = _outputs(*rebased).reshape(block.shape + (len(INDICATOR_NAMES),))
+
+        missing = np.cumsum(~valid, axis=1)
+        gapped = missing - missing[rows, start] + ~valid[rows, start] > 0
+        result[gapped] = np.nan
+        out[top:top + len(block)] = result
+    return {name: out[:, :, j] for j, name in enumerate(INDICATOR_NAMES)}
+
+
+class IndicatorBook:
+    def __init__(self, capacity=256, history=256):
+        self.rows = {}  # symbol -> row of the state arrays
+        self.free = list(range(capacity - 1, -1, -1))
+        self.history = history  # Bars of accumulators kept per symbol; longer frames are always batch computed
+        self.value = np.full((capacity, 8), np.nan)
+        self.count = np.zeros((capacity, 8), dtype=np.int64)
+        self.prev_close = np.full(capacity, np.nan)
+        self.bars = np.zeros(capacity, dtype=np.int64)  # Bars committed since the symbol was seeded
+        self.trail = np.full((capacity, history, 8), np.nan)  # Accumulators after each bar, by bar number % history
+        self.trail_time = np.full((capacity, history), -1, dtype=np.int64)  # Close times of those bars
+
+    def sync(self, frames):
+        # `frames` maps symbols to kline frames whose last row is the forming candle.
+        # Symbols with warm state get their indicator columns filled for the last
+        # closed bar and the forming candle (NaN before them) and are returned as a
+        # set; the rest are (re)seeded from their closed bars and left for the
+        # caller to batch compute.
+        warm, cold = [], []
+        for symbol, frame in frames.items():
+            row = self.rows.get(symbol)
+            if row is not None:
+                start = self._resume(row, frame['close_time'])
+                if start is not None:
+                    warm.append((symbol, row, start))
+                    continue
+            cold.append(symbol)
+        self._seed(cold, frames)
+        if warm:
+            self._fill(warm, frames)
+        return {symbol for symbol, _, _ in warm}
+
+    def _resume(self, row, close_times):
+        # Frame index of the first bar to commit, or None unless the symbol's recorded
+        # bars reach back to the frame's first one
+        last = self.bars[row] - 1
+        matches = np.flatnonzero(close_times[:-1] == self.trail_time[row, last % self.history])
+        if not len(matches) or len(close_times) - 1 > self.history or matches[0] > last:
+            return None
+        first = last - matches[0]
+        return matches[0] + 1 if self.trail_time[row, first % self.history] == close_times[0] else None
+
+    def _seed(self, symbols, frames):
+        by_bars = {}
+        for symbol in symbols:
+            by_bars.setdefault(len(frames[symbol]['c']) - 1, []).append(symbol)
+        for bars, group in by_bars.items():
+            if bars < 1:
+                for symbol in group:
+                    self.drop(symbol)
+                continue
+            closes = np.vstack([frames[symbol]['c'][:-1] for symbol in group]).astype(np.float64)
+            rows = np.array([self._row(symbol) for symbol in group])
+            values = _seed(closes)
+            self.value[rows], self.count[rows] = values[:, -1], _counts(np.full(len(rows), bars))
+            self.prev_close[rows] = closes[:, -1]
+            self.bars[rows] = bars
+
+            kept = min(bars, self.history)
+            positions = np.arange(bars - kept, bars) % self.history
+            self.trail[rows[:, None], positions] = values[:, -kept:]
+            self.trail_time[rows[:, None], positions] = [frames[symbol]['close_time'][-kept - 1:-1] for symbol in group]
+
+    def _fill(self, warm, frames):
+        # Commit the closed bars each symbol is missing, a step per bar offset across all of them
+        rows = np.array([row for _, row, _ in warm])
+        starts = np.array([start for _, _, start in warm])
+        lengths = np.array([len(frames[symbol]['c']) for symbol, _, _ in warm])
+        ends = lengths - 1
+        for offset in range(int((ends - starts).max())):
+            active = np.flatnonzero(starts + offset < ends)
+            index = rows[active]
+            closes = np.array([frames[warm[i][0]]['c'][starts[i] + offset] for i in active], dtype=np.float64)
+            self.value[index], self.count[index] = _step(self.value[index], self.count[index], self.prev_close[index], closes)
+            self.prev_close[index] = closes
+            self._record(index, [frames[warm[i][0]]['close_time'][starts[i] + offset] for i in active])
+
+        # Both bars are reseeded at the frame's first bar; the forming candle is evaluated
+        # without touching the state
+        first = self.bars[rows] - ends
+        first_close = np.array([frames[symbol]['c'][0] for symbol, _, _ in warm], dtype=np.float64)
+        start = self.trail[rows, first % self.history]
+        lagged = self.trail[rows, np.minimum(first + SIGNAL_START, self.bars[rows] - 1) % self.history]
+        forming = np.array([frames[symbol]['c'][-1] for symbol, _, _ in warm], dtype=np.float64)
+        forming_value, _ = _step(self.value[rows], self.count[rows], self.prev_close[rows], forming)
+        closed = _outputs(*_rebase(self.value[rows], start, lagged, first_close, ends))
+        current = _outputs(*_rebase(forming_value, start, lagged, first_close, lengths))
+
+        by_length = {}
+        for i, length in enumerate(lengths):
+            by_length.setdefault(length, []).append(i)
+        for length, indexes in by_length.items():
+            # One allocation per frame length; every frame gets views of its rows
+            columns = np.full((len(INDICATOR_NAMES), len(indexes), length), np.nan)
+            columns[:, :, -2] = closed[indexes].T
+            columns[:, :, -1] = current[indexes].T
+            for k, i in enumerate(indexes):
+                frames[warm[i][0]].update({name: columns[j, k] for j, name in enumerate(INDICATOR_NAMES)})
+
+    def _record(self, rows, close_times):
+        position = self.bars[rows] % self.history
+        self.trail[rows, position] = self.value[rows]
+        self.trail_time[rows, position] = close_times
+        self.bars[rows] += 1
+
+    def _row(self, symbol):
+        row = self.rows.get(symbol)
+        if row is None:
+            if not self.free:
+                self._grow()
+            row = self.rows[symbol] = self.free.pop()
+        return row
+
+    def _grow(self):
+        size = len(self.prev_close)
+        capacity = max(2 * size, 1)
+        self.value = np.concatenate([self.value, np.full((capacity - size, 8), np.nan)])
+        self.count = np.concatenate([self.count, np.zeros((capacity - size, 8), dtype=np.int64)])
+        self.prev_close = np.concatenate([self.prev_close, np.full(capacity - size, np.nan)])
+        self.bars = np.concatenate([self.bars, np.zeros(capacity - size, dtype=np.int64)])
+        self.trail = np.concatenate([self.trail, np.full((capacity - size, self.history, 8), np.nan)])
+        self.trail_time = np.concatenate([self.trail_time, np.full((capacity - size, self.history), -1, dtype=np.int64)])
+        self.free.extend(range(capacity - 1, size - 1, -1))
+
+    def drop(self, symbol):
+        row = self.rows.pop(symbol, None)
+        if row is not None:
+            self.bars[row] = 0
+            self.free.append(row)
@@ -0,0 +1,170 @@
+import argparse
+import os
+import time
+import numpy as np
+
+
+# ==== On-Disk Kline Store ====
+# One flat float64 file per symbol/interval holding closed candles in the same
+# 12-column layout the klines endpoint returns. Appends are plain writes at the
+# end of the file and reads are memory-mapped, so slicing the tail is zero-copy.
+# Files only grow; prune() trims them to a retention window (run before the
+# store is cached between CI runs).
+KLINE_COLUMNS = 12
+MAX_KLINE_LIMIT = 1500
+RETENTION_DAYS = 30  # Covers the optimizer's default 14+7 day walk-forward and the 4h trend's history
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000,
+}
+
+
+class KlineStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, symbol, interval):
+        return os.path.join(self.root, f"{symbol}_{interval}.f64")
+
+    def read(self, symbol, interval, limit=None):
+        path = self.path(symbol, interval)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty((0, KLINE_COLUMNS))
+        rows = np.memmap(path, dtype=np.float64, mode='r').reshape(-1, KLINE_COLUMNS)
+        return rows if limit is None else rows[-limit:]
+
+    def last_open_time(self, symbol, interval):
+        rows = self.read(symbol, interval, 1)
+        return int(rows[-1, 0]) if len(rows) else None
+
+    def append(self, symbol, interval, rows):
+        last_open = self.last_open_time(symbol, interval)
+        if last_open is not None:
+            rows = rows[rows[:, 0] > last_open]
+        if len(rows):
+            with open(self.path(symbol, interval), 'ab') as f:
+                f.write(np.ascontiguousarray(rows, dtype=np.float64).tobytes())
+        return len(rows)
+
+    def replace(self, symbol, interval, rows):
+        path = self.path(symbol, interval)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(np.ascontiguousarray(rows, dtype=np.float64).tobytes())
+        os.replace(tmp_path, path)
+
+    def prune(self, max_age_ms, now_ms=None):
+        # Drop candles that opened more than `max_age_ms` ago, and files left with none.
+        # Returns the number of candles removed
+        cutoff = (now_ms or int(time.time() * 1000)) - max_age_ms
+        removed = 0
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith('.f64'):
+                continue
+            symbol, _, interval = name[:-len('.f64')].rpartition('_')
+            rows = self.read(symbol, interval)
+            start = int(np.searchsorted(rows[:, 0], cutoff))
+            if not start:
+                continue
+            removed += start
+            if start < len(rows):
+                self.replace(symbol, interval, rows[start:])
+            else:
+                os.remove(self.path(symbol, interval))
+        return removed
+
+
+def to_array(klines):
+    if not klines:
+        return np.empty((0, KLINE_COLUMNS))
+    return np.array(klines, dtype=np.float64).reshape(-1, KLINE_COLUMNS)
+
+
+def fetch_klines(store, market, symbol, interval, limit=210, now_ms=None):
+    # Returns the newest `limit` rows (closed history plus the forming candle),
+    # downloading only the bars after the last stored close.
+    now_ms = now_ms or int(time.time() * 1000)
+    step = INTERVAL_MS[interval]
+    last_open = store.last_open_time(symbol, interval)
+
+    fresh = None
+    if last_open is not None:
+        missing = (now_ms - last_open) // step + 1
+        if missing < MAX_KLINE_LIMIT:
+            fresh = to_array(market.klines(symbol=symbol, interval=interval, startTime=last_open + step, limit=int(missing) + 1))
+
+    if fresh is None:
+        # Nothing stored, or the gap is too long to bridge in one request
+        fresh = to_array(market.klines(symbol=symbol, interval=interval, limit=limit))
+        store.replace(symbol, interval, fresh[fresh[:, 6] < now_ms])
+    else:
+        store.append(symbol, interval, fresh[fresh[:, 6] < now_ms])
+
+    forming = fresh[fresh[:, 6] >= now_ms]
+    return np.concatenate([store.read(symbol, interval, limit), forming])[-limit:]
+
+
+# ==== Higher Timeframes ====
+# 15m/1h/4h candles are aggregated from the stored base candles, so a
+# higher-timeframe trend costs no extra request once enough history is kept.
+def resample_klines(rows, base_interval, interval):
+    # Complete `interval` candles built from consecutive closed `base_interval` rows.
+    # Buckets follow Binance's epoch-aligned opens; partial buckets are dropped.
+    step = INTERVAL_MS[interval]
+    ratio = step // INTERVAL_MS[base_interval]
+    if not len(rows):
+        return np.empty((0, KLINE_COLUMNS))
+
+    buckets = rows[:, 0].astype(np.int64) // step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, len(rows)])
+    ends = starts + counts - 1
+
+    out = np.empty((len(starts), KLINE_COLUMNS))
+    out[:, 0] = buckets[starts] * step
+    out[:, 1] = rows[starts, 1]
+    out[:, 2] = np.maximum.reduceat(rows[:, 2], starts)
+    out[:, 3] = np.minimum.reduceat(rows[:, 3], starts)
+    out[:, 4] = rows[ends, 4]
+    out[:, 6] = out[:, 0] + step - 1
+    for column in (5, 7, 8, 9, 10):
+        out[:, column] = np.add.reduceat(rows[:, column], starts)
+    out[:, 11] = 0
+    return out[counts == ratio]
+
+
+def higher_timeframe_klines(store, market, symbol, base_interval, interval, limit=60, base_rows=None, now_ms=None):
+    # The newest `limit` closed `interval` candles. Resampled from local base history
+    # (the store, else `base_rows`); downloaded only when that history is too short.
+    now_ms = now_ms or int(time.time() * 1000)
+    step = INTERVAL_MS[interval]
+    ratio = step // INTERVAL_MS[base_interval]
+
+    history = store.read(symbol, base_interval, (limit + 1) * ratio) if store else base_rows
+    if history is not None and len(history):
+        history = history[history[:, 6] < now_ms]
+        resampled = resample_klines(history, base_interval, interval)
+        if len(resampled) >= limit:
+            return resampled[-limit:]
+
+    if store:
+        # A stored download is reused until its next candle closes
+        if store.last_open_time(symbol, interval) == (now_ms // step - 1) * step:
+            return np.array(store.read(symbol, interval, limit))
+        rows = fetch_klines(store, market, symbol, interval, limit + 1, now_ms)
+    else:
+        rows = to_array(market.klines(symbol=symbol, interval=interval, limit=limit + 1))
+    return rows[rows[:, 6] < now_ms][-limit:]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Trim the local kline store to a retention window.')
+    parser.add_argument('--store', default=os.getenv("KLINE_STORE_DIR", "data/klines"))
+    parser.add_argument('--keep-days', type=float, default=float(os.getenv("KLINE_RETENTION_DAYS", RETENTION_DAYS)))
+    args = parser.parse_args()
+
+    removed = KlineStore(args.store).prune(int(args.keep_days * 86_400_000))
+    print(f"[STORE] Removed {removed} candles older than {args.keep_days:g} days from {args.store}")
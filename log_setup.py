@@ -0,0 +1,98 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from collections import deque
+
+
+# ==== Structured Logging ====
+# One logging layer for the bot. Records go through a QueueHandler so the
+# caller only enqueues; a QueueListener thread formats and writes them as text
+# or JSON lines. DEBUG detail from the "bot" loggers (per-symbol scan lines,
+# signal attempt traces) is kept in a ring buffer instead of being written, and
+# the buffer is dumped in front of the next ERROR record to give it context.
+BOT_LOGGER = 'bot'
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(message)s'
+
+# LogRecord attributes that are not user supplied `extra` fields
+STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RingBufferHandler(logging.Handler):
+    # Keeps records below the target's level; an ERROR (or worse) dumps them into the target first
+    def __init__(self, target, capacity=20, flush_level=logging.ERROR):
+        super().__init__(logging.DEBUG)
+        self.target = target
+        self.flush_level = flush_level
+        self.buffer = deque(maxlen=capacity)
+
+    def emit(self, record):
+        if record.levelno >= self.flush_level:
+            self.dump()
+        elif record.levelno < self.target.level:
+            self.buffer.append(record)
+
+    def dump(self):
+        with self.lock:
+            records = list(self.buffer)
+            self.buffer.clear()
+        for record in records:
+            record.buffered = True
+            self.target.handle(record)
+
+
+def setup_logging(level='INFO', fmt='text', trace_capacity=20, stream=None):
+    # Idempotent: later calls only return the existing listener
+    global _listener
+    if _listener:
+        return _listener
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    enqueue = logging.handlers.QueueHandler(log_queue)
+    enqueue.setLevel(logging.getLevelName(level.upper()) if isinstance(level, str) else level)
+
+    root = logging.getLogger()
+    root.setLevel(enqueue.level)
+    root.handlers = [enqueue]
+
+    # The bot's own loggers record DEBUG for the ring buffer only
+    bot = logging.getLogger(BOT_LOGGER)
+    bot.setLevel(logging.DEBUG)
+    if trace_capacity and enqueue.level > logging.DEBUG:
+        bot.addHandler(RingBufferHandler(enqueue, trace_capacity))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    # Drain the queue and stop the writer thread
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
@@ -3,48 +3,56 @@ import time
 import pandas as pd
 import csv
 import os
-import requests
 import logging
+import signal
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from binance.um_futures import UMFutures
-from ta.trend import EMAIndicator, MACD
-from ta.momentum import RSIIndicator
+import numpy as np
 from datetime import datetime, timedelta, timezone
 from binance.error import ClientError
+from symbol_filters import SymbolFilters
+from scanner import WeightBudget, scan_klines
+from indicators import compute_indicators, IndicatorBook
+from market_stream import MarketStream
+from user_stream import UserStream
+from kline_store import KlineStore, fetch_klines, higher_timeframe_klines, to_array, INTERVAL_MS
+import strategy
+from telegram_notifier import TelegramNotifier
+from price_snapshot import PriceSnapshot
+from rate_governor import RateGovernor, GovernedUMFutures
+from metrics import Metrics
+from log_setup import setup_logging
+from universe import SymbolUniverse, next_day_start, trading_day
+from income_ledger import IncomeLedger
+from trade_journal import TradeJournal
+from scan_planner import ScanQueue, prescreen_scores, signal_target
+from market_feed import FeedReader, shard_of
+from account_board import AccountBoard
 
 
 #load environment variables
 from dotenv import load_dotenv
-load_dotenv(override=True)
+load_dotenv(os.getenv("ENV_FILE") or None, override=True)  # coordinator.py points each account worker at its own file
 
 
-# ==== External Function ====
-def send_telegram_message(text):
-   token = os.getenv('TELEGRAM_BOT_TOKEN')
-   chat_id = os.getenv('TELEGRAM_CHAT_ID')
-   url = f"https://api.telegram.org/bot{token}/sendMessage"
-   payload = {
-       "chat_id": chat_id,
-       "text": text,
-       "parse_mode": "HTML"
-   }
-   try:
-       response = requests.post(url, data=payload)
-       response.raise_for_status()
-   except Exception as e:
-       print(f"Telegram error: {e}")
+log = logging.getLogger('bot')
 
 
-def get_yesterday_pnl(api_key, api_secret, testnet=True):
-   # Logging setup
-   logging.basicConfig(level=logging.INFO, format='%(message)s')
+# ==== External Function ====
+def send_telegram_message(text):
+   # Queued and posted by a background worker, never blocks the caller
+   telegram.send(text)
 
 
-   # Use testnet or live URL
-   base_url = 'https://testnet.binancefuture.com' if testnet else 'https://fapi.binance.com'
+def get_yesterday_pnl(api_key, api_secret, testnet=True, base_url=None, ledger=None):
+   # Use testnet or live URL unless an explicit one (e.g. mock_binance.py) is given
+   base_url = base_url or ('https://testnet.binancefuture.com' if testnet else 'https://fapi.binance.com')
   
    # Initialize client
    um_futures_client = UMFutures(key=api_key, secret=api_secret, base_url=base_url)
+   ledger = ledger or IncomeLedger()
 
 
    # Set timezone to UTC+7
@@ -60,62 +68,10 @@ def get_yesterday_pnl(api_key, api_secret, testnet=True):
 
 
    try:
-       response = um_futures_client.get_income_history(
-           incomeType='REALIZED_PNL',
-           startTime=start_ts,
-           endTime=end_ts,
-           recvWindow=6000
-       )
-
-
-       if response:
-           yesterday = (now_utc7 - timedelta(days=1)).strftime('%Y-%m-%d')
-           logging.info(f"== YESTERDAY'S REALIZED PNL - {yesterday} ==")
-           total_pnl = 0
-           trade_details = []
-           for entry in response:
-               income = float(entry['income'])
-               if income == 0:
-                   continue
-
-
-               symbol = entry['symbol']
-               time = datetime.fromtimestamp(entry['time'] / 1000).astimezone(tz).strftime('%Y-%m-%d %H:%M:%S')
-               status = "Profit" if income > 0 else "Loss"
-               total_pnl += income
-
-
-               trade_details.append(f"[{time}] {symbol} | {status}: {income:.2f} USDT")
-               logging.info(f"[{time}] {symbol} | {status}: {income:.2f} USDT")
-
-
-           logging.info(f"\nTotal Realized PnL for Yesterday: {total_pnl:.2f} USDT")
-          
-           # Prepare the message for Telegram
-           # Prepare and send Telegram message
-           message_lines = [f"<b>📊 PNL - {yesterday}</b>"]
-           for entry in response:
-               income = float(entry['income'])
-               if income == 0:
-                   continue
-               symbol = entry['symbol']
-               hour_min = datetime.fromtimestamp(entry['time'] / 1000).astimezone(tz).strftime('%H:%M')
-               status = "Profit" if income > 0 else "Loss"
-               message_lines.append(f"[{hour_min}] <code>{symbol}</code> | {status}: <code>{income:.2f} USDT</code>")
-           message_lines.append(f"\n<b>Total:</b> <code>{total_pnl:.2f} USDT</code>")
-           message = "\n".join(message_lines)
-
-
-           send_telegram_message(message)
-           return total_pnl
-       else:
-           logging.info("No Realized PnL records found for yesterday.")
-           send_telegram_message("❌ No Realized PnL records found for yesterday.")
-           return 0
-
-
+       # Only records after the newest stored one are downloaded, page by page
+       ledger.sync(um_futures_client)
    except ClientError as error:
-       logging.error(
+       log.error(
            f"Found error. status: {error.status_code}, "
            f"error code: {error.error_code}, "
            f"error message: {error.error_message}"
@@ -123,6 +79,35 @@ def get_yesterday_pnl(api_key, api_secret, testnet=True):
        send_telegram_message(f"❌ Error fetching PnL data: {error.error_message}")
        return None
 
+   records = ledger.records(start_ts, end_ts)
+   if not records:
+       log.info("No Realized PnL records found for yesterday.")
+       send_telegram_message("❌ No Realized PnL records found for yesterday.")
+       return 0
+
+   yesterday = (now_utc7 - timedelta(days=1)).strftime('%Y-%m-%d')
+   log.info(f"== YESTERDAY'S REALIZED PNL - {yesterday} ==")
+   total_pnl = 0
+   message_lines = [f"<b>📊 PNL - {yesterday}</b>"]
+   for entry in records:
+       income = entry['income']
+       symbol = entry['symbol']
+       record_time = datetime.fromtimestamp(entry['time'] / 1000).astimezone(tz)
+       status = "Profit" if income > 0 else "Loss"
+       total_pnl += income
+
+       log.info(f"[{record_time:%Y-%m-%d %H:%M:%S}] {symbol} | {status}: {income:.2f} USDT")
+       message_lines.append(f"[{record_time:%H:%M}] <code>{symbol}</code> | {status}: <code>{income:.2f} USDT</code>")
+
+   log.info(f"\nTotal Realized PnL for Yesterday: {total_pnl:.2f} USDT")
+   for strategy_name, strategy_pnl, count in ledger.pnl_by_strategy(start_ts, end_ts):
+       log.info(f"[PNL] {strategy_name}: {strategy_pnl:.2f} USDT over {count} records")
+
+   # Prepare and send Telegram message
+   message_lines.append(f"\n<b>Total:</b> <code>{total_pnl:.2f} USDT</code>")
+   send_telegram_message("\n".join(message_lines))
+   return total_pnl
+
 
 # ==== CONFIG ====
 API_KEY = os.getenv("API_KEY") # Fill this in
@@ -134,130 +119,280 @@ RISK_PER_TRADE = float(os.getenv("RISK_PER_TRADE", 0.5))  # Convert to float
 TP_USDT = float(os.getenv("TP_USDT", 0.5))  # Convert to float
 LEVERAGE = float(os.getenv("LEVERAGE", 20))  # Convert to float
 MAX_TRADES_PER_DAY = int(os.getenv("MAX_TRADES_PER_DAY", 6))  # Convert to int
+EXCHANGE_INFO_TTL = int(os.getenv("EXCHANGE_INFO_TTL", 3600))  # Seconds before symbol filters are re-downloaded
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", 10))  # Concurrent kline requests while scanning
+SCAN_WEIGHT_PER_MINUTE = int(os.getenv("SCAN_WEIGHT_PER_MINUTE", 1200))  # Share of the 2400/min weight limit used by scanning
+STREAMING = os.getenv("STREAMING", 'False').lower() in ('true', '1', 't')  # Read market data from the websocket instead of REST
+STREAM_URL = os.getenv("STREAM_URL")  # Override the websocket URL, e.g. a local replay_server.py
+STREAM_RECORD_PATH = os.getenv("STREAM_RECORD_PATH")  # Record raw stream messages for replay
+USER_STREAM = os.getenv("USER_STREAM", 'False').lower() in ('true', '1', 't')  # Track orders and positions from the user data stream (real fills, SL/TP closes)
+USER_STREAM_URL = os.getenv("USER_STREAM_URL")  # Override the user data stream URL, e.g. a local mock_binance.py
+FILL_WAIT_TIMEOUT = float(os.getenv("FILL_WAIT_TIMEOUT", 2))  # Seconds to wait for a market order's fill on the user data stream
+KLINE_STORE_DIR = os.getenv("KLINE_STORE_DIR", "data/klines")  # Local kline history, set empty to disable
+PRICE_SNAPSHOT_MAX_AGE = float(os.getenv("PRICE_SNAPSHOT_MAX_AGE", 10))  # Seconds a bulk mark-price snapshot is reused
+TICKER_SNAPSHOT_MAX_AGE = float(os.getenv("TICKER_SNAPSHOT_MAX_AGE", 60))  # Seconds a bulk 24h ticker snapshot is reused
+PRICE_RECHECK_MAX_AGE = float(os.getenv("PRICE_RECHECK_MAX_AGE", 1))  # Freshness required for the pre-order drift check
+WEIGHT_LIMIT_PER_MINUTE = int(os.getenv("WEIGHT_LIMIT_PER_MINUTE", 2400))  # Binance USDⓈ-M request weight limit
+ORDER_LIMIT_PER_MINUTE = int(os.getenv("ORDER_LIMIT_PER_MINUTE", 1200))  # Binance USDⓈ-M order count limit
+VERBOSE_SIGNALS = os.getenv("VERBOSE_SIGNALS", 'False').lower() in ('true', '1', 't')  # Print the per-attempt signal trace
+BINANCE_BASE_URL = os.getenv("BINANCE_BASE_URL")  # Override the REST URL, e.g. a local mock_binance.py
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # Serve Prometheus metrics on this local port, 0 to disable
+METRICS_SUMMARY_PATH = os.getenv("METRICS_SUMMARY_PATH", "data/metrics_summary.json")  # JSON timing summary written at the end of the run
+TRADE_JOURNAL_PATH = os.getenv("TRADE_JOURNAL_PATH", "data/trades.sqlite")  # Every place_trade attempt (SQLite), set empty to keep it in memory
+INCOME_LEDGER_PATH = os.getenv("INCOME_LEDGER_PATH", "data/income.sqlite")  # Local income history (SQLite), set empty to keep it in memory
+UNIVERSE_PATH = os.getenv("UNIVERSE_PATH", "data/universe.json")  # Symbol exclusions kept between runs, set empty to disable
+SYMBOL_REJECT_TTL = int(os.getenv("SYMBOL_REJECT_TTL", 86400))  # Seconds a symbol the exchange rejects for its own filters stays excluded
+DAEMON = os.getenv("DAEMON", 'False').lower() in ('true', '1', 't')  # Keep running and scan every candle instead of exiting after one cycle
+DAEMON_SCAN_DELAY = float(os.getenv("DAEMON_SCAN_DELAY", 5))  # Seconds after each candle close before the next scan
+SCAN_EARLY_STOP = os.getenv("SCAN_EARLY_STOP", 'True').lower() in ('true', '1', 't')  # Scan in pre-screen order and stop once enough score-100 signals exist
+SCAN_BATCH_SIZE = int(os.getenv("SCAN_BATCH_SIZE", 40))  # Symbols fetched per planner batch before checking whether to stop
+SCAN_SPARE_SIGNALS = int(os.getenv("SCAN_SPARE_SIGNALS", 2))  # Extra score-100 signals kept as backups for rejected trades
+HTF_INTERVALS = [i.strip() for i in os.getenv("HTF_INTERVALS", "").split(',') if i.strip()]  # Higher-timeframe trend filters, e.g. "15m,1h,4h"
+HTF_KLINE_LIMIT = int(os.getenv("HTF_KLINE_LIMIT", 60))  # Closed higher-timeframe candles per indicator (EMA50 needs 50)
+MARKET_FEED = os.getenv("MARKET_FEED")  # Shared memory published by coordinator.py; read market data from it instead of REST
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", 0))  # This worker's part of the symbol universe...
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 1))  # ...out of this many
+SHARD_BOARD_PATH = os.getenv("SHARD_BOARD_PATH", "data/board.sqlite")  # Signal ranking and trade cap shared by the shards of one account
+SHARD_RANK_TIMEOUT = float(os.getenv("SHARD_RANK_TIMEOUT", 60))  # Seconds to wait for the other shards' signals before ranking without them
 TODAY = datetime.now().strftime('%Y-%m-%d')
 
+# Exchange rejections caused by the symbol's own filters/status; retrying before the TTL is wasted weight
+SYMBOL_REJECT_CODES = {
+    -1111: 'Precision over the maximum',
+    -4140: 'Symbol not open for new positions',
+    -4164: 'MIN_NOTIONAL too high',
+}
+
+
+for htf in HTF_INTERVALS:
+    # Higher timeframes are resampled from INTERVAL candles, so each must be a whole multiple of it
+    if htf not in INTERVAL_MS or INTERVAL_MS[htf] <= INTERVAL_MS[INTERVAL] or INTERVAL_MS[htf] % INTERVAL_MS[INTERVAL]:
+        raise ValueError(f"HTF_INTERVALS: {htf} is not a multiple of {INTERVAL}")
+if MARKET_FEED and HTF_INTERVALS:
+    raise ValueError("HTF_INTERVALS is not available with MARKET_FEED; the coordinator publishes base-interval indicators only")
+
+
+# ==== RUNTIME STATE ====
+# Created by initialize() when the bot runs; benchmark.py and the tests assign stubs instead
+telegram = None
+metrics = None
+income_ledger = None
+governor = None
+client = None
+market = None  # Source of klines, tickers and mark prices
+feed = None
+user_stream = None
+current_day = None
+trade_journal = None
+weight_budget = None
+indicator_book = None
+kline_store = None
+prices = None
+universe = None
+symbol_filters = None
+board = None  # Only with SHARD_COUNT > 1
+symbol_precisions = {}
+trades_today = 0
+stop_event = threading.Event()  # Set by SIGTERM/SIGINT to finish the current step and shut down
+potential_pair = [] #  List to track potential pairs
+top_signals = [] # List to track top signals
+
 
 # ==== INITIALIZE ====
-print(f"[START] Starting bot...")
-get_yesterday_pnl(API_KEY, API_SECRET, TESTNET)
-BASE_URL = 'https://testnet.binancefuture.com' if TESTNET else 'https://fapi.binance.com'
-client = UMFutures(key=API_KEY, secret=API_SECRET, base_url=BASE_URL)
-trades_today = max(0, min(0, MAX_TRADES_PER_DAY))
-current_day = time.strftime('%Y-%m-%d')
-trade_log = []
-send_telegram_message(f"Bot started on {current_day}. Monitoring market...")
-print(f"[START] Bot initialized successfully on {current_day}. Monitoring market...")
+def initialize():
+    global telegram, metrics, income_ledger, governor, client, market, feed, user_stream, current_day, trade_journal
+    global weight_budget, indicator_book, kline_store, prices, universe, symbol_filters, board, symbol_precisions, trades_today
+
+    # Queued, leveled output (LOG_FORMAT=json for JSON lines); DEBUG detail is only written in front of errors
+    setup_logging(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_FORMAT", "text"), int(os.getenv("LOG_TRACE_CAPACITY", 20)))
+    telegram = TelegramNotifier(
+        os.getenv('TELEGRAM_BOT_TOKEN'),
+        os.getenv('TELEGRAM_CHAT_ID'),
+        api_url=os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+    )
+
+    log.info(f"[START] Starting bot...")
+    metrics = Metrics()
+    if METRICS_PORT:
+        log.info(f"[METRICS] Serving Prometheus metrics on http://127.0.0.1:{metrics.serve(METRICS_PORT)}/metrics")
+    income_ledger = IncomeLedger(INCOME_LEDGER_PATH or ':memory:')
+    if SHARD_INDEX == 0:
+        # One PnL report per account, not one per shard
+        get_yesterday_pnl(API_KEY, API_SECRET, TESTNET, BINANCE_BASE_URL, income_ledger)
+    base_url = BINANCE_BASE_URL or ('https://testnet.binancefuture.com' if TESTNET else 'https://fapi.binance.com')
+    governor = RateGovernor(WEIGHT_LIMIT_PER_MINUTE, ORDER_LIMIT_PER_MINUTE)
+    client = GovernedUMFutures(key=API_KEY, secret=API_SECRET, base_url=base_url, governor=governor, metrics=metrics)
+    market = client
+    if MARKET_FEED:
+        # Klines, indicators, tickers and bulk mark prices come from the coordinator's shared memory
+        feed = FeedReader(MARKET_FEED, client)
+        market = feed
+        log.info(f"[FEED] Reading market data from {MARKET_FEED} (shard {SHARD_INDEX + 1}/{SHARD_COUNT})")
+    elif STREAMING:
+        stream_url = STREAM_URL or ('wss://stream.binancefuture.com' if TESTNET else 'wss://fstream.binance.com')
+        try:
+            market = MarketStream(client, INTERVAL, stream_url, record_path=STREAM_RECORD_PATH)
+            market.start()
+        except Exception as e:
+            log.warning(f"[STREAM] Could not start streaming mode, using REST polling: {e}")
+            market = client
+    if USER_STREAM:
+        user_stream_url = USER_STREAM_URL or ('wss://stream.binancefuture.com' if TESTNET else 'wss://fstream.binance.com')
+        try:
+            user_stream = UserStream(client, user_stream_url, on_position_closed=position_closed)
+            user_stream.start()
+        except Exception as e:
+            log.warning(f"[USER] Could not start the user data stream, fill prices come from the mark price: {e}")
+            user_stream = None
+    current_day = trading_day()  # Trading days roll over at 00:00 UTC+7
+    trade_journal = TradeJournal(TRADE_JOURNAL_PATH or ':memory:')
+    weight_budget = WeightBudget(SCAN_WEIGHT_PER_MINUTE)
+    indicator_book = IndicatorBook()
+    kline_store = KlineStore(KLINE_STORE_DIR) if KLINE_STORE_DIR else None
+    prices = PriceSnapshot(market, PRICE_SNAPSHOT_MAX_AGE, TICKER_SNAPSHOT_MAX_AGE)
+    universe = SymbolUniverse(UNIVERSE_PATH or None)  # Excluded symbols with reasons and expiry
+    # Trades already placed today by an earlier run count against the daily limit
+    trades_today = max(0, min(max(universe.count('Traded today'), trade_journal.count(current_day)), MAX_TRADES_PER_DAY))
+    if SHARD_COUNT > 1:
+        # The daily cap and the top signals are per account, shared by all of its shards
+        board = AccountBoard(SHARD_BOARD_PATH, SHARD_INDEX, SHARD_COUNT, MARKET_FEED or '')
+        board.raise_count(current_day, trades_today)
+        trades_today = min(board.count(current_day), MAX_TRADES_PER_DAY)
+    symbol_filters = SymbolFilters(feed or client, ttl=EXCHANGE_INFO_TTL)  # The coordinator publishes exchange_info in the feed
+    symbol_precisions = get_symbol_precisions()
+    if SHARD_INDEX == 0:
+        send_telegram_message(f"Bot started on {current_day}. Monitoring market...")
+    log.info(f"[START] Bot initialized successfully on {current_day}. Monitoring market...")
 
 
 # ==== FUNCTIONS ====
 def get_symbol_precisions():
-    info = client.exchange_info()
     precisions = {}
-    for s in info['symbols']:
-        if s['contractType'] == 'PERPETUAL' and s['quoteAsset'] == 'USDT':
-            symbol = s['symbol']
+    for symbol, filters in symbol_filters.items():
+        if filters['contract_type'] == 'PERPETUAL' and filters['quote_asset'] == 'USDT':
             # Skip known problematic pairs
             if any(x in symbol for x in ['BTCDOM', 'DEFI']):
                 continue
-                
-            qty_precision = None
-            for f in s['filters']:
-                if f['filterType'] == 'LOT_SIZE':
-                    step_size = float(f['stepSize'])
-                    qty_precision = abs(round(-1 * (len(str(step_size).split('.')[1].rstrip('0')))))
-                    break
-            precisions[symbol] = qty_precision
+            precisions[symbol] = filters['qty_precision']
     return precisions
 
 
-symbol_precisions = get_symbol_precisions()
-
 
 def get_usdt_pairs():
     # Get 24hr ticker data for all pairs
-    tickers = client.ticker_24hr_price_change()
+    tickers = prices.tickers()
     
     valid_pairs = []
     for ticker in tickers:
         symbol = ticker['symbol']
-        if symbol in symbol_precisions:
+        # Excluded symbols are dropped before any parsing or kline request
+        if symbol in symbol_precisions and symbol not in universe:
             volume = float(ticker['volume']) * float(ticker['lastPrice'])  # Daily volume in USDT
             price_change = abs(float(ticker['priceChangePercent']))
             
             # Filter conditions:
             # 1. Minimum daily volume of 1M USDT
             # 2. Price change within reasonable range (1-15%)
-            # 3. Not in excluded symbols list
-            if (volume > 1_000_000 and 
-                1 < price_change < 15 and 
-                symbol not in excluded_symbols):
+            if (volume > strategy.MIN_DAILY_VOLUME and 
+                strategy.MIN_PRICE_CHANGE < price_change < strategy.MAX_PRICE_CHANGE):
                 valid_pairs.append(symbol)
     
     # Sort valid pairs by volume, from highest to lowest
     tickers = {t['symbol']: float(t['volume']) * float(t['lastPrice']) for t in tickers}
     valid_pairs.sort(key=lambda x: tickers[x], reverse=True)
+    if SHARD_COUNT > 1:
+        valid_pairs = [symbol for symbol in valid_pairs if shard_of(symbol, SHARD_COUNT) == SHARD_INDEX]
     return valid_pairs
 
 
 def get_klines(symbol, interval, limit=210):
-   klines = client.klines(symbol=symbol, interval=interval, limit=limit)
-   df = pd.DataFrame(klines, columns=['timestamp', 'o', 'h', 'l', 'c', 'v', 'close_time', 'quote_asset_volume', 'num_trades', 'taker_buy_base_vol', 'taker_buy_quote_vol', 'ignore'])
-   df['c'] = df['c'].astype(float)
+   if kline_store:
+       # Only bars newer than the last stored close are downloaded
+       rows = fetch_klines(kline_store, market, symbol, interval, limit)
+   else:
+       rows = to_array(market.klines(symbol=symbol, interval=interval, limit=limit))
+   # A frame is a dict of NumPy columns, like a market feed frame; indicators are added as row views
+   df = {'c': rows[:, 4], 'close_time': rows[:, 6].astype(np.int64)}
+   if HTF_INTERVALS and interval == INTERVAL:
+       # Closed higher-timeframe candles ride along with the frame for generate_indicators
+       base_rows = None if kline_store else rows
+       df['higher_timeframes'] = {
+           htf: higher_timeframe_klines(kline_store, market, symbol, interval, htf, HTF_KLINE_LIMIT, base_rows)
+           for htf in HTF_INTERVALS
+       }
    return df
 
 
 def generate_indicators(df):
-   df['EMA20'] = EMAIndicator(df['c'], 20).ema_indicator()
-   df['EMA50'] = EMAIndicator(df['c'], 50).ema_indicator()
-   df['EMA200'] = EMAIndicator(df['c'], 200).ema_indicator()
-   df['RSI'] = RSIIndicator(df['c'], 14).rsi()
-   macd = MACD(df['c'], window_slow=26, window_fast=12, window_sign=9)
-   df['MACD'] = macd.macd()
-   df['Signal'] = macd.macd_signal()
-   df['Hist'] = macd.macd_diff()
-   return df
+   return generate_indicators_batch([df])[0]
+
+
+def generate_indicators_batch(dfs):
+   # Stack closes of equal-length frames into one matrix and compute every indicator in a single pass;
+   # each frame gets views of its rows, nothing is copied or assigned column by column
+   by_length = {}
+   for i, df in enumerate(dfs):
+       by_length.setdefault(len(df['c']), []).append(i)
+
+   for indexes in by_length.values():
+       values = compute_indicators(np.vstack([dfs[i]['c'] for i in indexes]))
+       for row, i in enumerate(indexes):
+           dfs[i].update({name: matrix[row] for name, matrix in values.items()})
+   return generate_higher_timeframe_indicators(dfs)
+
+
+def generate_higher_timeframe_indicators(dfs):
+   # Each base bar gets the indicators of the last higher-timeframe candle closed by then (no lookahead)
+   for htf in HTF_INTERVALS:
+       by_length = {}
+       for i, df in enumerate(dfs):
+           rows = df.get('higher_timeframes', {}).get(htf)
+           by_length.setdefault(0 if rows is None else len(rows), []).append(i)
+
+       for length, indexes in by_length.items():
+           values = compute_indicators(np.vstack([dfs[i]['higher_timeframes'][htf][:, 4] for i in indexes])) if length else None
+           for row, i in enumerate(indexes):
+               df = dfs[i]
+               if not length:
+                   for name in strategy.HTF_INDICATORS:
+                       df[f'{name}_{htf}'] = np.full(len(df['c']), np.nan)
+                   continue
+               htf_close_times = df['higher_timeframes'][htf][:, 6]
+               position = np.searchsorted(htf_close_times, df['close_time'], side='right') - 1
+               for name in strategy.HTF_INDICATORS:
+                   df[f'{name}_{htf}'] = np.where(position >= 0, values[name][row][np.maximum(position, 0)], np.nan)
+   return dfs
 
 
-def get_signal(df):
-    latest = df.iloc[-1]
-    ema20 = latest['EMA20']
-    ema50 = latest['EMA50']
-    ema200 = latest['EMA200']
-    rsi = latest['RSI']
-    macd = latest['MACD']
-    signal_line = latest['Signal']
-    hist = latest['Hist']
-
-    print(f"  → Indicators | EMA20: {ema20:.2f}, EMA50: {ema50:.2f}, EMA200: {ema200:.2f}, RSI: {rsi:.2f}, MACD: {macd:.4f}, Signal: {signal_line:.4f}, Hist: {hist:.4f}")
-
-    attempts = [
-        lambda: (ema20 > ema50 and rsi < 40 and macd > signal_line and hist > 0, 'long', 'Perfect match for LONG', 100),
-        lambda: (ema20 < ema50 and rsi > 60 and macd < signal_line and hist < 0, 'short', 'Perfect match for SHORT', 100),
-        lambda: (ema20 > ema50 and rsi < 50, 'long', 'Close match for LONG', 80),
-        lambda: (ema20 < ema50 and rsi > 50, 'short', 'Close match for SHORT', 80),
-        lambda: (ema20 > ema50 and rsi < 50, 'long', 'Ignoring MACD - LONG', 60),
-        lambda: (ema20 < ema50 and rsi > 50, 'short', 'Ignoring MACD - SHORT', 60),
-        lambda: (ema20 > ema50, 'long', 'Ignoring RSI - LONG', 40),
-        lambda: (ema20 < ema50, 'short', 'Ignoring RSI - SHORT', 40)
-    ]
+INDICATOR_COLUMNS = ['EMA20', 'EMA50', 'EMA200', 'RSI', 'MACD', 'Signal', 'Hist']
+HTF_COLUMNS = [f'{name}_{htf}' for htf in HTF_INTERVALS for name in strategy.HTF_INDICATORS]
+
+
+def get_signals(df):
+    # Direction, notes and score for every bar of the frame in one vectorized pass
+    ind = {name: np.asarray(df[name], dtype=float) for name in INDICATOR_COLUMNS + HTF_COLUMNS}
+    direction, attempt, score = strategy.evaluate_signals(ind, HTF_INTERVALS)
+    notes = [strategy.signal_notes(a, HTF_INTERVALS) if a else None for a in attempt]
+    return pd.DataFrame({
+        'direction': np.where(direction == strategy.LONG, 'long', np.where(direction == strategy.SHORT, 'short', None)),
+        'notes': notes,
+        'score': score,
+    })
 
-    for i, attempt in enumerate(attempts, start=1):
-        print(f"    [ATTEMPT {i}] Evaluating...")
-        condition, direction, notes, score = attempt()
-        if condition:
-            if direction == 'long' and ema20 > ema200:
-                print(f"    [MATCH] {notes} ✅ Confirmed by EMA200")
-                return direction, f"[Attempt {i}] {notes} | Confirmed by EMA200", score
-            elif direction == 'short' and ema20 < ema200:
-                print(f"    [MATCH] {notes} ✅ Confirmed by EMA200")
-                return direction, f"[Attempt {i}] {notes} | Confirmed by EMA200", score
-            else:
-                print(f"    [SKIP] Direction valid but not aligned with EMA200 trend")
-        else:
-            print(f"    [FAIL] {notes} not satisfied")
-        time.sleep(0)  # Sleep to avoid rate limits
 
-    return None, None, 0
+def get_signal(df, verbose=VERBOSE_SIGNALS, symbol=None):
+    # Live scanning only needs the newest bar of the frame's indicator columns
+    ind = {name: np.asarray(df[name], dtype=float)[-1:] for name in INDICATOR_COLUMNS + HTF_COLUMNS}
+    # The attempt trace is formatted only if it is written (verbose, or dumped before an error)
+    trace = strategy.SignalTrace({name: values[0] for name, values in ind.items()}, symbol, HTF_INTERVALS)
+    log.log(logging.INFO if verbose else logging.DEBUG, "%s", trace)
+
+    direction, attempt, score = strategy.evaluate_signals(ind, HTF_INTERVALS)
+    if not direction[0]:
+        return None, None, 0
+    signal = 'long' if direction[0] == strategy.LONG else 'short'
+    return signal, strategy.signal_notes(int(attempt[0]), HTF_INTERVALS), int(score[0])
+
 
 def calculate_order_quantity(symbol, entry_price, leverage, symbol_precisions, usdt_amount):
     try:
@@ -269,14 +404,13 @@ def calculate_order_quantity(symbol, entry_price, leverage, symbol_precisions, u
             precision = symbol_precisions.get(symbol, 3)
             
             # Fetch minimum notional value for the symbol
-            exchange_info = client.exchange_info()
-            symbol_info = next((s for s in exchange_info['symbols'] if s['symbol'] == symbol), None)
-            min_notional = float(next(f['notional'] for f in symbol_info['filters'] if f['filterType'] == 'MIN_NOTIONAL'))
+            min_notional = symbol_filters.get(symbol)['min_notional']
             
             # Calculate quantity with minimum notional check
-            raw_qty = (usdt_amount * leverage) / entry_price
+            raw_qty = strategy.order_quantity(entry_price, leverage, usdt_amount)
             if (raw_qty * entry_price) < min_notional:
-                print(f"[SKIP] Order size too small for {symbol}")
+                log.debug("[SKIP] Order size too small for %s", symbol)
+                universe.exclude(symbol, 'MIN_NOTIONAL too high', ttl=SYMBOL_REJECT_TTL)
                 return 0, False
                 
             qty = round(raw_qty, precision)
@@ -287,15 +421,15 @@ def calculate_order_quantity(symbol, entry_price, leverage, symbol_precisions, u
                 
             return qty, True
         except Exception as e:
-            print(f"Error calculating order quantity for {symbol}: {e}")
-            excluded_symbols.append(symbol)
-            print(f"[REMOVE] Excluding {symbol} from potential pairs due to errors.")
+            log.error(f"Error calculating order quantity for {symbol}: {e}")
+            universe.exclude(symbol, f"Order quantity error: {e}")
+            log.info(f"[REMOVE] Excluding {symbol} from potential pairs due to errors.")
             return 0, False
     except Exception as e:
-        print(f"Error calculating order quantity for {symbol}: {e}")
+        log.error(f"Error calculating order quantity for {symbol}: {e}")
         # Exclude symbols after errors
-        excluded_symbols.append(symbol)
-        print(f"[REMOVE] Excluding {symbol} from potential pairs due to errors.")
+        universe.exclude(symbol, f"Order quantity error: {e}")
+        log.info(f"[REMOVE] Excluding {symbol} from potential pairs due to errors.")
         return 0, False
     
 def apply_buffer(symbol, entry_price, sl_price, tp_price, signal, buffer_percentage=0.01):
@@ -306,46 +440,27 @@ def apply_buffer(symbol, entry_price, sl_price, tp_price, signal, buffer_percent
         tp_price = float(tp_price)
 
         # Fetch PERCENT_PRICE filter for the symbol
-        info = client.exchange_info()
-        percent_price_filter = next(
-            (f for f in info['symbols'] if f['symbol'] == symbol), None
-        )
-        if not percent_price_filter:
-            print(f"[ERROR] Could not fetch PERCENT_PRICE filter for {symbol}")
+        filters = symbol_filters.get(symbol)
+        if not filters or filters['multiplier_up'] is None:
+            log.error(f"[ERROR] Could not fetch PERCENT_PRICE filter for {symbol}")
             return sl_price, tp_price  # Return original prices if filter is unavailable
 
-        # Extract multiplierDown and multiplierUp
-        for f in percent_price_filter['filters']:
-            if f['filterType'] == 'PERCENT_PRICE':
-                multiplier_down = float(f['multiplierDown'])
-                multiplier_up = float(f['multiplierUp'])
-                break
+        multiplier_down = filters['multiplier_down']
+        multiplier_up = filters['multiplier_up']
 
-        # Calculate dynamic buffer based on PERCENT_PRICE filter
-        min_allowed_price = entry_price * multiplier_down
-        max_allowed_price = entry_price * multiplier_up
-        buffer = buffer_percentage * entry_price  # Default buffer (1% of entry price)
-
-        # Adjust stop-loss and take-profit prices with buffer
-        if signal == 'long':
-            sl_price = max(sl_price, min_allowed_price)  # Ensure SL is above min allowed price
-            sl_price = min(sl_price, entry_price - buffer)  # Ensure SL is below entry price by buffer
-            tp_price = min(tp_price, max_allowed_price)  # Ensure TP is below max allowed price
-            tp_price = max(tp_price, entry_price + buffer)  # Ensure TP is above entry price by buffer
-        else:  # signal == 'short'
-            sl_price = min(sl_price, max_allowed_price)  # Ensure SL is below max allowed price
-            sl_price = max(sl_price, entry_price + buffer)  # Ensure SL is above entry price by buffer
-            tp_price = max(tp_price, min_allowed_price)  # Ensure TP is above min allowed price
-            tp_price = min(tp_price, entry_price - buffer)  # Ensure TP is below entry price by buffer
-
-        return sl_price, tp_price
+        # Keep SL/TP inside the PERCENT_PRICE band and at least the buffer (1% of entry price) away from entry
+        direction = strategy.LONG if signal == 'long' else strategy.SHORT
+        sl_price, tp_price = strategy.buffered_sl_tp(
+            direction, entry_price, sl_price, tp_price, multiplier_down, multiplier_up, buffer_percentage
+        )
+        return float(sl_price), float(tp_price)
     except ValueError as e:
-        print(f"[ERROR] Invalid numeric value for {symbol}: {e}")
-        excluded_symbols.append(symbol)  # Exclude invalid symbol
+        log.error(f"[ERROR] Invalid numeric value for {symbol}: {e}")
+        universe.exclude(symbol, f"Invalid numeric value: {e}")  # Exclude invalid symbol
         return sl_price, tp_price  # Return original prices in case of error
     except Exception as e:
-        print(f"[ERROR] Failed to apply buffer for {symbol}: {e}")
-        excluded_symbols.append(symbol)  # Exclude invalid symbol
+        log.error(f"[ERROR] Failed to apply buffer for {symbol}: {e}")
+        universe.exclude(symbol, f"Failed to apply buffer: {e}")  # Exclude invalid symbol
         return sl_price, tp_price
 
 def validate_prices(symbol, entry_price, qty, signal):
@@ -353,23 +468,14 @@ def validate_prices(symbol, entry_price, qty, signal):
         precision = symbol_precisions.get(symbol, 3)
         
         # Get minimum price movement
-        exchange_info = client.exchange_info()
-        symbol_info = next((s for s in exchange_info['symbols'] if s['symbol'] == symbol), None)
-        tick_size = float(next(f['tickSize'] for f in symbol_info['filters'] if f['filterType'] == 'PRICE_FILTER'))
+        tick_size = symbol_filters.get(symbol)['tick_size']
         
         # Calculate stop-loss and take-profit with minimum distance
         min_distance = tick_size * 10  # Minimum 10 ticks distance
-        
-        if signal == 'long':
-            sl_price = max(entry_price * 0.99, entry_price - (RISK_PER_TRADE / qty))  # Maximum 1% loss
-            tp_price = entry_price * 1.02  # Minimum 2% gain
-        else:
-            sl_price = min(entry_price * 1.01, entry_price + (RISK_PER_TRADE / qty))
-            tp_price = entry_price * 0.98
-            
-        # Round prices to valid tick size
-        sl_price = round(sl_price / tick_size) * tick_size
-        tp_price = round(tp_price / tick_size) * tick_size
+
+        # Maximum 1% loss, minimum 2% gain, rounded to valid tick size
+        direction = strategy.LONG if signal == 'long' else strategy.SHORT
+        sl_price, tp_price = strategy.validation_sl_tp(direction, entry_price, qty, RISK_PER_TRADE, tick_size)
         
         # Additional validation
         if sl_price <= 0 or tp_price <= 0:
@@ -377,32 +483,117 @@ def validate_prices(symbol, entry_price, qty, signal):
             
         return True
     except Exception as e:
-        print(f"[ERROR] Price validation failed for {symbol}: {e}")
+        log.error(f"[ERROR] Price validation failed for {symbol}: {e}")
         return False
 
 
-def place_trade(symbol, signal, entry_price, qty, notes):
+def protection_orders(symbol, opposite, sl_price, tp_price, precision):
+    # STOP_MARKET and TAKE_PROFIT_MARKET entries for /fapi/v1/batchOrders (values are sent as strings)
+    return [
+        {
+            'symbol': symbol,
+            'side': opposite,
+            'type': order_type,
+            'stopPrice': str(round(price, precision)),
+            'closePosition': 'true',
+            'workingType': 'MARK_PRICE',
+            'timeInForce': 'GTC',
+        }
+        for order_type, price in (('STOP_MARKET', sl_price), ('TAKE_PROFIT_MARKET', tp_price))
+    ]
+
+
+def run_order_tests(symbol, side, opposite, qty, sl_price, tp_price, precision):
+    # Returns (label, error) for the first failing simulation, or (None, None) when all pass
+    tests = [('market', dict(symbol=symbol, side=side, type='MARKET', quantity=qty))]
+    for label, order in zip(('stop-loss', 'take-profit'), protection_orders(symbol, opposite, sl_price, tp_price, precision)):
+        tests.append((label, dict(order, closePosition=True)))
+
+    with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+        futures = [(label, pool.submit(client.new_order_test, **params)) for label, params in tests]
+
+    for label, future in futures:
+        try:
+            future.result()
+        except ClientError as e:
+            return label, e
+    return None, None
+
+
+def exclude_rejected(symbol, error, reason):
+    # Rejections caused by the symbol itself are remembered across runs, everything else for this run
+    if error.error_code in SYMBOL_REJECT_CODES:
+        universe.exclude(symbol, SYMBOL_REJECT_CODES[error.error_code], ttl=SYMBOL_REJECT_TTL)
+    else:
+        universe.exclude(symbol, f"{reason}: {error.error_message}")
+
+
+def fill_price(symbol, order_id):
+    # Average fill price of a market order from the user data stream; the mark price when it is not running
+    if user_stream:
+        order = user_stream.wait_for_fill(order_id, FILL_WAIT_TIMEOUT)
+        if order and order['avg_price']:
+            return order['avg_price']
+        log.warning(f"[USER] No fill for {symbol} order {order_id} on the user data stream. Using the mark price.")
+    return float(prices.mark_price(symbol, max_age=0)['markPrice'])
+
+
+def position_closed(closure):
+    # User data stream callback: a position of this account was closed by its SL, TP or a market order
+    metrics.inc('positions_closed_total', reason=closure['reason'])
+    pnl = closure['realized_pnl']
+    send_telegram_message(
+        f"{'✅' if pnl >= 0 else '🛑'} <b>POSITION CLOSED</b>\n"
+        f"Pair: <code>{closure['symbol']}</code>\n"
+        f"By: {closure['reason']}\n"
+        f"Entry: ${closure['entry_price']:.2f}\n"
+        f"Exit: ${closure['exit_price']:.2f}\n"
+        f"PnL: <code>{pnl:.2f} USDT</code>"
+    )
+
+
+def place_trade(symbol, signal, entry_price, qty, notes, signal_time=None, score=None):
+    # Every attempt is journaled, placed or not; the write happens on the journal's worker thread
+    entry = {'symbol': symbol, 'signal': signal, 'score': score, 'notes': notes, 'intended_entry': entry_price, 'qty': qty}
+    started = time.perf_counter()
+    placed = False
+    try:
+        placed = execute_trade(entry, symbol, signal, entry_price, qty, notes, signal_time)
+        return placed
+    except Exception as e:
+        entry['reason'] = str(e)
+        raise
+    finally:
+        entry['status'] = 'placed' if placed else 'rejected'
+        entry['duration_ms'] = (time.perf_counter() - started) * 1000
+        trade_journal.record(**entry)
+
+
+def execute_trade(entry, symbol, signal, entry_price, qty, notes, signal_time=None):
+    # Steps of place_trade; `entry` collects what the journal records about the attempt
     global trades_today
     precision = symbol_precisions.get(symbol, 3)
     orderId = 0
 
     # Calculate stop-loss and take-profit prices
-    sl_price = entry_price - (RISK_PER_TRADE / qty) if signal == 'long' else entry_price + (RISK_PER_TRADE / qty)
-    tp_price = entry_price + (TP_USDT / qty) if signal == 'long' else entry_price - (TP_USDT / qty)
+    direction = strategy.LONG if signal == 'long' else strategy.SHORT
+    sl_price, tp_price = strategy.initial_sl_tp(direction, entry_price, qty, RISK_PER_TRADE, TP_USDT)
 
     # Apply buffer to stop-loss and take-profit prices
     sl_price, tp_price = apply_buffer(symbol, entry_price, sl_price, tp_price, signal)
 
     # Validate stop-loss and take-profit prices not less than or equal to zero
     if sl_price <= 0 or tp_price <= 0:
-        print(f"[ERROR] Invalid stop-loss or take-profit price for {symbol}: SL={sl_price}, TP={tp_price}")
-        excluded_symbols.append(symbol)  # Exclude invalid symbol
+        log.error(f"[ERROR] Invalid stop-loss or take-profit price for {symbol}: SL={sl_price}, TP={tp_price}")
+        universe.exclude(symbol, 'Invalid stop-loss or take-profit price')  # Exclude invalid symbol
+        entry['reason'] = 'Invalid stop-loss or take-profit price'
         return False
 
     # Revalidate prices
     if not validate_prices(symbol, entry_price, qty, signal):
-        print(f"[ERROR] Revalidation failed for {symbol}. Excluding from potential pairs.")
-        excluded_symbols.append(symbol)  # Add to excluded symbols
+        log.error(f"[ERROR] Revalidation failed for {symbol}. Excluding from potential pairs.")
+        universe.exclude(symbol, 'Price revalidation failed')  # Add to excluded symbols
+        entry['reason'] = 'Price revalidation failed'
         return False  # Trade is invalid
 
     rr_ratio = round(TP_USDT / RISK_PER_TRADE, 2)
@@ -412,165 +603,112 @@ def place_trade(symbol, signal, entry_price, qty, notes):
     sl_price = round(sl_price, precision)
     tp_price = round(tp_price, precision)
     qty = round(qty, precision)
+    entry.update(sl_price=sl_price, tp_price=tp_price, qty=qty, rr=rr_ratio)
 
     testPassed = 0
 
     if qty:
         try:
-            # Simulate market order
-            try:
-                client.new_order_test(
-                    symbol=symbol,
-                    side=side,
-                    type='MARKET',
-                    quantity=qty
-                )
-                testPassed += 1
-            except ClientError as e:
-                print(f"[ERROR] Failed to validate market order for {symbol}: {e.error_message}")
-                send_telegram_message(f"❌ Failed to validate market order for {symbol}: {e.error_message}")
-                excluded_symbols.append(symbol)  # Add to excluded symbols
-                return False  # Skip trade if market order simulation fails
-
-            # Simulate stop-loss order
-            try:
-                client.new_order_test(
-                    symbol=symbol,
-                    side=opposite,
-                    type='STOP_MARKET',
-                    stopPrice=str(round(sl_price, precision)),
-                    closePosition=True,
-                    workingType='MARK_PRICE',
-                    timeInForce='GTC'
-                )
-                testPassed += 1
-            except ClientError as e:
-                print(f"[ERROR] Failed to validate stop-loss order for {symbol}: {e.error_message}")
-                send_telegram_message(f"❌ Failed to validate stop-loss order for {symbol}: {e.error_message}")
-                excluded_symbols.append(symbol)  # Add to excluded symbols
-                return False  # Skip trade if stop-loss order simulation fails
-
-            # Simulate take-profit order
-            try:
-                client.new_order_test(
-                    symbol=symbol,
-                    side=opposite,
-                    type='TAKE_PROFIT_MARKET',
-                    stopPrice=str(round(tp_price, precision)),
-                    closePosition=True,
-                    workingType='MARK_PRICE',
-                    timeInForce='GTC'
-                )
-                testPassed += 1
-            except ClientError as e:
-                print(f"[ERROR] Failed to validate take-profit order for {symbol}: {e.error_message}")
-                send_telegram_message(f"❌ Failed to validate take-profit order for {symbol}: {e.error_message}")
-                excluded_symbols.append(symbol)  # Add to excluded symbols
-                return False  # Skip trade if take-profit order simulation fails
-
-            print(f"[TEST] All simulations passed for {symbol}. Proceeding with real orders.")
+            # Simulate market, stop-loss and take-profit orders concurrently
+            with metrics.timer('trade_step_seconds', step='test_orders'):
+                failed, error = run_order_tests(symbol, side, opposite, qty, sl_price, tp_price, precision)
+            if failed:
+                log.error(f"[ERROR] Failed to validate {failed} order for {symbol}: {error.error_message}")
+                send_telegram_message(f"❌ Failed to validate {failed} order for {symbol}: {error.error_message}")
+                exclude_rejected(symbol, error, f"Failed to validate {failed} order")
+                entry['reason'] = f"Failed to validate {failed} order: {error.error_message}"
+                return False  # Skip trade if any order simulation fails
+            testPassed = 3
+
+            log.info(f"[TEST] All simulations passed for {symbol}. Proceeding with real orders.")
             # All simulations passed, proceed with real orders
             if testPassed == 3:
                 try:
                     # Recheck current price before placing real orders
-                    current_mark = client.mark_price(symbol=symbol)
+                    with metrics.timer('trade_step_seconds', step='price_recheck'):
+                        current_mark = prices.mark_price(symbol, max_age=PRICE_RECHECK_MAX_AGE)
                     current_price = float(current_mark['markPrice'])
                     
                     # Check if price hasn't moved significantly (e.g., 0.5%)
                     price_diff_percent = abs(current_price - entry_price) / entry_price * 100
                     if price_diff_percent > 0.5:  # 0.5% threshold
-                        print(f"[WARNING] Price moved significantly for {symbol}. Test: {entry_price}, Current: {current_price}")
+                        log.warning(f"[WARNING] Price moved significantly for {symbol}. Test: {entry_price}, Current: {current_price}")
+                        entry['reason'] = f"Price moved {price_diff_percent:.2f}%"
                         return False
                         
                     # Place real orders in a transaction-like manner
                     try:
-                        response = client.new_order(symbol=symbol, side=side, type='MARKET', quantity=qty)
+                        with metrics.timer('trade_step_seconds', step='market_order'):
+                            response = client.new_order(symbol=symbol, side=side, type='MARKET', quantity=qty)
                         orderId = int(response['orderId'])
-                        print(f"[INFO] Market order placed for {symbol} with orderId: {orderId}")
-                        current_mark = client.mark_price(symbol=symbol)
-                        actual_entry = float(current_mark['markPrice'])
+                        entry['order_id'] = orderId
+                        log.info(f"[INFO] Market order placed for {symbol} with orderId: {orderId}")
+                        with metrics.timer('trade_step_seconds', step='fill_price'):
+                            actual_entry = fill_price(symbol, orderId)
                         entry_successful = True
-                        print(f"[INFO] Market order executed for {symbol} at {actual_entry}")
+                        log.info(f"[INFO] Market order executed for {symbol} at {actual_entry}")
                     except ClientError as e:
                         if "executed" in str(e.error_message).lower():
-                            print(f"[INFO] Order already executed for {symbol} (Market)")
+                            log.info(f"[INFO] Order already executed for {symbol} (Market)")
                             actual_entry = current_price
                             entry_successful = True
                         else:
-                            print(f"[ERROR] Real order failed for {symbol}: {e.error_message}")
+                            log.error(f"[ERROR] Real order failed for {symbol}: {e.error_message}")
                             send_telegram_message(f"❌ Real order failed for {symbol}: {e.error_message}")
-                            excluded_symbols.append(symbol)
+                            exclude_rejected(symbol, e, 'Real order failed')
+                            entry['reason'] = f"Real order failed: {e.error_message}"
                             return False
 
                     if entry_successful:
+                        entry['actual_entry'] = actual_entry
+                        if signal_time:
+                            metrics.observe('signal_to_fill_seconds', time.time() - signal_time)
+                            entry['fill_latency_ms'] = (time.time() - signal_time) * 1000
+
                         # Recalculate SL/TP based on actual fill price
                         sl_price, tp_price = apply_buffer(symbol, actual_entry, sl_price, tp_price, signal)
                         
-                        # Place SL order
-                        print(f"[INFO] Stop-Loss order placed for {symbol} at {sl_price}")
+                        # Place SL and TP together in one batch right after the fill
+                        log.info(f"[INFO] Stop-Loss order placed for {symbol} at {sl_price}")
+                        log.info(f"[INFO] Take-Profit order placed for {symbol} at {tp_price}")
                         try:
-                            client.new_order(
-                                symbol=symbol,
-                                side=opposite,
-                                type='STOP_MARKET',
-                                stopPrice=str(round(sl_price, precision)),
-                                closePosition=True,
-                                workingType='MARK_PRICE',
-                                timeInForce='GTC'
-                            )
+                            with metrics.timer('trade_step_seconds', step='protection_orders'):
+                                results = client.new_batch_order(
+                                    batchOrders=protection_orders(symbol, opposite, sl_price, tp_price, precision)
+                                )
+                            errors = [
+                                (label, result.get('code'), result.get('msg'))
+                                for label, result in zip(('Stop-Loss', 'Take-Profit'), results)
+                                if 'orderId' not in result
+                            ]
                         except ClientError as e:
-                            # Cancel the market order if SL fails
-                            client.new_order(
-                                    symbol=symbol,
-                                    side=opposite,
-                                    type='MARKET',
-                                    reduceOnly=True,  # This ensures the order only reduces/closes position
-                                    quantity=qty
-                            )
-                            print(f"[INFO] Order CANCELED for {symbol}")
-
-                            if "already exists" in str(e.error_message).lower():
-                                print(f"[INFO] Stop-Loss order already exists for {symbol}")
-                            else:
-                                print(f"[ERROR] Failed to place Stop-Loss order for {symbol}: {e.error_message}")
-                                raise e
-
-                        # Place TP order
-                        try:
-                            print(f"[INFO] Take-Profit order placed for {symbol} at {tp_price}")
-                            client.new_order(
-                                symbol=symbol,
-                                side=opposite,
-                                type='TAKE_PROFIT_MARKET',
-                                stopPrice=str(round(tp_price, precision)),
-                                closePosition=True,
-                                workingType='MARK_PRICE',
-                                timeInForce='GTC'
-                            )
-                        except ClientError as e:
-                            # Cancel the market order if TP fails
-                            client.new_order(
-                                    symbol=symbol,
-                                    side=opposite,
-                                    type='MARKET',
-                                    reduceOnly=True,  # This ensures the order only reduces/closes position
-                                    quantity=qty
-                            )
-                            print(f"[INFO] Order CANCELED for {symbol}")
-                            
-                            if "already exists" in str(e.error_message).lower():
-                                print(f"[INFO] Take-Profit order already exists for {symbol}")
-                            else:
-                                print(f"[ERROR] Failed to place Take-Profit order for {symbol}: {e.error_message}")
-                                raise e
+                            errors = [('Stop-Loss/Take-Profit', e.error_code, e.error_message)]
+
+                        if errors:
+                            # Cancel the market order if SL or TP fails
+                            with metrics.timer('trade_step_seconds', step='close_position'):
+                                client.new_order(
+                                        symbol=symbol,
+                                        side=opposite,
+                                        type='MARKET',
+                                        reduceOnly=True,  # This ensures the order only reduces/closes position
+                                        quantity=qty
+                                )
+                            log.info(f"[INFO] Order CANCELED for {symbol}")
+
+                            for label, code, message in errors:
+                                if "already exists" in str(message).lower():
+                                    log.info(f"[INFO] {label} order already exists for {symbol}")
+                                else:
+                                    log.error(f"[ERROR] Failed to place {label} order for {symbol}: {message}")
+                                    raise ClientError(400, code, message, {})
 
                         trades_today += 1
-                        trade_log.append([
-                            trades_today, symbol, signal, actual_entry, round(sl_price, precision), 
-                            round(tp_price, precision), qty, rr_ratio, notes
-                        ])
+                        # Realized PnL of this position is reported under the signal that opened it
+                        income_ledger.tag(symbol, notes.split(' | ')[0])
+                        entry.update(sl_price=round(sl_price, precision), tp_price=round(tp_price, precision))
                         
-                        print(f"[TRADE] Placed {symbol} | {signal.upper()} | Entry: {actual_entry} | SL: {sl_price} | TP: {tp_price} | Qty: {qty}")
+                        log.info(f"[TRADE] Placed {symbol} | {signal.upper()} | Entry: {actual_entry} | SL: {sl_price} | TP: {tp_price} | Qty: {qty}")
                         msg = (
                             f"📈 <b>TRADE EXECUTED</b>\n"
                             f"Pair: <code>{symbol}</code>\n"
@@ -587,191 +725,396 @@ def place_trade(symbol, signal, entry_price, qty, notes):
                     
                 except ClientError as e:
                     # Cancel the market order if any error occurs      
-                    print(f"[ERROR] Real order failed for {symbol}: {e.error_message}")
-                    client.new_order(
-                        symbol=symbol,
-                        side=opposite,
-                        type='MARKET',
-                        reduceOnly=True,  # This ensures the order only reduces/closes position
-                        quantity=qty
-                        )
+                    log.error(f"[ERROR] Real order failed for {symbol}: {e.error_message}")
+                    with metrics.timer('trade_step_seconds', step='close_position'):
+                        client.new_order(
+                            symbol=symbol,
+                            side=opposite,
+                            type='MARKET',
+                            reduceOnly=True,  # This ensures the order only reduces/closes position
+                            quantity=qty
+                            )
                     trades_today -= 1
-                    print(f"[INFO] Order CANCELED for {symbol}")
+                    log.info(f"[INFO] Order CANCELED for {symbol}")
 
                     if "executed" not in str(e.error_message).lower():
-                        excluded_symbols.append(symbol)
+                        exclude_rejected(symbol, e, 'Real order failed')
+                    entry['reason'] = f"Position closed after error: {e.error_message}"
                     return False
             else:
                 # Cancel the market order if any error occurs
-                print(f"[ERROR] Test failed for {symbol}. Not placing real trade.")
+                log.error(f"[ERROR] Test failed for {symbol}. Not placing real trade.")
                 send_telegram_message(f"❌ Test failed for {symbol}. Not placing real trade.")
-                excluded_symbols.append(symbol)
+                universe.exclude(symbol, 'Order test failed')
+                entry['reason'] = 'Order test failed'
                 return False  # Skip trade if test failed
         except ClientError as e:
             # Cancel the market order if any error occurs
-            print(f"[ERROR] Trade Error for {symbol}: {e.error_message}")
+            log.error(f"[ERROR] Trade Error for {symbol}: {e.error_message}")
             send_telegram_message(f"❌ Trade Error for {symbol}: {e.error_message}")
-            excluded_symbols.append(symbol)  # Add to excluded symbols
+            exclude_rejected(symbol, e, 'Trade error')  # Add to excluded symbols
+            entry['reason'] = f"Trade error: {e.error_message}"
             return False  # Trade is invalid
     else:
         # Cancel the market order if any error occurs
         error_msg = f"Invalid quantity calculated for {symbol}: {qty}"
-        print(f"[ERROR] Trade Error for  {error_msg}")
+        log.error(f"[ERROR] Trade Error for  {error_msg}")
         send_telegram_message(f"❌ Trade Error: {error_msg}")
-        excluded_symbols.append(symbol)  # Add to excluded symbols
+        universe.exclude(symbol, 'Invalid quantity')  # Add to excluded symbols
+        entry['reason'] = 'Invalid quantity'
         return False  # Raise an error for invalid quantity
 
-potential_pair = [] #  List to track potential pairs
-top_signals = [] # List to track top signals
-excluded_symbols = [] # List to track excluded symbols
+def scan_for_signals():
+    # Scan the filtered universe and return the symbols with a tradable signal
+    found = []
+    log.info("[START] Scanning for signals...")
+    if feed and time.time() - feed.snapshot().published_at > 2 * INTERVAL_MS[INTERVAL] / 1000:
+        log.warning("[FEED] Market feed has not been updated for two candles. Skipping this scan.")
+        return found
+    scan_started = time.perf_counter()
+    with metrics.timer('universe_seconds'):
+        usdt_pairs = get_usdt_pairs()
+    scan_symbols = universe.filter(usdt_pairs)
+
+    # Most promising symbols first (24h ticker pre-screen). Score ties are traded in
+    # volume order, so once the best signals can fill every open slot only symbols
+    # ahead of them in volume order can still change what is traded
+    if SCAN_EARLY_STOP:
+        queue = ScanQueue(prescreen_scores(prices.tickers(), scan_symbols), scan_symbols)
+        target = signal_target(trades_today, MAX_TRADES_PER_DAY, spare=SCAN_SPARE_SIGNALS)
+        batch_size = SCAN_BATCH_SIZE
+    else:
+        queue = ScanQueue({}, scan_symbols)
+        target = 0
+        batch_size = len(scan_symbols)
+
+    skipped = 0
+    while len(queue) and not stop_event.is_set() and trades_today < MAX_TRADES_PER_DAY:
+        scan_batch(queue.pop_batch(batch_size), found)
+        if target:
+            skipped += queue.settle([pair['symbol'] for pair in found if pair['score'] == 100], target)
+    if skipped:
+        log.info(f"[PLAN] Score-100 signals cover {target} open slots. Skipped {skipped} symbols behind them in volume order.")
+        metrics.inc('scan_skipped_symbols_total', skipped)
+    metrics.observe('scan_seconds', time.perf_counter() - scan_started)
+    return queue.ranked(found)
+
+
+def scan_batch(scan_symbols, found):
+    # Fetch, compute and evaluate one batch of symbols, appending tradable signals to `found`
+    if feed:
+        # The coordinator already fetched the klines and computed the indicators
+        scanned = [(symbol, feed.frame(symbol), None) for symbol in scan_symbols if symbol in feed]
+    else:
+        scanned = fetch_batch(scan_symbols)
 
+    for symbol, df, error in scanned:
+        if stop_event.is_set():
+            return
+        if trades_today >= MAX_TRADES_PER_DAY:
+            log.info("[LIMIT] Max trades reached. Stopping further trades.")
+            return
+        symbol_started = time.perf_counter()
+        try:
+            log.debug("[SCANNING] %s", symbol)
+            if error:
+                raise error
+            with metrics.timer('signal_seconds'):
+                signal, notes, score = get_signal(df, symbol=symbol)
+
+            if signal:
+                metrics.inc('signals_total', score=score)
+                mark = prices.mark_price(symbol)
+                price = float(mark['markPrice'])
+                qty, valid_qty = calculate_order_quantity(symbol, price, LEVERAGE, symbol_precisions, QUANTITY_USDT)
+
+                if valid_qty:
+                    # Validate stop-loss and take-profit prices
+                    if not validate_prices(symbol, price, qty, signal):
+                        log.debug("[SKIP] Invalid prices for %s", symbol)
+                        universe.exclude(symbol, 'Invalid prices')  # Exclude invalid symbol
+                        continue
+
+                    log.info(f"[SIGNAL FOUND] {symbol} | Signal: {signal} | Price: {price} | Score: {score} | Notes: {notes} | Qty: {qty}")
+                    found.append({
+                        'symbol': symbol,
+                        'signal': signal,
+                        'price': price,
+                        'notes': notes,
+                        'score': score,
+                        'qty': qty,
+                        'signal_time': time.time()
+                    })
+                else:
+                    log.debug("[SKIP] Invalid quantity for %s | Signal: %s | Price: %s", symbol, signal, price)
+                    universe.exclude(symbol, 'Invalid quantity')  # Exclude invalid symbol
+        except Exception as e:
+            log.error(f"[ERROR] {symbol}: {e}", extra={'symbol': symbol})
+            metrics.inc('scan_errors_total')
+            universe.exclude(symbol, f"Scan error: {e}")  # Exclude symbol that caused an error
+        finally:
+            metrics.observe('scan_symbol_seconds', time.perf_counter() - symbol_started)
 
-# ==== MAIN LOOP ====
-while True:
+
+def fetch_batch(scan_symbols):
+    # Klines are fetched concurrently but handed back in queue order
+    fetch = metrics.timed('scan_fetch_seconds', lambda s: get_klines(s, INTERVAL))
+    scanned = list(scan_klines(scan_symbols, fetch, weight_budget, max_workers=SCAN_WORKERS))
     try:
-        if trades_today >= MAX_TRADES_PER_DAY:
-            print("[END] Max trades reached today. Exiting bot.")
-            break
+        # Symbols with warm incremental state only apply their new bars; the rest are batch computed
+        frames = {symbol: df for symbol, df, error in scanned if error is None}
+        with metrics.timer('indicator_seconds', mode='incremental'):
+            warm = indicator_book.sync(frames)
+            generate_higher_timeframe_indicators([df for symbol, df in frames.items() if symbol in warm])
+        with metrics.timer('indicator_seconds', mode='batch'):
+            generate_indicators_batch([df for symbol, df in frames.items() if symbol not in warm])
+    except Exception as e:
+        log.error(f"[ERROR] Batch indicator computation failed: {e}")
+        scanned = [(symbol, None, e) for symbol, _, _ in scanned]
+    return scanned
+
+
+def rank_across_shards(found):
+    # Post this shard's signals and keep those that make the account-wide top 6
+    snapshot = feed.snapshot() if feed else None
+    generation = snapshot.generation if snapshot else int(time.time() * 1000 // INTERVAL_MS[INTERVAL])
+    ranks = snapshot.index if snapshot else {}  # Feed order (24h volume) breaks score ties identically on every shard
+    board.post(generation, [(pair['symbol'], pair['score'], ranks.get(pair['symbol'], 0)) for pair in found])
+    if not board.wait(generation, SHARD_RANK_TIMEOUT, stop_event):
+        log.warning(f"[SHARD] {board.posted(generation)}/{SHARD_COUNT} shards posted signals for cycle {generation}. Ranking those.")
+    top = {symbol for symbol, _ in board.top(generation, 6)}
+    kept = [pair for pair in found if pair['symbol'] in top]
+    log.info(f"[SHARD] {len(kept)} of {len(found)} signals make the account's top {len(top)}")
+    return kept
+
+
+def report_day():
+    # Top signals and trades of the current trading day, to the log and Telegram
+    if top_signals:
+        message_lines = ["\n Final Top Signals"]
+        for i, s in enumerate(top_signals, 1):
+            message_lines.append(f"  {i}. {s['symbol']} | Signal: {s['signal']} | Price: {s['price']} | Score: {s['score']} | Notes: {s['notes']}")
+
+        final_message = "\n".join(message_lines)
+        log.info(final_message)
+    else:
+        log.info("[NO TOP SIGNALS] No top signals found at the end of the bot execution.")
+
+    # Send final top signals to Telegram
+    if top_signals:
+        # Prepare the final top signals message
+        message_lines = ["<b>📊 Final Top Signals</b>"]
+        for i, s in enumerate(top_signals, 1):
+            message_lines.append(
+                f"| {i}. <code>{s['symbol']}</code> | Signal: <b>{s['signal'].upper()}</b> | "
+            )
+        final_message = "\n".join(message_lines)
+
+        # Send the message via Telegram
+        send_telegram_message(final_message)
+    else:
+        send_telegram_message("❌ No top signals found at the end of the bot execution.")
+
+    # Trades come from the journal, so positions opened by an earlier run today are included
+    trades = trade_journal.trades(day=current_day, status='placed')
+    if trades:
+        message_lines = ["\n Final Trade Log"]
+        for i, trade in enumerate(trades, 1):
+            message_lines.append(
+                f"  {i}. {trade['symbol']} | Signal: {trade['signal']} | Entry: {trade['actual_entry']} | SL: {trade['sl_price']} | "
+                f"TP: {trade['tp_price']} | RR: {trade['rr']} | Notes: {trade['notes']}"
+            )
+        for status, count, score, fill_latency, slippage in trade_journal.summary(current_day):
+            message_lines.append(
+                f"  [{status.upper()}] {count} attempts | Avg score: {score or 0:.0f} | "
+                f"Avg signal-to-fill: {fill_latency or 0:.0f} ms | Avg slippage: {slippage or 0:.3f}%"
+            )
+
+        final_message = "\n".join(message_lines)
+        log.info(final_message)
+    else:
+        log.info("[NO TRADES] No trades were executed during bot execution.")
 
-        found_signal = False
+    if trades:
+        # Prepare simple trade log message
+        message_lines = ["<b>📊 Trade Summary</b>"]
+        for i, trade in enumerate(trades, 1):
+            message_lines.append(f"{i}. <code>{trade['symbol']}</code> | <b>{trade['signal'].upper()}</b>")
+        final_message = "\n".join(message_lines)
 
-        # === SCANNING PHASE ===
-        if not potential_pair:  # Only scan if potential_pair is empty
-            print("[START] Scanning for signals...")
-            usdt_pairs = get_usdt_pairs()
-            for symbol in usdt_pairs:
-                if symbol in excluded_symbols:
-                    print(f"[SKIP] {symbol} is excluded due to previous errors or successful trades.")
-                    continue
+        # Send the message via Telegram
+        send_telegram_message(final_message)
+    else:
+        send_telegram_message("❌ No trades executed")
+
+
+def roll_over_day():
+    # Daemon mode: report the finished trading day and start the next one with fresh counters
+    global trades_today, current_day, top_signals, potential_pair, symbol_precisions
+    day = trading_day()
+    if day == current_day:
+        return
+    log.info(f"[DAY] Trading day {current_day} finished. Starting {day}.")
+    report_day()
+    trades_today = 0
+    current_day = day
+    top_signals = []
+    potential_pair = []
+    universe.clear_run_exclusions()
+    universe.purge()
+    symbol_precisions = get_symbol_precisions()
+    if SHARD_INDEX == 0:
+        get_yesterday_pnl(API_KEY, API_SECRET, TESTNET, BINANCE_BASE_URL, income_ledger)
+        send_telegram_message(f"Bot started on {current_day}. Monitoring market...")
+
+
+def wait_for_next_candle():
+    # Sleep until DAEMON_SCAN_DELAY seconds after the current candle closes, or until shutdown
+    interval = INTERVAL_MS[INTERVAL] / 1000
+    if feed:
+        # The coordinator publishes once per candle; scan as soon as the next cycle is in
+        log.info("[WAIT] Waiting for the next market feed cycle")
+        feed.wait_for_update(feed.current.generation if feed.current else 0, 2 * interval, stop_event)
+        return
+    wake_at = (time.time() // interval + 1) * interval + DAEMON_SCAN_DELAY
+    log.info(f"[WAIT] Next scan at {datetime.fromtimestamp(wake_at).strftime('%H:%M:%S')}")
+    stop_event.wait(max(0, wake_at - time.time()))
+
+
+def request_shutdown(signum, frame):
+    log.info(f"[STOP] Received {signal.Signals(signum).name}. Finishing the current step and shutting down...")
+    stop_event.set()
 
-                if trades_today >= MAX_TRADES_PER_DAY:
-                    print("[LIMIT] Max trades reached. Stopping further trades.")
-                    break
-                try:
-                    print(f"\n[SCANNING] {symbol}")
-                    df = get_klines(symbol, INTERVAL)
-                    df = generate_indicators(df)
-                    signal, notes, score = get_signal(df)
-
-                    if signal:
-                        mark = client.mark_price(symbol=symbol)
-                        price = float(mark['markPrice'])
-                        qty, valid_qty = calculate_order_quantity(symbol, price, LEVERAGE, symbol_precisions, QUANTITY_USDT)
-
-                        if valid_qty:
-                            # Validate stop-loss and take-profit prices
-                            if not validate_prices(symbol, price, qty, signal):
-                                print(f"[SKIP] Invalid prices for {symbol}")
-                                excluded_symbols.append(symbol)  # Exclude invalid symbol
-                                continue
-
-                            print(f"[SIGNAL FOUND] {symbol} | Signal: {signal} | Price: {price} | Score: {score} | Notes: {notes} | Qty: {qty}")
-                            potential_pair.append({
-                                'symbol': symbol,
-                                'signal': signal,
-                                'price': price,
-                                'notes': notes,
-                                'score': score,
-                                'qty': qty
-                            })
-                        else:
-                            print(f"[SKIP] Invalid quantity for {symbol} | Signal: {signal} | Price: {price}")
-                            excluded_symbols.append(symbol)  # Exclude invalid symbol
-                except Exception as e:
-                    print(f"[ERROR] {symbol}: {e}")
-                    excluded_symbols.append(symbol)  # Exclude symbol that caused an error
-
-        # === TRADING PHASE ===
-        if potential_pair:
-            print("[START] Processing top signals...")
-            # Filter out excluded symbols from potential_pair
-            potential_pair = [pair for pair in potential_pair if pair['symbol'] not in excluded_symbols]
-            top_signals = sorted(potential_pair, key=lambda x: x['score'], reverse=True)[:6]
-
-            for signal_data in top_signals[:]:  # Use a copy of the list to safely modify it
-                if trades_today >= MAX_TRADES_PER_DAY:
-                    print("[LIMIT] Max trades reached. Stopping further trades.")
-                    break
-
-                valid_trade = place_trade(
-                    signal_data['symbol'],
-                    signal_data['signal'],
-                    signal_data['price'],
-                    signal_data["qty"],
-                    signal_data['notes']
-                )
-                if not valid_trade:
-                    print(f"[REMOVE] Excluding {signal_data['symbol']} from potential pairs.")
-                    potential_pair.remove(signal_data)  # Remove invalid trade from potential_pair
-                    excluded_symbols.append(signal_data['symbol'])  # Exclude invalid symbol
-                else:
-                    print(f"[SUCCESS] Excluding {signal_data['symbol']} after successful trade.")
-                    excluded_symbols.append(signal_data['symbol'])  # Exclude successfully traded symbol
-                    time.sleep(5)  # Delay between trades
-                    found_signal = True
 
-        if not found_signal:
-            print("[SUMMARY] No valid pairs found or trades placed in this cycle.")
+# ==== MAIN LOOP ====
+def run():
+    global potential_pair, top_signals, symbol_precisions, trades_today
+    while not stop_event.is_set():
+        try:
+            if board:
+                # Trades placed by the account's other shards count too
+                trades_today = min(board.count(current_day), MAX_TRADES_PER_DAY)
+            if DAEMON:
+                roll_over_day()
+                # Filters are re-downloaded once their TTL expires; keep the precision map in step
+                if symbol_filters.is_stale():
+                    symbol_precisions = get_symbol_precisions()
+
+            if trades_today >= MAX_TRADES_PER_DAY:
+                if DAEMON:
+                    log.info("[LIMIT] Max trades reached today. Waiting for the next trading day.")
+                    stop_event.wait(max(0, next_day_start() - time.time()) + 1)
+                    continue
+                log.info("[END] Max trades reached today. Exiting bot.")
+                break
 
-        # If there are still potential pairs left, skip rescanning
-        if potential_pair:
-            print("[INFO] Reusing remaining potential pairs for the next cycle.")
-            continue
+            found_signal = False
+
+            # === SCANNING PHASE ===
+            if not potential_pair:  # Only scan if potential_pair is empty
+                potential_pair = scan_for_signals()
+                if board:
+                    potential_pair = rank_across_shards(potential_pair)
+
+            # === TRADING PHASE ===
+            if potential_pair:
+                log.info("[START] Processing top signals...")
+                # Filter out excluded symbols from potential_pair
+                potential_pair = [pair for pair in potential_pair if pair['symbol'] not in universe]
+                top_signals = sorted(potential_pair, key=lambda x: x['score'], reverse=True)[:6]
+
+                for signal_data in top_signals[:]:  # Use a copy of the list to safely modify it
+                    if stop_event.is_set():
+                        break
+                    if trades_today >= MAX_TRADES_PER_DAY:
+                        log.info("[LIMIT] Max trades reached. Stopping further trades.")
+                        break
+                    if board and not board.reserve(current_day, MAX_TRADES_PER_DAY):
+                        log.info("[LIMIT] Max trades reached across the account's shards. Stopping further trades.")
+                        trades_today = MAX_TRADES_PER_DAY
+                        break
+
+                    # An exception keeps the board reservation; the position may have been opened
+                    valid_trade = place_trade(
+                        signal_data['symbol'],
+                        signal_data['signal'],
+                        signal_data['price'],
+                        signal_data["qty"],
+                        signal_data['notes'],
+                        signal_data.get('signal_time'),
+                        signal_data['score']
+                    )
+                    metrics.inc('trades_total', result='placed' if valid_trade else 'rejected')
+                    if board:
+                        if not valid_trade:
+                            board.release(current_day)
+                        trades_today = min(board.count(current_day), MAX_TRADES_PER_DAY)
+                    if not valid_trade:
+                        log.info(f"[REMOVE] Excluding {signal_data['symbol']} from potential pairs.")
+                        potential_pair.remove(signal_data)  # Remove invalid trade from potential_pair
+                        universe.exclude(signal_data['symbol'], 'Trade rejected')  # Exclude invalid symbol
+                    else:
+                        log.info(f"[SUCCESS] Excluding {signal_data['symbol']} after successful trade.")
+                        universe.exclude_until_day_end(signal_data['symbol'], 'Traded today')  # Exclude successfully traded symbol
+                        stop_event.wait(5)  # Delay between trades
+                        found_signal = True
+
+            if not found_signal:
+                log.info("[SUMMARY] No valid pairs found or trades placed in this cycle.")
+
+            # If there are still potential pairs left, skip rescanning
+            if potential_pair and not stop_event.is_set():
+                log.info("[INFO] Reusing remaining potential pairs for the next cycle.")
+                continue
 
-    except Exception as e:
-        print(f"[FATAL] {e}")
-
-    print("[FINISH] Cycle completed.")
-    break
-
-print("[END] Bot execution completed.")
-send_telegram_message("Bot execution completed.")
-
-if top_signals:
-    message_lines = ["\n Final Top Signals"]
-    for i, s in enumerate(top_signals, 1):
-        message_lines.append(f"  {i}. {s['symbol']} | Signal: {s['signal']} | Price: {s['price']} | Score: {s['score']} | Notes: {s['notes']}")
-
-    final_message = "\n".join(message_lines)
-    print(final_message)
-else:
-    print("[NO TOP SIGNALS] No top signals found at the end of the bot execution.")
-
-# Send final top signals to Telegram
-if top_signals:
-    # Prepare the final top signals message
-    message_lines = ["<b>📊 Final Top Signals</b>"]
-    for i, s in enumerate(top_signals, 1):
-        message_lines.append(
-            f"| {i}. <code>{s['symbol']}</code> | Signal: <b>{s['signal'].upper()}</b> | "
-        )
-    final_message = "\n".join(message_lines)
-
-    # Send the message via Telegram
-    send_telegram_message(final_message)
-else:
-    send_telegram_message("❌ No top signals found at the end of the bot execution.")
-
-if trade_log:
-    message_lines = ["\n Final Trade Log"]
-    for i, trade in enumerate(trade_log, 1):
-        trade_num, symbol, signal, entry, sl, tp, qty, rr, notes = trade
-        message_lines.append(f"  {i}. {symbol} | Signal: {signal} | Entry: {entry} | SL: {sl} | TP: {tp} | RR: {rr} | Notes: {notes}")
-
-    final_message = "\n".join(message_lines)
-    print(final_message)
-else:
-    print("[NO TRADES] No trades were executed during bot execution.")
-
-if trade_log:
-    # Prepare simple trade log message
-    message_lines = ["<b>📊 Trade Summary</b>"]
-    for i, trade in enumerate(trade_log, 1):
-        _, symbol, signal, *_ = trade
-        message_lines.append(f"{i}. <code>{symbol}</code> | <b>{signal.upper()}</b>")
-    final_message = "\n".join(message_lines)
-
-    # Send the message via Telegram 
-    send_telegram_message(final_message)
-else:
-    send_telegram_message("❌ No trades executed")
\ No newline at end of file
+        except Exception as e:
+            log.error(f"[FATAL] {e}")
+
+        log.info("[FINISH] Cycle completed.")
+        if not DAEMON or stop_event.is_set():
+            break
+        wait_for_next_candle()
+
+
+def shutdown():
+    log.info("[END] Bot execution completed.")
+    log.info(f"[RATE] Peak request weight this run: {governor.peak_weight}/{WEIGHT_LIMIT_PER_MINUTE}")
+    if market is not client and market is not feed:
+        market.stop()
+    if user_stream:
+        user_stream.stop()
+    send_telegram_message("Bot execution completed.")
+
+    report_day()
+
+    # Expired exclusions are dropped; the rest stay on disk for the next run
+    universe.purge()
+    log.info(f"[UNIVERSE] {len(universe)} symbols excluded at the end of this run")
+    income_ledger.close()
+    trade_journal.close()
+    if board:
+        board.close()
+    if feed:
+        feed.close()
+
+    # Per-phase timings for this run
+    metrics.write_summary(METRICS_SUMMARY_PATH)
+    metrics.stop()
+    log.info(f"[METRICS] Timing summary written to {METRICS_SUMMARY_PATH}")
+
+    # Deliver everything still queued before the process exits
+    telegram.close()
+
+
+def main():
+    initialize()
+    signal.signal(signal.SIGTERM, request_shutdown)
+    if DAEMON:
+        signal.signal(signal.SIGINT, request_shutdown)
+        log.info(f"[START] Daemon mode: scanning every {INTERVAL} candle. Send SIGTERM to stop.")
+    run()
+    shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+import json
+import logging
+import time
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+# ==== Shared-Memory Market Feed ====
+# coordinator.py fetches klines, 24h tickers and mark prices once per candle and
+# publishes them here for any number of worker processes (one per account or
+# symbol shard). Workers map the same block and copy each new cycle out of it
+# once, without requests of their own.
+#
+# Layout: an int64 header, then two slots of fixed-capacity arrays. The
+# coordinator writes the idle slot and flips the header afterwards. Each slot
+# has a seqlock-style sequence number that is odd while the slot is written;
+# readers copy the active slot out and retry when the sequence moved during the
+# copy, so a worker never holds a cycle that is torn or rewritten under it.
+# The coordinator's exchange_info (trimmed by symbol_filters) rides along as
+# JSON, so workers build their SymbolFilters without downloading it.
+INDICATOR_NAMES = ('EMA20', 'EMA50', 'EMA200', 'RSI', 'MACD', 'Signal', 'Hist')
+TICKER_FIELDS = ('volume', 'lastPrice', 'priceChangePercent', 'highPrice', 'lowPrice')
+SYMBOL_WIDTH = 24
+INFO_BYTES_PER_SYMBOL = 512  # A trimmed exchange_info entry takes about 350
+READ_RETRIES = 100
+
+# Header fields; COUNT, PUBLISHED_AT, SEQUENCE and INFO_SIZE repeat per slot (index + SLOT_FIELDS * slot)
+GENERATION, ACTIVE, CAPACITY, BARS, COUNT, PUBLISHED_AT, SEQUENCE, INFO_SIZE = range(8)
+SLOT_FIELDS = 4
+HEADER_FIELDS = 12
+
+
+def shard_of(symbol, shard_count):
+    # Stable across processes and runs (unlike hash())
+    return zlib.crc32(symbol.encode()) % shard_count
+
+
+def _slot_arrays(capacity, bars):
+    return (
+        ('symbols', f'S{SYMBOL_WIDTH}', (capacity,)),
+        ('close', np.float64, (capacity, bars)),
+        ('close_time', np.int64, (capacity, bars)),
+        ('indicators', np.float64, (len(INDICATOR_NAMES), capacity, bars)),
+        ('tickers', np.float64, (capacity, len(TICKER_FIELDS))),
+        ('marks', np.float64, (capacity,)),
+        ('exchange_info', np.uint8, (capacity * INFO_BYTES_PER_SYMBOL,)),
+    )
+
+
+def _layout(capacity, bars):
+    # Byte offset of every array; each slot is 8-byte aligned
+    offsets = []
+    position = HEADER_FIELDS * 8
+    for slot in range(2):
+        arrays = {}
+        for name, dtype, shape in _slot_arrays(capacity, bars):
+            arrays[name] = (position, dtype, shape)
+            position += -(-np.dtype(dtype).itemsize * int(np.prod(shape)) // 8) * 8
+        offsets.append(arrays)
+    return offsets, position
+
+
+def _map(buffer, capacity, bars):
+    header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=buffer)
+    offsets, _ = _layout(capacity, bars)
+    slots = [
+        {name: np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset) for name, (offset, dtype, shape) in arrays.items()}
+        for arrays in offsets
+    ]
+    return header, slots
+
+
+class MarketFeed:
+    # Coordinator side: creates and owns the shared block
+    def __init__(self, name=None, capacity=1000, bars=210):
+        _, size = _layout(capacity, bars)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.header, self.slots = _map(self.shm.buf, capacity, bars)
+        self.header[:] = 0
+        self.header[CAPACITY] = capacity
+        self.header[BARS] = bars
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def generation(self):
+        return int(self.header[GENERATION])
+
+    def publish(self, symbols, close, close_time, indicators, tickers, marks, exchange_info=None):
+        # symbols: n names; close/close_time: n x bars; indicators: {name: n x bars};
+        # tickers: n x len(TICKER_FIELDS); marks: n; exchange_info: {'symbols': [...]}
+        capacity = int(self.header[CAPACITY])
+        if len(symbols) > capacity:
+            log.warning(f"[FEED] {len(symbols)} symbols exceed the feed capacity of {capacity}; publishing the first {capacity}")
+        n = min(len(symbols), capacity)
+
+        slot = (int(self.header[ACTIVE]) + 1) % 2 if self.generation else 0
+        arrays = self.slots[slot]
+        self.header[SEQUENCE + slot * SLOT_FIELDS] += 1  # Odd: readers of this slot retry
+        arrays['symbols'][:n] = [s.encode() for s in symbols[:n]]
+        arrays['close'][:n] = close[:n]
+        arrays['close_time'][:n] = close_time[:n]
+        for i, name in enumerate(INDICATOR_NAMES):
+            arrays['indicators'][i, :n] = indicators[name][:n]
+        arrays['tickers'][:n] = tickers[:n]
+        arrays['marks'][:n] = marks[:n]
+
+        info = json.dumps(exchange_info, separators=(',', ':')).encode() if exchange_info else b''
+        if len(info) > len(arrays['exchange_info']):
+            log.warning(f"[FEED] exchange_info takes {len(info)} bytes, more than the feed holds; workers download it themselves")
+            info = b''
+        arrays['exchange_info'][:len(info)] = np.frombuffer(info, dtype=np.uint8)
+
+        # Counts and time are per slot; the flip publishes everything at once
+        self.header[COUNT + slot * SLOT_FIELDS] = n
+        self.header[PUBLISHED_AT + slot * SLOT_FIELDS] = int(time.time() * 1000)
+        self.header[INFO_SIZE + slot * SLOT_FIELDS] = len(info)
+        self.header[SEQUENCE + slot * SLOT_FIELDS] += 1
+        self.header[ACTIVE] = slot
+        self.header[GENERATION] += 1
+        return self.generation
+
+    def close(self):
+        self.header = self.slots = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FeedSnapshot:
+    # One published cycle, copied out of its slot: symbol index plus private arrays
+    def __init__(self, generation, published_at, arrays):
+        self.generation = generation
+        self.published_at = published_at
+        self.symbols = [s.decode() for s in arrays['symbols']]
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.close = arrays['close']
+        self.close_time = arrays['close_time']
+        self.indicators = {name: arrays['indicators'][i] for i, name in enumerate(INDICATOR_NAMES)}
+        self.tickers = arrays['tickers']
+        self.marks = arrays['marks']
+        self.exchange_info = arrays['exchange_info'].tobytes()
+
+    @classmethod
+    def read(cls, header, slots):
+        # Seqlock read: copy the active slot and keep the copy only if no publish touched it meanwhile
+        for _ in range(READ_RETRIES):
+            generation = int(header[GENERATION])
+            slot = int(header[ACTIVE])
+            sequence = int(header[SEQUENCE + slot * SLOT_FIELDS])
+            if sequence % 2 == 0:
+                count = int(header[COUNT + slot * SLOT_FIELDS])
+                published_at = int(header[PUBLISHED_AT + slot * SLOT_FIELDS]) / 1000
+                used = {name: values[:count] for name, values in slots[slot].items()}
+                used['indicators'] = slots[slot]['indicators'][:, :count]
+                used['exchange_info'] = slots[slot]['exchange_info'][:int(header[INFO_SIZE + slot * SLOT_FIELDS])]
+                arrays = {name: np.array(values) for name, values in used.items()}
+                if int(header[SEQUENCE + slot * SLOT_FIELDS]) == sequence:
+                    return cls(generation, published_at, arrays)
+            time.sleep(0.001)
+        raise RuntimeError("Market feed is being rewritten faster than it can be read")
+
+
+class FeedReader:
+    # Worker side. The read methods mirror the UMFutures calls the bot uses, like
+    # MarketStream; single-symbol mark prices (the order path) and anything the
+    # feed does not carry go to the REST client.
+    def __init__(self, name, client=None):
+        self.client = client
+        self.shm = _attach(name)
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        self.header, self.slots = _map(self.shm.buf, int(header[CAPACITY]), int(header[BARS]))
+        self.current = None
+
+    @property
+    def generation(self):
+        return int(self.header[GENERATION])
+
+    def snapshot(self):
+        # The newest complete cycle; copied again only when the coordinator has published since
+        if self.current is None or self.current.generation != self.generation:
+            self.current = FeedSnapshot.read(self.header, self.slots)
+        return self.current
+
+    def wait_for_update(self, generation, timeout, stop_event=None, poll=0.5):
+        # Wait until a cycle newer than `generation` is published; False on timeout or stop
+        deadline = time.monotonic() + timeout
+        while self.generation <= generation:
+            if time.monotonic() >= deadline or (stop_event and stop_event.is_set()):
+                return False
+            if stop_event:
+                stop_event.wait(poll)
+            else:
+                time.sleep(poll)
+        return True
+
+    def __contains__(self, symbol):
+        return symbol in self.snapshot().index
+
+    def frame(self, symbol):
+        # Close, close time and indicator rows of one symbol as views into the
+        # snapshot's private copy; later publishes do not change them
+        snapshot = self.snapshot()
+        i = snapshot.index[symbol]
+        frame = {name: values[i] for name, values in snapshot.indicators.items()}
+        frame['c'] = snapshot.close[i]
+        frame['close_time'] = snapshot.close_time[i]
+        return frame
+
+    # ==== REST-compatible reads ====
+    def ticker_24hr_price_change(self, symbol=None):
+        snapshot = self.snapshot()
+        if symbol is None:
+            return [self._ticker(snapshot, s) for s in snapshot.symbols]
+        if symbol in snapshot.index:
+            return self._ticker(snapshot, symbol)
+        return self.client.ticker_24hr_price_change(symbol=symbol)
+
+    def mark_price(self, symbol=None):
+        if symbol is not None:
+            return self.client.mark_price(symbol=symbol)
+        # Stamped with the publish time (publishedAt, this host's clock), so consumers age them
+        # from the cycle rather than from this read
+        snapshot = self.snapshot()
+        published_ms = int(snapshot.published_at * 1000)
+        return [{'symbol': s, 'markPrice': str(snapshot.marks[i]), 'time': published_ms, 'publishedAt': published_ms}
+                for i, s in enumerate(snapshot.symbols)]
+
+    def klines(self, symbol, interval, limit=500, **kwargs):
+        return self.client.klines(symbol=symbol, interval=interval, limit=limit, **kwargs)
+
+    def exchange_info(self):
+        # The coordinator's copy, trimmed to the symbol filters; REST if it did not fit in the feed
+        info = self.snapshot().exchange_info
+        return json.loads(info) if info else self.client.exchange_info()
+
+    @staticmethod
+    def _ticker(snapshot, symbol):
+        values = snapshot.tickers[snapshot.index[symbol]]
+        ticker = {field: str(value) for field, value in zip(TICKER_FIELDS, values)}
+        ticker['symbol'] = symbol
+        return ticker
+
+    def close(self):
+        self.current = self.header = self.slots = None
+        self.shm.close()
+
+
+def _attach(name):
+    # Before Python 3.13 attaching also registers the block with this process's
+    # resource tracker, which would unlink the coordinator's feed when a worker exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
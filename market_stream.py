@@ -0,0 +1,269 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from binance.websocket.um_futures.websocket_client import UMFuturesWebsocketClient
+
+log = logging.getLogger(__name__)
+
+
+# ==== Streaming Market Data ====
+# Keeps an in-memory view of mark prices, 24h tickers and klines fed by the
+# futures websocket. The read methods mirror the UMFutures REST calls the bot
+# uses (mark_price, ticker_24hr_price_change, klines) so the scanner and
+# place_trade can read from it directly; anything missing or stale falls back
+# to the REST client. A dropped connection (Binance closes every one after 24
+# hours) is reopened with exponential backoff and reads use REST meanwhile.
+# Updates may have been missed while it was down, so the kline buffers are
+# dropped with it and re-seeded from REST once the streams are resubscribed.
+STREAMS = ['!markPrice@arr@1s', '!ticker@arr']
+
+
+class MarketStream:
+    def __init__(self, client, interval='5m', stream_url='wss://fstream.binance.com',
+                 max_price_age=5, max_ticker_age=30, history=500, record_path=None,
+                 reconnect_delay=1, max_reconnect_delay=60):
+        self.client = client
+        self.interval = interval
+        self.stream_url = stream_url
+        self.max_price_age = max_price_age
+        self.max_ticker_age = max_ticker_age
+        self.history = history
+        self.record_path = record_path
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.lock = threading.Lock()
+        self.marks = {}
+        self.tickers = {}
+        self.tickers_updated = 0
+        self.kline_rows = {}
+        self.resume = {}  # symbol -> buffer length, for the klines to re-seed after a reconnect
+        self.ws = None
+        self.connected = False
+        self.record_file = None
+        self.stopping = threading.Event()
+        self.reconnecting = threading.Lock()  # Held by the one thread reopening a dropped connection
+
+    def start(self):
+        if self.record_path:
+            self.record_file = open(self.record_path, 'a', encoding='utf-8')
+        self._connect()
+
+    def _connect(self):
+        self.ws = UMFuturesWebsocketClient(
+            stream_url=self.stream_url,
+            on_message=self._on_message,
+            on_close=self._on_close,
+            on_error=self._on_error,
+        )
+        self.ws.subscribe(STREAMS)
+        with self.lock:
+            self.connected = True
+        log.info(f"[STREAM] Connected to {self.stream_url}")
+
+    def stop(self):
+        self.stopping.set()
+        self.connected = False
+        self._close_ws()
+        if self.record_file:
+            self.record_file.close()
+            self.record_file = None
+
+    def _close_ws(self):
+        if self.ws:
+            try:
+                self.ws.stop()
+            except Exception as e:
+                log.error(f"[STREAM] Error while closing websocket: {e}")
+            self.ws = None
+
+    def _reopen(self):
+        delay = self.reconnect_delay
+        try:
+            while not self.stopping.wait(delay):
+                try:
+                    self._close_ws()
+                    self._connect()
+                    break
+                except Exception as e:
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    log.error(f"[STREAM] Could not reconnect: {e}. Retrying in {delay}s.")
+        finally:
+            self.reconnecting.release()
+        if self.connected:
+            self._resume()
+
+    def _resume(self):
+        # Subscribe the klines buffered before the drop again, then re-seed each from REST
+        with self.lock:
+            resume, self.resume = self.resume, {}
+        if not resume:
+            return
+        self.ws.subscribe([f"{symbol.lower()}@kline_{self.interval}" for symbol in resume])
+        for symbol, length in resume.items():
+            if self.stopping.is_set() or not self.connected:
+                return
+            try:
+                seed = self.client.klines(symbol=symbol, interval=self.interval, limit=length)
+            except Exception as e:
+                log.warning(f"[STREAM] Could not re-seed {symbol} klines: {e}. Seeding on its next request.")
+                continue
+            with self.lock:
+                self.kline_rows[symbol] = deque((list(row) for row in seed), maxlen=length)
+        log.info(f"[STREAM] Resubscribed and re-seeded klines of {len(resume)} symbols")
+
+    # ==== REST-compatible reads ====
+    def mark_price(self, symbol=None):
+        now = time.time()
+        with self.lock:
+            if self.connected:
+                if symbol is None:
+                    fresh = [dict(m) for m, received in self.marks.values() if now - received <= self.max_price_age]
+                    if fresh:
+                        return fresh
+                if symbol in self.marks:
+                    mark, received = self.marks[symbol]
+                    if now - received <= self.max_price_age:
+                        return dict(mark)
+        return self.client.mark_price(symbol=symbol) if symbol else self.client.mark_price()
+
+    def ticker_24hr_price_change(self, symbol=None):
+        with self.lock:
+            if self.connected and self.tickers and time.time() - self.tickers_updated <= self.max_ticker_age:
+                if symbol is None:
+                    return [dict(t) for t in self.tickers.values()]
+                if symbol in self.tickers:
+                    return dict(self.tickers[symbol])
+        return self.client.ticker_24hr_price_change(symbol=symbol) if symbol else self.client.ticker_24hr_price_change()
+
+    def klines(self, symbol, interval, limit=500, startTime=None, **kwargs):
+        # startTime requests (the kline store's incremental refresh) are served from
+        # the buffer too, as long as it reaches back that far
+        if startTime is not None:
+            kwargs['startTime'] = startTime
+        if interval != self.interval or not self.connected or set(kwargs) - {'startTime'}:
+            return self.client.klines(symbol=symbol, interval=interval, limit=limit, **kwargs)
+
+        with self.lock:
+            rows = self._buffered(symbol, limit, startTime)
+        if rows is not None:
+            return rows
+
+        if symbol not in self.kline_rows:
+            # First request for this symbol: seed from REST, then keep it live via the stream
+            seed = self.client.klines(symbol=symbol, interval=interval, limit=max(limit, self.history))
+            with self.lock:
+                if not self.connected:
+                    return self.client.klines(symbol=symbol, interval=interval, limit=limit, **kwargs)
+                self.kline_rows[symbol] = deque((list(row) for row in seed), maxlen=max(limit, self.history))
+                rows = self._buffered(symbol, limit, startTime)
+                ws = self.ws
+            ws.subscribe(f"{symbol.lower()}@kline_{interval}")
+            if rows is not None:
+                return rows
+        return self.client.klines(symbol=symbol, interval=interval, limit=limit, **kwargs)
+
+    def _buffered(self, symbol, limit, start_time):
+        # Rows as the REST call would return them, or None if the buffer can't answer it
+        rows = self.kline_rows.get(symbol)
+        if not rows:
+            return None
+        if start_time is None:
+            return [list(row) for row in list(rows)[-limit:]] if len(rows) >= limit else None
+        if rows[0][0] > start_time:
+            return None
+        return [list(row) for row in rows if row[0] >= start_time][:limit]
+
+    # ==== Stream handling ====
+    def _on_message(self, _, message):
+        if self.record_file:
+            self.record_file.write(json.dumps({'t': time.time(), 'data': message}) + '\n')
+        try:
+            self.handle(json.loads(message))
+        except Exception as e:
+            log.error(f"[STREAM] Failed to handle message: {e}")
+
+    def _on_close(self, manager):
+        if self.stopping.is_set() or not self._current(manager):
+            return
+        log.warning("[STREAM] Websocket closed. Reconnecting; reads fall back to REST meanwhile.")
+        self._disconnect()
+
+    def _on_error(self, manager, error):
+        if self.stopping.is_set() or not self._current(manager):
+            return
+        log.error(f"[STREAM] Websocket error: {error}. Reconnecting; reads fall back to REST meanwhile.")
+        self._disconnect()
+
+    def _current(self, manager):
+        # Callbacks of a connection that was already replaced are ignored
+        return self.ws is not None and self.ws.socket_manager is manager
+
+    def _disconnect(self):
+        with self.lock:
+            self.connected = False
+            # Klines can't be trusted once updates may have been missed; they are re-seeded after the reconnect
+            self.resume.update((symbol, rows.maxlen) for symbol, rows in self.kline_rows.items())
+            self.kline_rows.clear()
+        if self.reconnecting.acquire(blocking=False):
+            threading.Thread(target=self._reopen, name='market-stream-reconnect', daemon=True).start()
+
+    def handle(self, payload):
+        # Combined-stream wrappers carry the event under 'data'
+        if isinstance(payload, dict) and 'stream' in payload and 'data' in payload:
+            payload = payload['data']
+
+        events = payload if isinstance(payload, list) else [payload]
+        received = time.time()
+        with self.lock:
+            for event in events:
+                event_type = event.get('e') if isinstance(event, dict) else None
+                if event_type == 'markPriceUpdate':
+                    self.marks[event['s']] = (parse_mark_price(event), received)
+                elif event_type == '24hrTicker':
+                    self.tickers[event['s']] = parse_ticker(event)
+                    self.tickers_updated = received
+                elif event_type == 'kline':
+                    self._apply_kline(event['s'], event['k'])
+
+    def _apply_kline(self, symbol, k):
+        rows = self.kline_rows.get(symbol)
+        if rows is None or k['i'] != self.interval:
+            return
+        row = [k['t'], k['o'], k['h'], k['l'], k['c'], k['v'], k['T'], k['q'], k['n'], k['V'], k['Q'], '0']
+        if rows and rows[-1][0] == k['t']:
+            rows[-1] = row
+        elif not rows or k['t'] > rows[-1][0]:
+            rows.append(row)
+
+
+def parse_mark_price(event):
+    return {
+        'symbol': event['s'],
+        'markPrice': event['p'],
+        'indexPrice': event.get('i'),
+        'lastFundingRate': event.get('r'),
+        'nextFundingTime': event.get('T'),
+        'time': event['E'],
+    }
+
+
+def parse_ticker(event):
+    return {
+        'symbol': event['s'],
+        'priceChange': event['p'],
+        'priceChangePercent': event['P'],
+        'weightedAvgPrice': event.get('w'),
+        'lastPrice': event['c'],
+        'lastQty': event.get('Q'),
+        'openPrice': event.get('o'),
+        'highPrice': event.get('h'),
+        'lowPrice': event.get('l'),
+        'volume': event['v'],
+        'quoteVolume': event.get('q'),
+        'openTime': event.get('O'),
+        'closeTime': event.get('C'),
+        'count': event.get('n'),
+    }
@@ -0,0 +1,729 @@
+import argparse
+import json
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit, urlencode
+import numpy as np
+import requests
+from replay_server import ReplayHandler, ReplayServer
+
+
+# ==== Local Mock Binance USDⓈ-M Futures Server ====
+# Stand-in for the REST endpoints the bot uses, so main.py, backtests and
+# benchmarks can run against one machine. Market data is synthetic but
+# deterministic for a given seed: every symbol's price is a smooth function of
+# time, so klines for any range can be generated without storing history.
+# Point the bot at it with BINANCE_BASE_URL=http://127.0.0.1:<port>.
+#
+# - latency / jitter: seconds added to every response
+# - error_rate: share of requests answered with HTTP 500
+# - errors: {path: (status, code, msg)} forced failures for specific endpoints
+# - weight_limit: answer 429 once the per-minute weight is exceeded
+# - upstream + record_path: proxy public GETs to a real server and save them
+# - replay_path: serve previously recorded responses before synthetic ones
+# - stream_port: local user data stream (listenKey endpoints plus a websocket
+#   pushing ORDER_TRADE_UPDATE / ACCOUNT_UPDATE for the mock account); open
+#   STOP_MARKET / TAKE_PROFIT_MARKET orders fill once the mark price crosses them;
+#   GET /fapi/v1/order and /fapi/v3/positionRisk answer from the same book
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000,
+}
+
+ENDPOINT_WEIGHTS = {
+    '/fapi/v1/exchangeInfo': 1,
+    '/fapi/v1/premiumIndex': 1,
+    '/fapi/v1/order/test': 1,
+    '/fapi/v1/order': 1,
+    '/fapi/v1/batchOrders': 5,
+    '/fapi/v1/income': 30,
+    '/fapi/v1/listenKey': 1,
+}
+
+LISTEN_KEY_TTL = 3600  # Seconds a listenKey lives without a keepalive
+ORDER_HISTORY = 10_000  # Finished orders GET /fapi/v1/order still finds
+REQUEST_LOG = 10_000  # Most recent (method, path) pairs kept in `requests`
+
+# Query parameters that change on every signed call and must not key recordings
+VOLATILE_PARAMS = ('timestamp', 'signature', 'recvWindow')
+
+
+def kline_weight(limit):
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def recording_key(method, path, params):
+    query = sorted((k, v) for k, v in params.items() if k not in VOLATILE_PARAMS)
+    return f"{method} {path}?{urlencode(query)}"
+
+
+class SyntheticMarket:
+    def __init__(self, symbols=200, seed=7):
+        rng = np.random.default_rng(seed)
+        self.symbols = [f"SYM{i:04d}USDT" for i in range(symbols)]
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.base = rng.uniform(0.01, 500, symbols)
+        self.amplitude = rng.uniform(0.01, 0.06, (symbols, 3))
+        self.period = rng.uniform(20, 2000, (symbols, 3))
+        self.phase = rng.uniform(0, 2 * np.pi, (symbols, 3))
+        self.volume = rng.lognormal(16, 1.5, symbols)
+        self.seed = seed
+
+    def price(self, symbol, minutes):
+        # Sum of slow waves plus deterministic per-minute noise, for any shape of `minutes`
+        i = self.index[symbol]
+        minutes = np.asarray(minutes, dtype=np.float64)[..., None]
+        waves = np.sum(self.amplitude[i] * np.sin(minutes / self.period[i] + self.phase[i]), axis=-1)
+        noise = np.sin(minutes[..., 0] * 12.9898 + i * 78.233) * 0.002
+        return self.base[i] * np.exp(waves + noise)
+
+    def mark(self, symbol, now_ms):
+        return float(self.price(symbol, now_ms / 60_000))
+
+    def tick_size(self, symbol):
+        return 10.0 ** (np.floor(np.log10(self.base[self.index[symbol]])) - 4)
+
+    def step_size(self, symbol):
+        # One step is worth roughly 0.01-0.1 USDT, at most one contract
+        return min(1.0, 10.0 ** np.floor(np.log10(0.1 / self.base[self.index[symbol]])))
+
+    def klines(self, symbol, interval, limit, start_time, end_time, now_ms, samples=5):
+        step = INTERVAL_MS[interval]
+        last_open = (now_ms // step) * step
+        if end_time is not None:
+            last_open = min(last_open, (end_time // step) * step)
+        if start_time is not None:
+            first_open = -(-start_time // step) * step
+            opens = np.arange(first_open, min(last_open, first_open + (limit - 1) * step) + 1, step, dtype=np.int64)
+        else:
+            opens = np.arange(last_open - (limit - 1) * step, last_open + 1, step, dtype=np.int64)
+        if not len(opens):
+            return []
+
+        # A few samples per bar give open/high/low; the forming bar ends at now_ms
+        close_ms = np.minimum(opens + step - 1, now_ms)
+        sample_ms = np.minimum(opens[:, None] + np.linspace(0, step - 1, samples)[None, :], close_ms[:, None])
+        path = self.price(symbol, sample_ms / 60_000)
+        close = path[:, -1]
+        high = path.max(axis=1)
+        low = path.min(axis=1)
+        volume = self.volume[self.index[symbol]] / (86_400_000 / step) / close
+        return [
+            [int(o), f"{p[0]:.8f}", f"{h:.8f}", f"{l:.8f}", f"{c:.8f}", f"{v:.3f}", int(o + step - 1),
+             f"{v * c:.4f}", 100, f"{v / 2:.3f}", f"{v * c / 2:.4f}", "0"]
+            for o, p, h, l, c, v in zip(opens, path, high, low, close, volume)
+        ]
+
+    # ==== Response Bodies ====
+    def exchange_info(self, weight_limit=2400):
+        symbols = []
+        for symbol in self.symbols:
+            symbols.append({
+                'symbol': symbol,
+                'pair': symbol,
+                'contractType': 'PERPETUAL',
+                'status': 'TRADING',
+                'baseAsset': symbol[:-4],
+                'quoteAsset': 'USDT',
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'tickSize': f"{self.tick_size(symbol):.10f}", 'minPrice': '0', 'maxPrice': '1000000'},
+                    {'filterType': 'LOT_SIZE', 'stepSize': f"{self.step_size(symbol):.10f}", 'minQty': f"{self.step_size(symbol):.10f}", 'maxQty': '10000000'},
+                    {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+                    {'filterType': 'PERCENT_PRICE', 'multiplierUp': '1.0500', 'multiplierDown': '0.9500', 'multiplierDecimal': '4'},
+                ],
+            })
+        return {
+            'timezone': 'UTC',
+            'serverTime': now_ms(),
+            'rateLimits': [
+                {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': weight_limit},
+                {'rateLimitType': 'ORDERS', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 1200},
+            ],
+            'symbols': symbols,
+        }
+
+    def ticker(self, symbol, now):
+        day_ago = self.mark(symbol, now - 86_400_000)
+        last = self.mark(symbol, now)
+        volume = self.volume[self.index[symbol]] / last
+        return {
+            'symbol': symbol,
+            'priceChange': f"{last - day_ago:.8f}",
+            'priceChangePercent': f"{(last / day_ago - 1) * 100:.3f}",
+            'weightedAvgPrice': f"{(last + day_ago) / 2:.8f}",
+            'lastPrice': f"{last:.8f}",
+            'lastQty': '1',
+            'openPrice': f"{day_ago:.8f}",
+            'highPrice': f"{max(last, day_ago):.8f}",
+            'lowPrice': f"{min(last, day_ago):.8f}",
+            'volume': f"{volume:.3f}",
+            'quoteVolume': f"{volume * last:.4f}",
+            'openTime': now - 86_400_000,
+            'closeTime': now,
+            'count': 1000,
+        }
+
+    def mark_price(self, symbol, now):
+        return {
+            'symbol': symbol,
+            'markPrice': f"{self.mark(symbol, now):.8f}",
+            'indexPrice': f"{self.mark(symbol, now):.8f}",
+            'lastFundingRate': '0.00010000',
+            'nextFundingTime': (now // 28_800_000 + 1) * 28_800_000,
+            'time': now,
+        }
+
+
+class MockBinanceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, symbols=200, seed=7, latency=0.0, jitter=0.0,
+                 error_rate=0.0, errors=None, weight_limit=None, upstream=None, record_path=None,
+                 replay_path=None, stream_port=0, trigger_interval=1.0):
+        super().__init__((host, port), MockBinanceHandler)
+        self.market = SyntheticMarket(symbols, seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.errors = errors or {}
+        self.weight_limit = weight_limit
+        self.upstream = upstream
+        self.record_path = record_path
+        self.recordings = {}
+        if replay_path:
+            with open(replay_path, encoding='utf-8') as f:
+                self.recordings = json.load(f)
+
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.window = int(time.time() // 60)
+        self.used_weight = 0
+        self.order_count = 0
+        self.next_order_id = 1
+        self.positions = {}
+        self.entry_prices = {}
+        self.open_orders = {}
+        self.finished_orders = OrderedDict()
+        self.listen_keys = {}
+        self.requests = deque(maxlen=REQUEST_LOG)
+        self.thread = None
+
+        self.user_stream = UserStreamServer(host, stream_port)
+        self.trigger_interval = trigger_interval
+        self.stopping = threading.Event()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stream_url(self):
+        return self.user_stream.url
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        self.user_stream.start()
+        if self.trigger_interval:
+            threading.Thread(target=self._watch, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self.stopping.set()
+        self.user_stream.stop()
+        self.shutdown()
+        self.server_close()
+        self.save_recordings()
+
+    def _watch(self):
+        while not self.stopping.wait(self.trigger_interval):
+            self.check_triggers()
+            self.expire_listen_keys()
+
+    def save_recordings(self):
+        if self.record_path and self.recordings:
+            with open(self.record_path, 'w', encoding='utf-8') as f:
+                json.dump(self.recordings, f)
+
+    def charge(self, weight, is_order=False):
+        with self.lock:
+            minute = int(time.time() // 60)
+            if minute != self.window:
+                self.window = minute
+                self.used_weight = 0
+                self.order_count = 0
+            self.used_weight += weight
+            if is_order:
+                self.order_count += 1
+            return self.used_weight, self.order_count
+
+    # ==== Order Endpoints ====
+    def place_order(self, order, test=False):
+        symbol = order.get('symbol')
+        if symbol not in self.market.index:
+            return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+        if test:
+            return 200, {}
+
+        now = now_ms()
+        with self.lock:
+            order_id = self.next_order_id
+            self.next_order_id += 1
+
+        order_type = order.get('type')
+        side = order.get('side')
+        response = {
+            'orderId': order_id,
+            'symbol': symbol,
+            'status': 'NEW',
+            'clientOrderId': order.get('newClientOrderId', f"mock{order_id}"),
+            'price': '0',
+            'avgPrice': '0',
+            'origQty': str(order.get('quantity', '0')),
+            'executedQty': '0',
+            'type': order_type,
+            'side': side,
+            'stopPrice': str(order.get('stopPrice', '0')),
+            'closePosition': str(order.get('closePosition', 'false')).lower() == 'true',
+            'reduceOnly': str(order.get('reduceOnly', 'false')).lower() == 'true',
+            'workingType': order.get('workingType', 'CONTRACT_PRICE'),
+            'updateTime': now,
+        }
+
+        if order_type == 'MARKET':
+            price = self.market.mark(symbol, now)
+            qty = float(order.get('quantity', 0))
+            signed = qty if side == 'BUY' else -qty
+            with self.lock:
+                position = self.positions.get(symbol, 0.0)
+                if response['reduceOnly']:
+                    if position == 0 or (position > 0) == (signed > 0):
+                        return 400, {'code': -2022, 'msg': 'ReduceOnly Order is rejected.'}
+                    signed = max(-abs(position), min(abs(position), signed))
+                realized = self._apply_fill(symbol, signed, price)
+                expired = self._expire_flat(symbol)
+            response.update(status='FILLED', avgPrice=f"{price:.8f}", executedQty=str(abs(signed)))
+            self._emit_fill(response, price, abs(signed), realized, now, expired)
+        else:
+            with self.lock:
+                self.open_orders[order_id] = response
+            self.emit(order_event(response, 'NEW', now))
+        return 200, response
+
+    def _apply_fill(self, symbol, signed, price):
+        # Net position and entry price update; returns the PnL realized by the reducing part (lock held)
+        position = self.positions.get(symbol, 0.0)
+        entry = self.entry_prices.get(symbol, price)
+        realized = 0.0
+        if position and (position > 0) != (signed > 0):
+            realized = min(abs(position), abs(signed)) * (price - entry) * (1 if position > 0 else -1)
+        new = position + signed
+        if abs(new) < 1e-12:
+            new = 0.0
+            self.entry_prices.pop(symbol, None)
+        elif not position or (position > 0) != (new > 0):
+            self.entry_prices[symbol] = price  # Opened or flipped
+        elif (position > 0) == (signed > 0):
+            self.entry_prices[symbol] = (abs(position) * entry + abs(signed) * price) / abs(new)
+        self.positions[symbol] = new
+        return realized
+
+    def _expire_flat(self, symbol):
+        # closePosition orders have nothing left to close once the symbol is flat (lock held)
+        if self.positions.get(symbol):
+            return []
+        ids = [i for i, o in self.open_orders.items() if o['symbol'] == symbol and o['closePosition']]
+        return [self.open_orders.pop(i) for i in ids]
+
+    def check_triggers(self, now=None):
+        # Fill open STOP_MARKET / TAKE_PROFIT_MARKET orders whose stop price the mark has crossed
+        now = now or now_ms()
+        with self.lock:
+            pending = list(self.open_orders.values())
+        for order in pending:
+            if order['type'] not in ('STOP_MARKET', 'TAKE_PROFIT_MARKET'):
+                continue
+            mark = self.market.mark(order['symbol'], now)
+            stop = float(order['stopPrice'])
+            rising = (order['type'] == 'STOP_MARKET') == (order['side'] == 'BUY')
+            if (mark >= stop) if rising else (mark <= stop):
+                self.trigger_order(order['orderId'], now)
+
+    def trigger_order(self, order_id, now=None):
+        # Execute an open order at the current mark price, e.g. to hit a stop-loss on demand
+        now = now or now_ms()
+        with self.lock:
+            order = self.open_orders.pop(order_id, None)
+            if order is None:
+                return None
+            symbol = order['symbol']
+            price = self.market.mark(symbol, now)
+            position = self.positions.get(symbol, 0.0)
+            if order['closePosition']:
+                qty = abs(position) if position and (position > 0) == (order['side'] == 'SELL') else 0.0
+            else:
+                qty = float(order['origQty'])
+            realized = self._apply_fill(symbol, qty if order['side'] == 'BUY' else -qty, price) if qty else 0.0
+            expired = self._expire_flat(symbol)
+        if not qty:
+            self._finish(order, 'EXPIRED')
+            self.emit(order_event(order, 'EXPIRED', now))
+            return order
+        order = dict(order, status='FILLED', avgPrice=f"{price:.8f}", executedQty=str(qty), updateTime=now)
+        self._emit_fill(order, price, qty, realized, now, expired)
+        return order
+
+    # ==== User Data Stream ====
+    def listen_key(self, method, params):
+        # One key per account like Binance: POST returns the live key (extended) or a new one
+        now = time.time()
+        with self.lock:
+            live = [key for key, expires in self.listen_keys.items() if expires > now]
+            if method == 'POST':
+                key = live[0] if live else f"{self.random.getrandbits(256):064x}"
+                self.listen_keys[key] = now + LISTEN_KEY_TTL
+                return 200, {'listenKey': key}
+            key = params.get('listenKey') or (live[0] if live else None)
+            if key not in live:
+                return 400, {'code': -1125, 'msg': 'This listenKey does not exist.'}
+            if method == 'PUT':
+                self.listen_keys[key] = now + LISTEN_KEY_TTL
+                return 200, {'listenKey': key}
+            if method == 'DELETE':
+                del self.listen_keys[key]
+                return 200, {}
+        return 404, {'code': -5000, 'msg': f"Path /fapi/v1/listenKey, Method {method} is invalid"}
+
+    def expire_listen_keys(self, now=None):
+        now = now or time.time()
+        with self.lock:
+            expired = [key for key, expires in self.listen_keys.items() if expires <= now]
+            for key in expired:
+                del self.listen_keys[key]
+        for key in expired:
+            self.user_stream.publish({key}, {'e': 'listenKeyExpired', 'E': int(now * 1000), 'listenKey': key})
+
+    def emit(self, event):
+        # Push one event to every connection subscribed to a live listenKey
+        now = time.time()
+        with self.lock:
+            live = {key for key, expires in self.listen_keys.items() if expires > now}
+        if live:
+            self.user_stream.publish(live, event)
+
+    def _emit_fill(self, order, price, qty, realized, now, expired=()):
+        with self.lock:
+            amount = self.positions.get(order['symbol'], 0.0)
+            entry = self.entry_prices.get(order['symbol'], 0.0)
+        self._finish(order, 'FILLED')
+        for other in expired:
+            self._finish(other, 'EXPIRED')
+        self.emit(account_event(order['symbol'], amount, entry, now))
+        self.emit(order_event(order, 'FILLED', now, price, qty, realized))
+        for other in expired:
+            self.emit(order_event(other, 'EXPIRED', now))
+
+    def _finish(self, order, status):
+        with self.lock:
+            self.finished_orders[order['orderId']] = dict(order, status=status)
+            while len(self.finished_orders) > ORDER_HISTORY:
+                self.finished_orders.popitem(last=False)
+
+    def query_order(self, params):
+        order_id = int(params.get('orderId', 0))
+        with self.lock:
+            order = self.open_orders.get(order_id) or self.finished_orders.get(order_id)
+        if order is None or order['symbol'] != params.get('symbol'):
+            return 400, {'code': -2013, 'msg': 'Order does not exist.'}
+        return 200, dict(order, origType=order['type'])
+
+    def position_risk(self):
+        with self.lock:
+            return 200, [
+                {'symbol': symbol, 'positionAmt': f"{amount:g}", 'entryPrice': f"{self.entry_prices.get(symbol, 0.0):.8f}",
+                 'positionSide': 'BOTH', 'updateTime': now_ms()}
+                for symbol, amount in self.positions.items() if amount
+            ]
+
+    def batch_orders(self, params):
+        orders = json.loads(params.get('batchOrders', '[]'))
+        if len(orders) > 5:
+            return 400, {'code': -1130, 'msg': 'Data sent for parameter batchOrders is not valid.'}
+        results = []
+        for order in orders:
+            status, body = self.place_order(order)
+            results.append(body)
+        return 200, results
+
+    def income(self, params):
+        # Deterministic synthetic REALIZED_PNL records, one every 90 minutes
+        end = int(params.get('endTime', now_ms()))
+        start = int(params.get('startTime', end - 7 * 86_400_000))
+        limit = min(int(params.get('limit', 100)), 1000)
+        step = 5_400_000
+        first = -(-start // step) * step
+        records = []
+        for t in range(first, end + 1, step):
+            rng = random.Random(t)
+            symbol = self.market.symbols[rng.randrange(len(self.market.symbols))]
+            records.append({
+                'symbol': symbol,
+                'incomeType': params.get('incomeType', 'REALIZED_PNL'),
+                'income': f"{rng.uniform(-0.6, 0.6):.8f}",
+                'asset': 'USDT',
+                'info': '',
+                'time': t,
+                'tranId': t // 1000,
+                'tradeId': str(t // 1000),
+            })
+            if len(records) >= limit:
+                break
+        return 200, records
+
+
+class MockBinanceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def _handle(self, method):
+        server = self.server
+        parts = urlsplit(self.path)
+        path = parts.path
+        params = dict(parse_qsl(parts.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            params.update(parse_qsl(self.rfile.read(length).decode('utf-8')))
+        server.requests.append((method, path))
+
+        delay = server.latency + (server.random.uniform(0, server.jitter) if server.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if path == '/fapi/v1/klines':
+            weight = kline_weight(int(params.get('limit', 500)))
+        elif path in ('/fapi/v1/ticker/24hr', '/fapi/v1/premiumIndex') and 'symbol' not in params:
+            weight = 40 if path == '/fapi/v1/ticker/24hr' else 10
+        else:
+            weight = ENDPOINT_WEIGHTS.get(path, 1)
+        is_order = path in ('/fapi/v1/order', '/fapi/v1/batchOrders') and method == 'POST'
+        used_weight, order_count = server.charge(weight, is_order)
+        headers = {'X-MBX-USED-WEIGHT-1M': str(used_weight), 'X-MBX-ORDER-COUNT-1M': str(order_count)}
+
+        if server.weight_limit and used_weight > server.weight_limit:
+            headers['Retry-After'] = str(60 - int(time.time() % 60))
+            return self._reply(429, {'code': -1003, 'msg': 'Too many requests; current limit is exceeded.'}, headers)
+        if path in server.errors:
+            status, code, message = server.errors[path]
+            return self._reply(status, {'code': code, 'msg': message}, headers)
+        if server.error_rate and server.random.random() < server.error_rate:
+            return self._reply(500, {'code': -1000, 'msg': 'An unknown error occurred while processing the request.'}, headers)
+
+        key = recording_key(method, path, params)
+        if key in server.recordings:
+            status, body = server.recordings[key]
+            return self._reply(status, body, headers)
+        if server.upstream and method == 'GET' and path not in ('/fapi/v1/income',):
+            status, body = self._proxy(path, params)
+            server.recordings[key] = [status, body]
+            return self._reply(status, body, headers)
+
+        status, body = self._route(method, path, params)
+        self._reply(status, body, headers)
+
+    def _proxy(self, path, params):
+        response = requests.get(self.server.upstream + path, params=params, timeout=10)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, response.text
+
+    def _route(self, method, path, params):
+        server = self.server
+        market = server.market
+        now = now_ms()
+        symbol = params.get('symbol')
+        if symbol is not None and symbol not in market.index and path != '/fapi/v1/income':
+            return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+
+        if path == '/fapi/v1/ping':
+            return 200, {}
+        if path == '/fapi/v1/time':
+            return 200, {'serverTime': now}
+        if path == '/fapi/v1/exchangeInfo':
+            return 200, market.exchange_info(server.weight_limit or 2400)
+        if path == '/fapi/v1/ticker/24hr':
+            if symbol:
+                return 200, market.ticker(symbol, now)
+            return 200, [market.ticker(s, now) for s in market.symbols]
+        if path == '/fapi/v1/premiumIndex':
+            if symbol:
+                return 200, market.mark_price(symbol, now)
+            return 200, [market.mark_price(s, now) for s in market.symbols]
+        if path == '/fapi/v1/klines':
+            interval = params.get('interval', '5m')
+            limit = min(int(params.get('limit', 500)), 1500)
+            start = int(params['startTime']) if 'startTime' in params else None
+            end = int(params['endTime']) if 'endTime' in params else None
+            return 200, market.klines(symbol, interval, limit, start, end, now)
+        if path == '/fapi/v1/order/test' and method == 'POST':
+            return server.place_order(params, test=True)
+        if path == '/fapi/v1/order' and method == 'POST':
+            return server.place_order(params)
+        if path == '/fapi/v1/order' and method == 'GET':
+            return server.query_order(params)
+        if path == '/fapi/v3/positionRisk':
+            return server.position_risk()
+        if path == '/fapi/v1/batchOrders' and method == 'POST':
+            return server.batch_orders(params)
+        if path == '/fapi/v1/income':
+            return server.income(params)
+        if path == '/fapi/v1/listenKey':
+            return server.listen_key(method, params)
+        return 404, {'code': -5000, 'msg': f"Path {path}, Method {method} is invalid"}
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class UserStreamHandler(ReplayHandler):
+    # No recording: events arrive through UserStreamServer.publish for the subscribed listenKeys
+    def handle(self):
+        if not self._handshake():
+            return
+        self.send_lock = threading.Lock()
+        self.closed = threading.Event()
+        self.streams = set()
+        self.server.register(self)
+        try:
+            self._read_loop()
+        finally:
+            self.server.unregister(self)
+
+
+class UserStreamServer(ReplayServer):
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__([], host, port)
+        self.RequestHandlerClass = UserStreamHandler
+
+    def publish(self, listen_keys, event):
+        payload = json.dumps(event).encode('utf-8')
+        with self.lock:
+            targets = [c for c in self.connections if c.streams & listen_keys]
+        for connection in targets:
+            connection._send(payload)
+
+
+def order_event(order, status, now, price=0.0, qty=0.0, realized=0.0):
+    # ORDER_TRADE_UPDATE for one state change of a mock order
+    return {
+        'e': 'ORDER_TRADE_UPDATE',
+        'E': now,
+        'T': now,
+        'o': {
+            's': order['symbol'],
+            'c': order['clientOrderId'],
+            'S': order['side'],
+            'o': order['type'],
+            'f': 'GTC',
+            'q': order['origQty'],
+            'p': '0',
+            'ap': f"{price:.8f}",
+            'sp': order['stopPrice'],
+            'x': 'TRADE' if status == 'FILLED' else status,
+            'X': status,
+            'i': order['orderId'],
+            'l': str(qty),
+            'z': str(qty),
+            'L': f"{price:.8f}",
+            'T': now,
+            'R': order.get('reduceOnly', False),
+            'wt': order['workingType'],
+            'ot': order['type'],
+            'ps': 'BOTH',
+            'cp': order['closePosition'],
+            'rp': f"{realized:.8f}",
+        },
+    }
+
+
+def account_event(symbol, amount, entry_price, now):
+    return {
+        'e': 'ACCOUNT_UPDATE',
+        'E': now,
+        'T': now,
+        'a': {
+            'm': 'ORDER',
+            'B': [],
+            'P': [{'s': symbol, 'pa': f"{amount:g}", 'ep': f"{entry_price:.8f}", 'cr': '0', 'up': '0', 'mt': 'cross', 'iw': '0', 'ps': 'BOTH'}],
+        },
+    }
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local mock of the Binance USDⓈ-M futures REST API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--symbols', type=int, default=200, help='Size of the synthetic universe (up to 1000)')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with HTTP 500')
+    parser.add_argument('--weight-limit', type=int, help='Answer 429 above this per-minute weight')
+    parser.add_argument('--upstream', help='Proxy public GETs to this base URL and record them')
+    parser.add_argument('--record', help='Where to save proxied responses (JSON)')
+    parser.add_argument('--replay', help='Serve responses recorded with --record')
+    parser.add_argument('--stream-port', type=int, default=8081, help='Port of the user data stream websocket')
+    parser.add_argument('--trigger-interval', type=float, default=1.0, help='Seconds between stop/take-profit trigger checks')
+    args = parser.parse_args()
+
+    server = MockBinanceServer(
+        args.host, args.port, min(args.symbols, 1000), args.seed, args.latency, args.jitter,
+        args.error_rate, weight_limit=args.weight_limit, upstream=args.upstream,
+        record_path=args.record, replay_path=args.replay, stream_port=args.stream_port,
+        trigger_interval=args.trigger_interval,
+    )
+    print(f"[MOCK] Serving {len(server.market.symbols)} symbols on {server.url} (set BINANCE_BASE_URL to this address)")
+    print(f"[MOCK] User data stream on {server.stream_url} (set USER_STREAM_URL to this address)")
+    try:
+        server.start()
+        server.stopping.wait()
+    except KeyboardInterrupt:
+        server.stop()
+        print("[MOCK] Stopped.")
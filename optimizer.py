@@ -0,0 +1,322 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+import indicators
+import strategy
+from backtest import align_klines, load_store, simulate, universe_mask
+from kline_store import INTERVAL_MS
+
+
+# ==== Parameter Sweep Optimizer ====
+# Grid or random search over the strategy's indicator periods, RSI thresholds
+# and trade sizing on klines from the local KlineStore, with walk-forward
+# validation: every fold picks the best parameter set on its training window
+# and reports how that set did on the unseen window right after it.
+#
+# Parameter sets are grouped by indicator periods and RSI thresholds; each
+# group is one task for the process pool. EMA, RSI and MACD arrays are cached
+# per period inside the worker, so every group sharing a period reuses them. A
+# task evaluates its signals once and walks every sizing combination through
+# all folds. Each worker loads and aligns the klines once when it starts.
+# Unlike backtest.run_backtest, those arrays run over the whole loaded history
+# rather than each scan's 210-bar window, since the periods vary: EMA200 then
+# sits ~0.2% (median, 0.9% p99) from the live value and on a year of random
+# walks ~5% of bars get another direction. Fine for ranking parameter sets;
+# confirm a winner with run_backtest.
+#
+#   python optimizer.py --train-days 14 --test-days 7
+#   python optimizer.py --random 500 --param rsi_long=30,35,40 --param ema_slow=50,100
+DEFAULT_SPACE = {
+    # Indicator periods (live: 20/50/200, RSI 14, MACD 12/26/9)
+    'ema_fast': [20],
+    'ema_slow': [50],
+    'ema_trend': [200],
+    'rsi_window': [14],
+    'macd_fast': [12],
+    'macd_slow': [26],
+    'macd_signal': [9],
+    # Signal thresholds (live: 40/50/60)
+    'rsi_long': [30, 35, 40, 45],
+    'rsi_mid': [45, 50, 55],
+    'rsi_short': [55, 60, 65, 70],
+    # Sizing and SL/TP distance (live: RISK_PER_TRADE 0.5, TP_USDT 0.5, 1% buffer)
+    'risk_per_trade': [0.25, 0.5, 1.0],
+    'tp_usdt': [0.25, 0.5, 1.0],
+    'buffer_percentage': [0.005, 0.01, 0.02],
+}
+PERIOD_PARAMS = ('ema_fast', 'ema_slow', 'ema_trend', 'rsi_window', 'macd_fast', 'macd_slow', 'macd_signal')
+THRESHOLD_PARAMS = ('rsi_long', 'rsi_mid', 'rsi_short')
+SIZING_PARAMS = ('risk_per_trade', 'tp_usdt', 'buffer_percentage')
+
+OBJECTIVES = {
+    'pnl': lambda s: s['total_pnl'],
+    'calmar': lambda s: s['total_pnl'] / s['max_drawdown'] if s['max_drawdown'] > 0 else s['total_pnl'],
+    'win_rate': lambda s: s['win_rate'],
+}
+INDICATOR_CACHE_SIZE = 32  # Indicator matrices kept per worker
+
+
+def valid(params):
+    return (params['ema_fast'] < params['ema_slow'] < params['ema_trend']
+            and params['macd_fast'] < params['macd_slow']
+            and params['rsi_long'] <= params['rsi_mid'] <= params['rsi_short'])
+
+
+def grid(space):
+    names = list(space)
+    for values in itertools.product(*(space[name] for name in names)):
+        params = dict(zip(names, values))
+        if valid(params):
+            yield params
+
+
+def sample(space, count, seed=0):
+    # Up to `count` distinct valid parameter sets drawn uniformly from the grid
+    rng = random.Random(seed)
+    sizes = [len(space[name]) for name in space]
+    total = int(np.prod(sizes))
+    picked, seen = [], set()
+    for _ in range(min(total, count * 20)):
+        if len(picked) >= count or len(seen) >= total:
+            break
+        index = tuple(rng.randrange(size) for size in sizes)
+        if index in seen:
+            continue
+        seen.add(index)
+        params = {name: space[name][i] for name, i in zip(space, index)}
+        if valid(params):
+            picked.append(params)
+    return picked
+
+
+def walk_forward_folds(bar_count, bars_per_day, train_days, test_days, folds=None):
+    # Rolling (train, test) bar windows, each test window right after its training window
+    train, test = train_days * bars_per_day, test_days * bars_per_day
+    windows = []
+    start = 0
+    while start + train + test <= bar_count:
+        windows.append(((start, start + train), (start + train, start + train + test)))
+        start += test
+    return windows[-folds:] if folds else windows
+
+
+# ==== Worker ====
+# Module state of each pool process, set once by init_worker
+_data = {}
+
+
+def init_worker(store, interval, symbols, bars, config):
+    symbols_, times, data = align_klines(load_store(store, interval, symbols, bars))
+    _data.update(symbols=symbols_, times=times, data=data, interval=interval, config=config)
+    _data['universe'] = universe_mask(data['close'], data['quote_volume'], 86_400_000 // INTERVAL_MS[interval])
+    # Indicators cached for earlier data (a previous workers=1 sweep in this process) no longer apply
+    for cached in (_ema, _rsi, _macd):
+        cached.cache_clear()
+
+
+@lru_cache(maxsize=INDICATOR_CACHE_SIZE)
+def _ema(window):
+    return indicators.ema(_data['data']['close'], window)
+
+
+@lru_cache(maxsize=INDICATOR_CACHE_SIZE)
+def _rsi(window):
+    return indicators.rsi(_data['data']['close'], window)
+
+
+@lru_cache(maxsize=INDICATOR_CACHE_SIZE)
+def _macd(fast, slow, signal):
+    line = _ema(fast) - _ema(slow)
+    signal_line = indicators.ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def indicator_set(periods):
+    # The strategy's indicator names, filled with this group's periods
+    macd_line, signal_line, hist = _macd(periods['macd_fast'], periods['macd_slow'], periods['macd_signal'])
+    return {
+        'EMA20': _ema(periods['ema_fast']),
+        'EMA50': _ema(periods['ema_slow']),
+        'EMA200': _ema(periods['ema_trend']),
+        'RSI': _rsi(periods['rsi_window']),
+        'MACD': macd_line,
+        'Signal': signal_line,
+        'Hist': hist,
+    }
+
+
+def run_group(task):
+    # One (periods, thresholds) group: [(params, [(train summary, test summary) per fold])]
+    periods, thresholds, combos, folds = task
+    signals = strategy.evaluate_signals(indicator_set(periods), **thresholds)
+
+    results = []
+    for params in combos:
+        sizing = {name: params[name] for name in SIZING_PARAMS}
+        per_fold = []
+        for train, test in folds:
+            per_fold.append(tuple(
+                simulate(
+                    _data['symbols'], _data['times'], _data['data'], signals, _data['interval'],
+                    universe=_data['universe'], window=window, **sizing, **_data['config'],
+                )[1]
+                for window in (train, test)
+            ))
+        results.append((params, per_fold))
+    return results
+
+
+# ==== Sweep ====
+def sweep(store, interval, parameter_sets, folds, workers=None, symbols=None, bars=None, **config):
+    # Runs every parameter set through every fold; returns one row per (set, fold)
+    groups = {}
+    for params in parameter_sets:
+        groups.setdefault(tuple(params[name] for name in PERIOD_PARAMS + THRESHOLD_PARAMS), []).append(params)
+    # Sorted groups with the same periods are neighbours; one chunk lets a worker reuse its cache
+    split = len(PERIOD_PARAMS)
+    tasks = [
+        (dict(zip(PERIOD_PARAMS, key[:split])), dict(zip(THRESHOLD_PARAMS, key[split:])), combos, folds)
+        for key, combos in sorted(groups.items())
+    ]
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(tasks) // (workers * 4))
+
+    initargs = (store, interval, symbols, bars, config)
+    if workers == 1:
+        init_worker(*initargs)
+        outputs = map(run_group, tasks)
+    else:
+        pool = ProcessPoolExecutor(workers, initializer=init_worker, initargs=initargs)
+        outputs = pool.map(run_group, tasks, chunksize=chunksize)
+
+    rows = []
+    try:
+        for output in outputs:
+            for params, per_fold in output:
+                for fold, (train, test) in enumerate(per_fold):
+                    row = dict(params, fold=fold)
+                    row.update({f'train_{k}': v for k, v in train.items()})
+                    row.update({f'test_{k}': v for k, v in test.items()})
+                    rows.append(row)
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    return pd.DataFrame(rows)
+
+
+def select(results, objective='pnl', min_trades=5):
+    # Best training parameter set per fold, with its out-of-sample (test) result
+    score = OBJECTIVES[objective]
+    results = results.assign(train_score=[
+        score({'total_pnl': p, 'max_drawdown': d, 'win_rate': w})
+        for p, d, w in zip(results['train_total_pnl'], results['train_max_drawdown'], results['train_win_rate'])
+    ])
+    candidates = results[results['train_trades'] >= min_trades]
+    if candidates.empty:
+        return candidates, results
+    best = candidates.loc[candidates.groupby('fold')['train_score'].idxmax()].sort_values('fold')
+    return best, results
+
+
+def day(ms):
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).strftime('%Y-%m-%d')
+
+
+def parse_param(text):
+    name, _, values = text.partition('=')
+    if name not in DEFAULT_SPACE or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=v1,v2,... with NAME one of {', '.join(DEFAULT_SPACE)}")
+    cast = type(DEFAULT_SPACE[name][0])
+    return name, [cast(v) for v in values.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Walk-forward parameter sweep of the strategy on stored klines.')
+    parser.add_argument('--store', default=os.getenv("KLINE_STORE_DIR", "data/klines"))
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--symbols', nargs='*', help='Defaults to every symbol in the store')
+    parser.add_argument('--days', type=int, help='Only use the most recent N days')
+    parser.add_argument('--space', help='JSON file of {parameter: [values]} replacing the default search space')
+    parser.add_argument('--param', type=parse_param, action='append', default=[], help='Override one parameter: NAME=v1,v2,...')
+    parser.add_argument('--random', type=int, help='Random search: evaluate this many sets instead of the full grid')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--train-days', type=int, default=14)
+    parser.add_argument('--test-days', type=int, default=7)
+    parser.add_argument('--folds', type=int, help='Only the most recent N folds')
+    parser.add_argument('--objective', choices=sorted(OBJECTIVES), default='pnl')
+    parser.add_argument('--min-trades', type=int, default=5, help='Fewest training trades a set needs to be selected')
+    parser.add_argument('--workers', type=int, help='Processes (default: all cores)')
+    parser.add_argument('--top', type=int, default=10, help='Parameter sets to list by mean training score')
+    parser.add_argument('--output', help='Write every (set, fold) result to this CSV')
+    parser.add_argument('--scan-every', type=int, help='Bars between scans (default: once a day)')
+    parser.add_argument('--quantity-usdt', type=float, default=float(os.getenv("QUANTITY_USDT", 1)))
+    parser.add_argument('--leverage', type=float, default=float(os.getenv("LEVERAGE", 20)))
+    parser.add_argument('--max-trades-per-day', type=int, default=int(os.getenv("MAX_TRADES_PER_DAY", 6)))
+    parser.add_argument('--fee-rate', type=float, default=0.0005)
+    args = parser.parse_args()
+
+    space = dict(DEFAULT_SPACE)
+    if args.space:
+        with open(args.space, encoding='utf-8') as f:
+            space.update(json.load(f))
+    space.update(dict(args.param))
+    parameter_sets = sample(space, args.random, args.seed) if args.random else list(grid(space))
+
+    bars_per_day = 86_400_000 // INTERVAL_MS[args.interval]
+    bars = args.days * bars_per_day if args.days else None
+    _, times, _ = align_klines(load_store(args.store, args.interval, args.symbols, bars))
+    folds = walk_forward_folds(len(times), bars_per_day, args.train_days, args.test_days, args.folds)
+    if not folds:
+        raise SystemExit(f"[OPTIMIZE] {len(times)} bars are too few for one {args.train_days}+{args.test_days} day fold")
+    print(f"[OPTIMIZE] {len(parameter_sets)} parameter sets x {len(folds)} folds on {args.store}")
+
+    started = time.perf_counter()
+    results = sweep(
+        args.store, args.interval, parameter_sets, folds, args.workers, args.symbols, bars,
+        quantity_usdt=args.quantity_usdt, leverage=args.leverage, max_trades_per_day=args.max_trades_per_day,
+        scan_every=args.scan_every, fee_rate=args.fee_rate,
+    )
+    print(f"[OPTIMIZE] {len(results)} backtests in {time.perf_counter() - started:.1f}s")
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"[OPTIMIZE] All results written to {args.output}")
+
+    # Only parameters that were actually searched are worth printing
+    searched = [name for name in space if len(space[name]) > 1]
+    best, results = select(results, args.objective, args.min_trades)
+    for row in best.itertuples():
+        (train_start, train_end), (test_start, test_end) = folds[row.fold]
+        params = ', '.join(f"{name}={getattr(row, name)}" for name in searched)
+        print(
+            f"[FOLD {row.fold}] train {day(times[train_start])}..{day(times[train_end - 1])}: "
+            f"{row.train_total_pnl:.2f} USDT ({row.train_trades} trades) | "
+            f"test {day(times[test_start])}..{day(times[test_end - 1])}: "
+            f"{row.test_total_pnl:.2f} USDT ({row.test_trades} trades, {row.test_win_rate:.1f}% wins) | {params}"
+        )
+    if best.empty:
+        print(f"[OPTIMIZE] No parameter set reached {args.min_trades} training trades in any fold.")
+    else:
+        test_trades = best['test_trades'].sum()
+        wins = best['test_wins'].sum()
+        print(
+            f"[WALK-FORWARD] Out-of-sample: {best['test_total_pnl'].sum():.2f} USDT over {test_trades} trades "
+            f"({wins / test_trades * 100 if test_trades else 0:.1f}% wins) in {len(best)} folds"
+        )
+
+    ranking = (results.groupby(list(space))
+               .agg(train_score=('train_score', 'mean'), test_pnl=('test_total_pnl', 'mean'), trades=('train_trades', 'mean'))
+               .sort_values('train_score', ascending=False)
+               .head(args.top))
+    print(f"[TOP] Mean {args.objective} across folds:")
+    for params, row in ranking.iterrows():
+        values = ', '.join(f"{name}={value}" for name, value in zip(space, params) if name in searched)
+        print(f"  {row.train_score:8.2f} train | {row.test_pnl:8.2f} USDT test | {row.trades:6.1f} trades | {values or 'defaults'}")
@@ -0,0 +1,66 @@
+import threading
+import time
+
+
+# ==== Per-Cycle Price Snapshot ====
+# Mark prices and 24h tickers for every symbol come from one bulk request each
+# and are served from a dict until they are older than `max_age` /
+# `ticker_max_age`. A lookup that needs fresher data than the snapshot holds
+# (e.g. the drift check right before an order) falls back to a single-symbol call.
+class PriceSnapshot:
+    def __init__(self, source, max_age=10, ticker_max_age=60):
+        self.source = source
+        self.max_age = max_age
+        self.ticker_max_age = ticker_max_age
+        self.lock = threading.Lock()
+        self.marks = {}
+        self.marks_at = 0
+        self.ticker_list = []
+        self.tickers_at = 0
+
+    def refresh_marks(self):
+        data = self.source.mark_price()
+        fetched_at = time.time()
+        with self.lock:
+            self.marks = {m['symbol']: (m, price_time(m, fetched_at)) for m in data}
+            self.marks_at = fetched_at
+        return self.marks
+
+    def refresh_tickers(self):
+        data = self.source.ticker_24hr_price_change()
+        with self.lock:
+            self.ticker_list = data
+            self.tickers_at = time.time()
+        return data
+
+    def tickers(self):
+        if time.time() - self.tickers_at > self.ticker_max_age:
+            return self.refresh_tickers()
+        return self.ticker_list
+
+    def mark_price(self, symbol, max_age=None):
+        now = time.time()
+        if max_age is None:
+            # Normal lookups: one bulk refresh serves every symbol
+            if now - self.marks_at > self.max_age:
+                self.refresh_marks()
+            max_age = self.max_age
+
+        with self.lock:
+            entry = self.marks.get(symbol)
+        if entry and time.time() - entry[1] <= max_age:
+            return entry[0]
+
+        # Freshness requires a direct read for this symbol only
+        mark = self.source.mark_price(symbol=symbol)
+        with self.lock:
+            self.marks[symbol] = (mark, time.time())
+        return mark
+
+
+def price_time(mark, fetched_at):
+    # A market feed's price is as old as its publish time, which the coordinator stamps on
+    # this host's clock. Exchange timestamps ('time') are ignored: any skew between the two
+    # clocks would age every price by the offset and send each lookup to REST
+    published = (mark.get('publishedAt') or 0) / 1000
+    return min(fetched_at, published) if published else fetched_at
@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+from binance.um_futures import UMFutures
+
+log = logging.getLogger(__name__)
+
+
+# ==== Adaptive Rate-Limit Governor ====
+# Tracks the request weight and order count Binance reports in the
+# X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-1M headers. Order requests always go
+# first: scanning requests wait while an order is in flight, slow down once
+# usage passes `scan_slowdown` of the limit and pause until the next minute at
+# `scan_ceiling`. A 429/418 response blocks everything until its Retry-After.
+ORDER = 'order'
+SCAN = 'scan'
+
+ORDER_PATHS = ('/fapi/v1/order', '/fapi/v1/batchOrders')
+
+
+def request_priority(url):
+    return ORDER if any(path in url for path in ORDER_PATHS) else SCAN
+
+
+class RateGovernor:
+    def __init__(self, weight_limit=2400, order_limit=1200, scan_slowdown=0.6, scan_ceiling=0.8,
+                 order_ceiling=0.95, max_scan_delay=1.0):
+        self.weight_limit = weight_limit
+        self.order_limit = order_limit
+        self.scan_slowdown = scan_slowdown
+        self.scan_ceiling = scan_ceiling
+        self.order_ceiling = order_ceiling
+        self.max_scan_delay = max_scan_delay
+
+        self.condition = threading.Condition()
+        self.used_weight = 0
+        self.order_count = 0
+        self.window = self._minute()
+        self.in_flight = 0
+        self.orders_active = 0
+        self.banned_until = 0
+        self.peak_weight = 0
+
+    def _minute(self):
+        return int(time.time() // 60)
+
+    def _roll_window(self):
+        # Binance counts weight per calendar minute
+        minute = self._minute()
+        if minute != self.window:
+            self.window = minute
+            self.used_weight = 0
+            self.order_count = 0
+
+    def _seconds_to_next_window(self):
+        return 60 - (time.time() % 60)
+
+    def _blocked_for(self, priority):
+        # Seconds to wait before `priority` may send, 0 to wait for in-flight orders, None to go
+        now = time.time()
+        if now < self.banned_until:
+            return self.banned_until - now
+        if priority == ORDER:
+            if self.order_count >= self.order_limit * self.order_ceiling or \
+                    self.used_weight >= self.weight_limit * self.order_ceiling:
+                return self._seconds_to_next_window()
+            return None
+        if self.orders_active:
+            return 0
+        if (self.used_weight + self.in_flight) >= self.weight_limit * self.scan_ceiling:
+            return self._seconds_to_next_window()
+        return None
+
+    def acquire(self, priority):
+        while True:
+            with self.condition:
+                self._roll_window()
+                wait = self._blocked_for(priority)
+                if wait is None:
+                    usage = (self.used_weight + self.in_flight) / self.weight_limit
+                    self.in_flight += 1
+                    if priority == ORDER:
+                        self.orders_active += 1
+                    break
+                if wait == 0:
+                    self.condition.wait(0.5)
+                    continue
+            log.warning(f"[RATE] Waiting {wait:.1f}s for the {priority} budget (weight {self.used_weight}/{self.weight_limit})")
+            time.sleep(wait)
+
+        if priority == SCAN and usage >= self.scan_slowdown:
+            # Back off proportionally as usage approaches the ceiling
+            time.sleep((usage - self.scan_slowdown) / (self.scan_ceiling - self.scan_slowdown) * self.max_scan_delay)
+
+    def release(self, priority):
+        with self.condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            if priority == ORDER:
+                self.orders_active = max(0, self.orders_active - 1)
+            self.condition.notify_all()
+
+    def observe(self, status_code, headers):
+        with self.condition:
+            self._roll_window()
+            for key, value in headers.items():
+                key = key.lower()
+                if key == 'x-mbx-used-weight-1m':
+                    self.used_weight = int(value)
+                    self.peak_weight = max(self.peak_weight, self.used_weight)
+                elif key == 'x-mbx-order-count-1m':
+                    self.order_count = int(value)
+
+            if status_code in (418, 429):
+                retry_after = float(headers.get('Retry-After', 60))
+                self.banned_until = max(self.banned_until, time.time() + retry_after)
+                log.warning(f"[RATE] Received HTTP {status_code}. Pausing requests for {retry_after:.0f}s")
+
+
+class GovernedUMFutures(UMFutures):
+    def __init__(self, key=None, secret=None, governor=None, metrics=None, **kwargs):
+        super().__init__(key=key, secret=secret, **kwargs)
+        self.governor = governor or RateGovernor()
+        self.metrics = metrics
+
+    def _dispatch_request(self, http_method):
+        send = super()._dispatch_request(http_method)
+
+        def governed(url, **kwargs):
+            priority = request_priority(url)
+            waited = time.perf_counter()
+            self.governor.acquire(priority)
+            started = time.perf_counter()
+            try:
+                response = send(url=url, **kwargs)
+            finally:
+                self.governor.release(priority)
+            self.governor.observe(response.status_code, response.headers)
+            if self.metrics:
+                endpoint = urlsplit(url).path
+                self.metrics.observe('binance_request_seconds', time.perf_counter() - started, endpoint=endpoint)
+                self.metrics.observe('binance_rate_wait_seconds', started - waited, priority=priority)
+                self.metrics.inc('binance_requests_total', endpoint=endpoint, status=response.status_code)
+            return response
+
+        return governed
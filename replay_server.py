@@ -0,0 +1,214 @@
+import argparse
+import base64
+import hashlib
+import json
+import socket
+import socketserver
+import struct
+import threading
+
+
+# ==== Local Websocket Replay Server ====
+# Plays back streams recorded with MarketStream(record_path=...) so the
+# streaming mode can be exercised offline. Every connection gets the full
+# recording with its original timing (scaled by `speed`); SUBSCRIBE and
+# UNSUBSCRIBE requests are acknowledged like the real server does.
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def load_recording(path):
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def encode_frame(payload, opcode=0x1):
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header += bytes([length])
+    elif length < 65536:
+        header += bytes([126]) + struct.pack('>H', length)
+    else:
+        header += bytes([127]) + struct.pack('>Q', length)
+    return header + payload
+
+
+def read_frame(rfile):
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None, None
+    opcode = head[0] & 0x0F
+    masked = head[1] & 0x80
+    length = head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack('>H', rfile.read(2))[0]
+    elif length == 127:
+        length = struct.unpack('>Q', rfile.read(8))[0]
+    mask = rfile.read(4) if masked else None
+    payload = rfile.read(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+class ReplayHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        if not self._handshake():
+            return
+
+        self.send_lock = threading.Lock()
+        self.closed = threading.Event()
+        self.streams = set()
+        self.server.register(self)
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        try:
+            self._replay()
+        finally:
+            self.server.unregister(self)
+
+    def _replay(self):
+        records = self.server.records
+        while not self.closed.is_set():
+            previous = records[0]['t'] if records else 0
+            for record in records:
+                delay = (record['t'] - previous) / self.server.speed
+                previous = record['t']
+                if delay > 0 and self.closed.wait(delay):
+                    return
+                if not self._send(record['data'].encode('utf-8')):
+                    return
+            if not self.server.loop:
+                break
+
+        # Recording finished: keep the connection open until the client leaves
+        self.closed.wait()
+
+    def _handshake(self):
+        request_line = self.rfile.readline()
+        if not request_line:
+            return False
+        headers = {}
+        while True:
+            line = self.rfile.readline().decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        key = headers.get('sec-websocket-key')
+        if not key:
+            self.wfile.write(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+            return False
+
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.wfile.write((
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept}\r\n\r\n'
+        ).encode())
+        return True
+
+    def subscribed(self, method, streams):
+        # Streams this client asked for; handlers that push live events send to these
+        if method == 'SUBSCRIBE':
+            self.streams.update(streams)
+        elif method == 'UNSUBSCRIBE':
+            self.streams.difference_update(streams)
+
+    def _send(self, payload, opcode=0x1):
+        try:
+            with self.send_lock:
+                self.wfile.write(encode_frame(payload, opcode))
+            return True
+        except OSError:
+            self.closed.set()
+            return False
+
+    def _read_loop(self):
+        try:
+            while not self.closed.is_set():
+                opcode, payload = read_frame(self.rfile)
+                if opcode is None or opcode == 0x8:
+                    self._send(b'', 0x8)
+                    break
+                if opcode == 0x9:
+                    self._send(payload, 0xA)
+                elif opcode == 0x1:
+                    message = json.loads(payload.decode('utf-8'))
+                    if message.get('method') in ('SUBSCRIBE', 'UNSUBSCRIBE', 'LIST_SUBSCRIPTIONS'):
+                        self._send(json.dumps({'result': None, 'id': message.get('id')}).encode('utf-8'))
+                        self.subscribed(message['method'], message.get('params') or [])
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.closed.set()
+
+
+class ReplayServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, records, host='127.0.0.1', port=0, speed=1.0, loop=False):
+        super().__init__((host, port), ReplayHandler)
+        self.records = records
+        self.speed = speed
+        self.loop = loop
+        self.thread = None
+        self.lock = threading.Lock()
+        self.connections = set()
+
+    def register(self, connection):
+        with self.lock:
+            self.connections.add(connection)
+
+    def unregister(self, connection):
+        with self.lock:
+            self.connections.discard(connection)
+
+    def drop_connections(self):
+        # Cut every client off without a close frame, like Binance's 24-hour disconnect
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            connection.closed.set()
+            try:
+                connection.request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"ws://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a recorded Binance futures websocket stream.')
+    parser.add_argument('recording', help='JSONL file written by MarketStream(record_path=...)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--speed', type=float, default=1.0, help='Playback speed multiplier')
+    parser.add_argument('--loop', action='store_true', help='Restart the recording when it ends')
+    args = parser.parse_args()
+
+    server = ReplayServer(load_recording(args.recording), args.host, args.port, args.speed, args.loop)
+    print(f"[REPLAY] Serving {args.recording} on {server.url} (set STREAM_URL to this address)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("[REPLAY] Stopped.")
@@ -0,0 +1,92 @@
+import heapq
+import math
+import strategy
+
+
+# ==== Scan Planner ====
+# Orders the filtered universe by a cheap pre-screen score computed from the
+# 24h ticker, so the symbols most likely to produce a tradable signal get their
+# klines fetched first. Once the scanner holds enough score-100 signals to fill
+# the remaining trade slots, only symbols ahead of them in volume order are
+# still fetched: signals are ranked by score and then volume order, so those
+# are the only ones that could still win a slot on a tie, and what gets traded
+# is what a full scan would trade. The pre-screen score only decides the order
+# of the queue; every signal still comes from the full strategy.
+#
+# Components, each scaled to 0..1 across the candidates:
+# - volume: log of the 24h USDT volume (liquid symbols fill cleanly)
+# - move: |24h change| inside the MIN/MAX_PRICE_CHANGE band (bigger moves push RSI to the extremes)
+# - extremity: distance of the last price from the middle of the 24h high/low range
+DEFAULT_WEIGHTS = {'volume': 0.4, 'move': 0.3, 'extremity': 0.3}
+
+
+def ticker_features(ticker):
+    last = float(ticker['lastPrice'])
+    high = float(ticker.get('highPrice') or last)
+    low = float(ticker.get('lowPrice') or last)
+    position = (last - low) / (high - low) if high > low else 0.5
+    return {
+        'volume': math.log10(max(float(ticker['volume']) * last, 1.0)),
+        'move': abs(float(ticker['priceChangePercent'])),
+        'extremity': abs(2 * position - 1),
+    }
+
+
+def prescreen_scores(tickers, symbols, weights=None):
+    # {symbol: score} for `symbols`, using the matching entries of `tickers`
+    weights = weights or DEFAULT_WEIGHTS
+    by_symbol = {t['symbol']: t for t in tickers}
+    features = {s: ticker_features(by_symbol[s]) for s in symbols if s in by_symbol}
+    if not features:
+        return {}
+
+    volumes = [f['volume'] for f in features.values()]
+    low_volume, high_volume = min(volumes), max(volumes)
+    band = strategy.MAX_PRICE_CHANGE - strategy.MIN_PRICE_CHANGE
+
+    scores = {}
+    for symbol, f in features.items():
+        volume = (f['volume'] - low_volume) / (high_volume - low_volume) if high_volume > low_volume else 1.0
+        move = min(max((f['move'] - strategy.MIN_PRICE_CHANGE) / band, 0.0), 1.0)
+        scores[symbol] = weights['volume'] * volume + weights['move'] * move + weights['extremity'] * f['extremity']
+    # Symbols without a ticker keep their place at the back of the queue
+    for symbol in symbols:
+        scores.setdefault(symbol, 0.0)
+    return scores
+
+
+class ScanQueue:
+    # Max-priority queue of symbols; ties keep the input order (volume order from get_usdt_pairs)
+    def __init__(self, scores, symbols):
+        self.order = {symbol: i for i, symbol in enumerate(symbols)}
+        self.heap = [(-scores.get(symbol, 0.0), i, symbol) for i, symbol in enumerate(symbols)]
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def pop_batch(self, size):
+        return [heapq.heappop(self.heap)[2] for _ in range(min(size, len(self.heap)))]
+
+    def settle(self, best, count):
+        # `best` are signals no unscanned symbol can outscore. Drops every queued symbol behind
+        # the first `count` of them in input order, since none of those can take their place;
+        # returns how many were dropped
+        ranks = sorted(self.order[symbol] for symbol in best)
+        if len(ranks) < count:
+            return 0
+        kept = [entry for entry in self.heap if entry[1] < ranks[count - 1]]
+        dropped = len(self.heap) - len(kept)
+        self.heap = kept
+        heapq.heapify(self.heap)
+        return dropped
+
+    def ranked(self, pairs):
+        # Signals in input order, the tie-break of the stable score sort that picks the trades
+        return sorted(pairs, key=lambda pair: self.order[pair['symbol']])
+
+
+def signal_target(trades_today, max_trades_per_day, top_n=6, spare=2):
+    # Score-100 signals whose places in the ranking must match a full scan's: the open slots and a few spares
+    slots = max(0, min(top_n, max_trades_per_day - trades_today))
+    return slots + spare if slots else 0
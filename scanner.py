@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ==== Request Weight Budget ====
+# Token bucket shared by every scanning thread. It refills continuously at
+# limit/period weight per second, so bursts are allowed up to `limit` and the
+# long-run rate never exceeds Binance's per-minute weight allowance.
+class WeightBudget:
+    def __init__(self, limit=1200, period=60):
+        self.capacity = float(limit)
+        self.tokens = float(limit)
+        self.rate = limit / period
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, weight=1):
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def available(self):
+        with self.lock:
+            self._refill()
+            return self.tokens
+
+
+def kline_weight(limit):
+    # Weight of GET /fapi/v1/klines depends on the requested limit
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+# ==== Concurrent Kline Scan ====
+def scan_klines(symbols, fetch, budget, limit=210, max_workers=10):
+    # Yields (symbol, df, error) in the same order as `symbols`, so callers see
+    # the volume ranking unchanged while requests run in the background.
+    weight = kline_weight(limit)
+
+    def task(symbol):
+        budget.acquire(weight)
+        return fetch(symbol)
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [pool.submit(task, symbol) for symbol in symbols]
+        for symbol, future in zip(symbols, futures):
+            try:
+                yield symbol, future.result(), None
+            except Exception as e:
+                yield symbol, None, e
+    finally:
+        # Stop queued requests if the caller stops consuming early
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,151 @@
+import numpy as np
+
+
+# ==== Strategy Rules ====
+# Pure versions of the rules main.py trades with, written with NumPy
+# operations so the same code runs on one value or on whole arrays of
+# bars/symbols (backtests, diagnostics). Directions are +1 for long, -1 for short.
+LONG = 1
+SHORT = -1
+
+# Daily universe filter used by get_usdt_pairs
+MIN_DAILY_VOLUME = 1_000_000
+MIN_PRICE_CHANGE = 1
+MAX_PRICE_CHANGE = 15
+
+# Higher-timeframe trend: indicator columns are suffixed with the interval, e.g. EMA20_1h
+HTF_INDICATORS = ['EMA20', 'EMA50']
+
+
+def signal_attempts(rsi_long=40, rsi_short=60, rsi_mid=50):
+    # (direction, notes, score, condition) in priority order
+    return [
+        (LONG, 'Perfect match for LONG', 100,
+         lambda i: (i['EMA20'] > i['EMA50']) & (i['RSI'] < rsi_long) & (i['MACD'] > i['Signal']) & (i['Hist'] > 0)),
+        (SHORT, 'Perfect match for SHORT', 100,
+         lambda i: (i['EMA20'] < i['EMA50']) & (i['RSI'] > rsi_short) & (i['MACD'] < i['Signal']) & (i['Hist'] < 0)),
+        (LONG, 'Close match for LONG', 80, lambda i: (i['EMA20'] > i['EMA50']) & (i['RSI'] < rsi_mid)),
+        (SHORT, 'Close match for SHORT', 80, lambda i: (i['EMA20'] < i['EMA50']) & (i['RSI'] > rsi_mid)),
+        (LONG, 'Ignoring MACD - LONG', 60, lambda i: (i['EMA20'] > i['EMA50']) & (i['RSI'] < rsi_mid)),
+        (SHORT, 'Ignoring MACD - SHORT', 60, lambda i: (i['EMA20'] < i['EMA50']) & (i['RSI'] > rsi_mid)),
+        (LONG, 'Ignoring RSI - LONG', 40, lambda i: i['EMA20'] > i['EMA50']),
+        (SHORT, 'Ignoring RSI - SHORT', 40, lambda i: i['EMA20'] < i['EMA50']),
+    ]
+
+
+def signal_notes(attempt, higher_timeframes=()):
+    # Notes string get_signal reports for a winning attempt number (1-based)
+    _, notes, _, _ = signal_attempts()[attempt - 1]
+    notes = f"[Attempt {attempt}] {notes} | Confirmed by EMA200"
+    if higher_timeframes:
+        notes += f" | {'/'.join(higher_timeframes)} trend not opposed"
+    return notes
+
+
+def higher_timeframe_veto(direction, ind, higher_timeframes):
+    # True where a higher timeframe's EMA20/EMA50 trend points against `direction`.
+    # A trend that is still unknown (NaN, too little history) never vetoes.
+    direction = np.asarray(direction)
+    veto = np.zeros(direction.shape, dtype=bool)
+    for interval in higher_timeframes:
+        fast = np.asarray(ind[f'EMA20_{interval}'])
+        slow = np.asarray(ind[f'EMA50_{interval}'])
+        veto |= ((direction == LONG) & (fast < slow)) | ((direction == SHORT) & (fast > slow))
+    return veto
+
+
+def evaluate_signals(ind, higher_timeframes=(), **thresholds):
+    # `ind` maps indicator names to equally shaped arrays. Returns direction,
+    # attempt number (1-based, 0 = none) and score per element. The first
+    # attempt whose condition holds and agrees with the EMA200 trend wins;
+    # it is dropped if a trend in `higher_timeframes` points the other way.
+    ema20 = np.asarray(ind['EMA20'])
+    direction = np.zeros(ema20.shape, dtype=np.int8)
+    attempt = np.zeros(ema20.shape, dtype=np.int8)
+    score = np.zeros(ema20.shape, dtype=np.int16)
+
+    trend = {
+        LONG: ema20 > np.asarray(ind['EMA200']),
+        SHORT: ema20 < np.asarray(ind['EMA200']),
+    }
+
+    attempts = signal_attempts(**thresholds)
+    # Walk from lowest to highest priority so earlier attempts overwrite later ones
+    for number in range(len(attempts), 0, -1):
+        side, _, points, condition = attempts[number - 1]
+        match = condition(ind) & trend[side]
+        direction = np.where(match, side, direction)
+        attempt = np.where(match, number, attempt)
+        score = np.where(match, points, score)
+
+    if higher_timeframes:
+        veto = higher_timeframe_veto(direction, ind, higher_timeframes)
+        direction = np.where(veto, 0, direction)
+        attempt = np.where(veto, 0, attempt)
+        score = np.where(veto, 0, score)
+    return direction, attempt, score
+
+
+class SignalTrace:
+    # Per-attempt evaluation of one bar; the text is only built when a log record is formatted
+    def __init__(self, latest, symbol=None, higher_timeframes=(), **thresholds):
+        self.latest = latest
+        self.symbol = symbol
+        self.higher_timeframes = higher_timeframes
+        self.thresholds = thresholds
+
+    def __str__(self):
+        latest = self.latest
+        lines = [
+            f"  → Indicators{f' {self.symbol}' if self.symbol else ''} | EMA20: {latest['EMA20']:.2f}, EMA50: {latest['EMA50']:.2f}, EMA200: {latest['EMA200']:.2f}, "
+            f"RSI: {latest['RSI']:.2f}, MACD: {latest['MACD']:.4f}, Signal: {latest['Signal']:.4f}, Hist: {latest['Hist']:.4f}"
+        ]
+        for i, (side, notes, _, condition) in enumerate(signal_attempts(**self.thresholds), start=1):
+            if not condition(latest):
+                lines.append(f"    [ATTEMPT {i}] [FAIL] {notes} not satisfied")
+                continue
+            aligned = latest['EMA20'] > latest['EMA200'] if side == LONG else latest['EMA20'] < latest['EMA200']
+            if aligned:
+                lines.append(f"    [ATTEMPT {i}] [MATCH] {notes} ✅ Confirmed by EMA200")
+                for interval in self.higher_timeframes:
+                    if higher_timeframe_veto(side, latest, [interval]):
+                        lines.append(f"    [HTF {interval}] [VETO] EMA20/EMA50 trend points the other way")
+                break
+            lines.append(f"    [ATTEMPT {i}] [SKIP] Direction valid but not aligned with EMA200 trend")
+        return "\n".join(lines)
+
+
+# ==== Trade Price Math ====
+def order_quantity(entry_price, leverage, usdt_amount):
+    return (usdt_amount * leverage) / entry_price
+
+
+def initial_sl_tp(direction, entry_price, qty, risk_per_trade, tp_usdt):
+    sl_price = entry_price - direction * (risk_per_trade / qty)
+    tp_price = entry_price + direction * (tp_usdt / qty)
+    return sl_price, tp_price
+
+
+def buffered_sl_tp(direction, entry_price, sl_price, tp_price, multiplier_down, multiplier_up, buffer_percentage=0.01):
+    # Clamp SL/TP inside the PERCENT_PRICE band and at least `buffer_percentage` away from entry
+    min_allowed_price = entry_price * multiplier_down
+    max_allowed_price = entry_price * multiplier_up
+    buffer = buffer_percentage * entry_price
+
+    long_sl = np.minimum(np.maximum(sl_price, min_allowed_price), entry_price - buffer)
+    long_tp = np.maximum(np.minimum(tp_price, max_allowed_price), entry_price + buffer)
+    short_sl = np.maximum(np.minimum(sl_price, max_allowed_price), entry_price + buffer)
+    short_tp = np.minimum(np.maximum(tp_price, min_allowed_price), entry_price - buffer)
+
+    is_long = np.asarray(direction) == LONG
+    return np.where(is_long, long_sl, short_sl), np.where(is_long, long_tp, short_tp)
+
+
+def validation_sl_tp(direction, entry_price, qty, risk_per_trade, tick_size):
+    # Maximum 1% loss and minimum 2% gain, rounded to the tick size
+    long_sl = np.maximum(entry_price * 0.99, entry_price - (risk_per_trade / qty))
+    short_sl = np.minimum(entry_price * 1.01, entry_price + (risk_per_trade / qty))
+    is_long = np.asarray(direction) == LONG
+    sl_price = np.where(is_long, long_sl, short_sl)
+    tp_price = np.where(is_long, entry_price * 1.02, entry_price * 0.98)
+    return np.round(sl_price / tick_size) * tick_size, np.round(tp_price / tick_size) * tick_size
@@ -0,0 +1,103 @@
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+# ==== Symbol Filter Index ====
+# One exchange_info() download, parsed into plain numbers and keyed by symbol.
+# Every lookup after that is a dict access until the TTL expires. `info` keeps
+# the download trimmed to the fields parsed here, for coordinator.py to publish.
+FILTER_FIELDS = {
+    'LOT_SIZE': ('stepSize', 'minQty'),
+    'PRICE_FILTER': ('tickSize',),
+    'MIN_NOTIONAL': ('notional',),
+    'PERCENT_PRICE': ('multiplierUp', 'multiplierDown'),
+}
+
+
+class SymbolFilters:
+    def __init__(self, client, ttl=3600):
+        self.client = client
+        self.ttl = ttl
+        self.symbols = {}
+        self.info = {'symbols': []}
+        self.loaded_at = 0
+
+    def is_stale(self):
+        return not self.symbols or (time.time() - self.loaded_at) >= self.ttl
+
+    def refresh(self, force=False):
+        if not force and not self.is_stale():
+            return self.symbols
+
+        info = self.client.exchange_info()
+        symbols = {}
+        for s in info['symbols']:
+            symbols[s['symbol']] = parse_symbol(s)
+
+        self.symbols = symbols
+        self.info = {'symbols': [trim_symbol(s) for s in info['symbols']]}
+        self.loaded_at = time.time()
+        log.info(f"[INFO] Loaded filters for {len(symbols)} symbols from exchange info.")
+        return symbols
+
+    def get(self, symbol):
+        return self.refresh().get(symbol)
+
+    def __contains__(self, symbol):
+        return symbol in self.refresh()
+
+    def items(self):
+        return self.refresh().items()
+
+
+def parse_symbol(s):
+    parsed = {
+        'symbol': s['symbol'],
+        'contract_type': s.get('contractType'),
+        'quote_asset': s.get('quoteAsset'),
+        'step_size': None,
+        'min_qty': None,
+        'qty_precision': None,
+        'tick_size': None,
+        'min_notional': None,
+        'multiplier_up': None,
+        'multiplier_down': None,
+    }
+
+    for f in s.get('filters', []):
+        filter_type = f['filterType']
+        if filter_type == 'LOT_SIZE':
+            step_size = float(f['stepSize'])
+            parsed['step_size'] = step_size
+            parsed['min_qty'] = float(f['minQty'])
+            parsed['qty_precision'] = step_precision(f['stepSize'])
+        elif filter_type == 'PRICE_FILTER':
+            parsed['tick_size'] = float(f['tickSize'])
+        elif filter_type == 'MIN_NOTIONAL':
+            parsed['min_notional'] = float(f['notional'])
+        elif filter_type == 'PERCENT_PRICE':
+            parsed['multiplier_up'] = float(f['multiplierUp'])
+            parsed['multiplier_down'] = float(f['multiplierDown'])
+
+    return parsed
+
+
+def trim_symbol(s):
+    # The exchange_info entry reduced to what parse_symbol reads
+    return {
+        'symbol': s['symbol'],
+        'contractType': s.get('contractType'),
+        'quoteAsset': s.get('quoteAsset'),
+        'filters': [
+            {'filterType': f['filterType'], **{key: f[key] for key in FILTER_FIELDS[f['filterType']]}}
+            for f in s.get('filters', []) if f['filterType'] in FILTER_FIELDS
+        ],
+    }
+
+
+def step_precision(step_size):
+    # Count decimals from the raw string so steps like 0.00001 don't turn into '1e-05'
+    decimals = step_size.split('.')[1].rstrip('0') if '.' in step_size else ''
+    return len(decimals)
@@ -0,0 +1,126 @@
+import logging
+import queue
+import threading
+import time
+import requests
+
+log = logging.getLogger(__name__)
+
+
+# ==== Telegram Notifier ====
+# send() only enqueues; a background worker posts over one keep-alive session.
+# Messages arriving within `batch_window` seconds of each other are joined into
+# one post up to Telegram's 4096 character limit. close() flushes what is queued.
+TELEGRAM_MAX_LENGTH = 4096
+
+
+class TelegramNotifier:
+    def __init__(self, token, chat_id, api_url='https://api.telegram.org', max_queue=200,
+                 batch_window=0.5, timeout=10):
+        self.url = f"{api_url}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.session = requests.Session()
+        self.stopping = threading.Event()
+        self.worker = threading.Thread(target=self._run, name='telegram-notifier', daemon=True)
+        self.worker.start()
+
+    def send(self, text):
+        try:
+            self.queue.put_nowait(text)
+        except queue.Full:
+            log.warning(f"Telegram error: queue full, dropping message: {text[:80]}")
+
+    def flush(self, timeout=None):
+        # Wait until every queued message has been posted (or dropped)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=30):
+        self.flush(timeout)
+        self.stopping.set()
+        self.worker.join(timeout=1)
+        self.session.close()
+
+    def _run(self):
+        while not self.stopping.is_set():
+            try:
+                first = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            for text in pack_messages(batch):
+                self._post(text)
+            for _ in batch:
+                self.queue.task_done()
+
+    def _post(self, text):
+        payload = {
+            "chat_id": self.chat_id,
+            "text": text,
+            "parse_mode": "HTML"
+        }
+        try:
+            response = self.session.post(self.url, data=payload, timeout=self.timeout)
+            response.raise_for_status()
+        except Exception as e:
+            log.error(f"Telegram error: {e}")
+
+
+def pack_messages(messages, limit=TELEGRAM_MAX_LENGTH, separator='\n\n'):
+    # Join messages into as few posts as possible; oversized messages are split
+    posts = []
+    current = ''
+    for message in messages:
+        for part in split_message(message, limit) or ['']:
+            if current and len(current) + len(separator) + len(part) <= limit:
+                current += separator + part
+            else:
+                if current:
+                    posts.append(current)
+                current = part
+    if current:
+        posts.append(current)
+    return posts
+
+
+def split_message(message, limit=TELEGRAM_MAX_LENGTH):
+    # Parts of at most `limit` characters, cut at the last newline that fits. A line
+    # longer than `limit` is cut hard, but never inside an HTML tag or entity, which
+    # Telegram would reject with parse_mode=HTML
+    parts = []
+    while len(message) > limit:
+        newline = message.rfind('\n', 0, limit + 1)
+        if newline > 0:
+            parts.append(message[:newline])
+            message = message[newline + 1:]
+            continue
+        cut = limit
+        for opener, closer in (('<', '>'), ('&', ';')):
+            start = message.rfind(opener, 0, cut)
+            if start > 0 and message.find(closer, start, cut) == -1:
+                cut = start
+        parts.append(message[:cut])
+        message = message[cut:]
+    if message or not parts:
+        parts.append(message)
+    return parts
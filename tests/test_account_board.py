@@ -0,0 +1,68 @@
+import threading
+import pytest
+from account_board import AccountBoard
+
+
+@pytest.fixture
+def boards(tmp_path):
+    # Three shards of one account, each with its own connection to the shared file
+    path = str(tmp_path / 'board.sqlite')
+    boards = [AccountBoard(path, shard, 3, feed='feed-1') for shard in range(3)]
+    yield boards
+    for board in boards:
+        board.close()
+
+
+def test_shards_never_exceed_the_account_cap_together(boards):
+    results = []
+
+    def take(board):
+        for _ in range(10):
+            results.append(board.reserve('2026-10-18', 6))
+    threads = [threading.Thread(target=take, args=(board,)) for board in boards]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 6
+    assert all(board.count('2026-10-18') == 6 for board in boards)
+    assert boards[0].count('2026-10-19') == 0
+
+
+def test_release_gives_a_rejected_trade_back(boards):
+    assert boards[0].reserve('2026-10-18', 1)
+    assert not boards[1].reserve('2026-10-18', 1)
+    boards[0].release('2026-10-18')
+    assert boards[1].reserve('2026-10-18', 1)
+
+
+def test_earlier_trades_raise_the_count(boards):
+    boards[0].raise_count('2026-10-18', 2)
+    boards[1].raise_count('2026-10-18', 1)
+    assert boards[2].count('2026-10-18') == 2
+
+
+def test_ranking_waits_for_every_shard_and_is_account_wide(boards):
+    boards[0].post(5, [('AAAUSDT', 100, 3), ('BBBUSDT', 80, 0)])
+    boards[1].post(5, [('CCCUSDT', 100, 1)])
+    assert not boards[0].wait(5, timeout=0.3, poll=0.05)
+
+    boards[2].post(5, [])  # A shard without signals still reports in
+    assert boards[0].wait(5, timeout=1, poll=0.05)
+    # Same score: the lower feed rank (higher volume) comes first
+    assert boards[1].top(5, limit=2) == [('CCCUSDT', 1), ('AAAUSDT', 0)]
+    assert boards[2].top(5) == boards[0].top(5)
+
+
+def test_reposting_replaces_a_shards_signals_and_old_runs_are_dropped(boards, tmp_path):
+    boards[0].post(5, [('AAAUSDT', 100, 0)])
+    boards[0].post(5, [('BBBUSDT', 90, 1)])
+    assert boards[0].top(5) == [('BBBUSDT', 0)]
+
+    # A restarted coordinator counts generations from 1 again under a new feed name
+    restarted = AccountBoard(str(tmp_path / 'board.sqlite'), 0, 3, feed='feed-2')
+    restarted.post(5, [('CCCUSDT', 70, 0)])
+    assert restarted.top(5) == [('CCCUSDT', 0)]
+    assert restarted.posted(5) == 1
+    restarted.close()
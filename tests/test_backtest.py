@@ -0,0 +1,153 @@
+import numpy as np
+import pytest
+import strategy
+from backtest import DAY_OFFSET_MS, find_exit, run_backtest, simulate, universe_mask
+
+BAR_MS = 300_000
+DAY = 288  # 5m bars
+
+
+def klines(close, open_=None, high=None, low=None, quote_volume=2_000_000 / DAY, first=0):
+    # Kline rows in the exchange's column order from per-bar prices
+    close = np.asarray(close, dtype=float)
+    open_ = close if open_ is None else np.asarray(open_, dtype=float)
+    high = np.maximum(open_, close) if high is None else np.asarray(high, dtype=float)
+    low = np.minimum(open_, close) if low is None else np.asarray(low, dtype=float)
+    times = (np.arange(len(close)) + first) * BAR_MS
+    volume = np.broadcast_to(np.asarray(quote_volume, dtype=float), close.shape)
+    return np.column_stack([times, open_, high, low, close, volume / close, times + BAR_MS - 1, volume])
+
+
+def signals(shape, entries):
+    # (direction, attempt, score) arrays with the given {(row, bar): (direction, score)}
+    direction = np.zeros(shape, dtype=np.int8)
+    attempt = np.zeros(shape, dtype=np.int8)
+    score = np.zeros(shape, dtype=np.int16)
+    for (row, bar), (side, points) in entries.items():
+        direction[row, bar], attempt[row, bar], score[row, bar] = side, 1, points
+    return direction, attempt, score
+
+
+def aligned(rows, bars):
+    # Flat 10 USDT prices for `rows` symbols; tests cut into high/low where they need a hit
+    data = {name: np.full((rows, bars), 10.0) for name in ('open', 'high', 'low', 'close')}
+    data['quote_volume'] = np.full((rows, bars), 1.0)
+    return data
+
+
+# ==== find_exit ====
+def test_long_exit_finds_the_first_touch():
+    high = np.array([10.1, 10.2, 11.0, 12.0])
+    low = np.array([9.9, 9.8, 9.7, 9.0])
+    assert find_exit(high, low, 0, strategy.LONG, 9.5, 10.9) == (2, 'TP')
+    assert find_exit(high, low, 0, strategy.LONG, 9.75, 12.5) == (2, 'SL')
+
+
+def test_short_exit_mirrors_the_long_one():
+    high = np.array([10.1, 10.6, 10.2])
+    low = np.array([9.9, 9.7, 9.0])
+    assert find_exit(high, low, 0, strategy.SHORT, 10.5, 9.1) == (1, 'SL')
+    assert find_exit(high, low, 0, strategy.SHORT, 11.0, 9.1) == (2, 'TP')
+
+
+def test_a_bar_touching_both_fills_the_stop():
+    high, low = np.array([11.0]), np.array([9.0])
+    assert find_exit(high, low, 0, strategy.LONG, 9.5, 10.5) == (0, 'SL')
+    assert find_exit(high, low, 0, strategy.SHORT, 10.5, 9.5) == (0, 'SL')
+
+
+def test_exit_search_crosses_chunks_and_reports_open():
+    high = np.full(5000, 10.0)
+    low = np.full(5000, 10.0)
+    high[4321] = 11.0
+    assert find_exit(high, low, 3, strategy.LONG, 9.0, 10.5, chunk=16) == (4321, 'TP')
+    assert find_exit(high, low, 4322, strategy.LONG, 9.0, 10.5, chunk=16) == (None, 'OPEN')
+    assert find_exit(high, low, 5000, strategy.LONG, 9.0, 10.5) == (None, 'OPEN')
+
+
+# ==== universe_mask ====
+def test_universe_needs_a_full_day_of_volume_and_a_moderate_move():
+    bars = 3 * DAY
+    close = np.full((4, bars), 10.0)
+    close[:, DAY:] = [[10.5], [10.05], [13.0], [10.5]]  # +5%, +0.5%, +30%, +5%
+    volume = np.full((4, bars), 2 * strategy.MIN_DAILY_VOLUME / DAY)
+    volume[3] = strategy.MIN_DAILY_VOLUME / DAY / 2  # Half the required 24h volume
+
+    mask = universe_mask(close, volume, DAY)
+    assert not mask[:, :DAY].any()  # No 24h change before a day of history
+    assert mask[0, DAY:2 * DAY].all() and not mask[0, 2 * DAY:].any()  # The move drops out of the window
+    assert not mask[1:].any()
+
+
+def test_universe_ignores_missing_bars_in_the_volume_sum():
+    close = np.full((1, 2 * DAY), 10.0)
+    close[0, DAY:] = 10.5
+    volume = np.full((1, 2 * DAY), 2 * strategy.MIN_DAILY_VOLUME / DAY)
+    volume[0, DAY + 10] = np.nan
+    assert universe_mask(close, volume, DAY)[0, DAY + 11]
+
+
+# ==== simulate / run_backtest ====
+def test_trades_fill_by_the_live_rules():
+    bars = 50
+    data = aligned(3, bars)
+    data['low'][0, 20] = 9.0   # Long stop hit
+    data['high'][1, 30] = 11.0  # Short stop hit
+    data['open'][1, 30] = 10.8  # The market opens through it
+    data['high'][2, 12] = 10.5  # Long take profit hit
+    universe = np.ones((3, bars), dtype=bool)
+
+    trades, summary = simulate(
+        ['AAAUSDT', 'BBBUSDT', 'CCCUSDT'], np.arange(bars) * BAR_MS, data,
+        signals((3, bars), {(0, 5): (strategy.LONG, 3), (1, 5): (strategy.SHORT, 5), (2, 5): (strategy.LONG, 4)}),
+        scan_every=5, universe=universe, fee_rate=0, risk_per_trade=0.5, tp_usdt=0.5, quantity_usdt=1, leverage=20,
+    )
+    trades = trades.set_index('symbol')
+    assert list(trades.index) == ['BBBUSDT', 'CCCUSDT', 'AAAUSDT']  # Highest score first
+
+    # qty = 1 * 20 / 10 = 2; SL/TP = 0.5 / 2 = 0.25 away, outside the 1% buffer
+    assert trades.loc['AAAUSDT', ['sl', 'tp', 'qty', 'reason', 'exit']].tolist() == [9.75, 10.25, 2, 'SL', 9.75]
+    assert trades.loc['CCCUSDT', ['reason', 'exit']].tolist() == ['TP', 10.25]
+    assert trades.loc['BBBUSDT', ['sl', 'reason', 'exit']].tolist() == [10.25, 'SL', 10.8]
+    assert trades.loc['BBBUSDT', 'pnl'] == pytest.approx(-1.6)
+    assert summary['trades'] == 3 and summary['wins'] == 1
+    assert summary['total_pnl'] == pytest.approx(-0.5 + 0.5 - 1.6)
+
+
+def test_daily_cap_and_one_trade_per_symbol_a_day():
+    bars = 2 * DAY
+    data = aligned(3, bars)
+    entries = {(row, bar): (strategy.LONG, 1) for row in range(3) for bar in (0, 100, DAY)}
+    trades, _ = simulate(
+        ['AAAUSDT', 'BBBUSDT', 'CCCUSDT'], np.arange(bars) * BAR_MS - DAY_OFFSET_MS, data,
+        signals((3, bars), entries), scan_every=100, universe=np.ones((3, bars), dtype=bool), max_trades_per_day=2,
+    )
+    # Positions stay open (flat prices), so each symbol trades once; the cap lets two in on day one
+    assert trades['symbol'].tolist() == ['AAAUSDT', 'BBBUSDT']
+    assert (trades['reason'] == 'OPEN').all()
+
+
+def test_run_backtest_end_to_end():
+    rng = np.random.default_rng(7)
+    history = {
+        f"S{i}USDT": klines(10 * np.exp(np.cumsum(rng.normal(0, 0.006, 4 * DAY))), quote_volume=10_000)
+        for i in range(4)
+    }
+    history['NEWUSDT'] = klines(np.full(DAY, 5.0), first=3 * DAY)  # Listed on the last day
+
+    trades, summary = run_backtest(history, scan_every=12, fee_rate=0.0005)
+    assert summary['trades'] == len(trades) > 0
+    assert summary['total_pnl'] == pytest.approx(trades['pnl'].sum())
+    assert set(trades['symbol']) <= set(history) - {'NEWUSDT'}  # Flat, so never in the universe
+    assert (trades.groupby((trades['entry_time'] + DAY_OFFSET_MS) // 86_400_000)['symbol'].count() <= 6).all()
+
+    take = trades[trades['reason'] == 'TP']
+    assert (take['exit'] == take['tp']).all()
+    stops = trades[trades['reason'] == 'SL']
+    long_stops = stops['signal'] == 'long'
+    assert (stops['exit'][long_stops] <= stops['sl'][long_stops]).all()
+    assert (stops['exit'][~long_stops] >= stops['sl'][~long_stops]).all()
+
+    # Whole-history indicators are still available, and differ only through EMA seeding
+    _, whole = run_backtest(history, scan_every=12, fee_rate=0.0005, lookback=None)
+    assert whole['trades'] > 0
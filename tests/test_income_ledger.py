@@ -0,0 +1,93 @@
+import calendar
+import pytest
+import income_ledger
+from income_ledger import IncomeLedger
+
+HOUR_MS = 3_600_000
+
+
+def record(tran_id, at, income, symbol='AAAUSDT', income_type='REALIZED_PNL'):
+    return {'tranId': tran_id, 'incomeType': income_type, 'symbol': symbol, 'asset': 'USDT',
+            'income': str(income), 'time': at, 'tradeId': str(tran_id), 'info': ''}
+
+
+class Client:
+    # Serves /fapi/v1/income like Binance: oldest first, startTime <= time <= endTime, at most `limit`
+    def __init__(self, records):
+        self.records = records
+        self.requests = []
+
+    def get_income_history(self, incomeType, startTime, endTime, limit, recvWindow=None):
+        self.requests.append((startTime, endTime))
+        matching = [r for r in self.records if r['incomeType'] == incomeType and startTime <= r['time'] <= endTime]
+        return sorted(matching, key=lambda r: (r['time'], r['tranId']))[:limit]
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    monkeypatch.setattr(income_ledger, 'PAGE_LIMIT', 5)
+    ledger = IncomeLedger()
+    yield ledger
+    ledger.close()
+
+
+def test_sync_pages_through_a_busy_day(ledger):
+    now = 100 * HOUR_MS
+    # 23 records, several sharing a millisecond across page boundaries
+    times = [now - 50 * HOUR_MS + step // 3 * 1000 for step in range(23)]
+    client = Client([record(i, at, 1) for i, at in enumerate(times)] + [record(99, now - 200 * HOUR_MS, 5)])
+
+    assert ledger.sync(client, end_time=now) == 23
+    assert len(client.requests) > 23 // 5
+    assert client.requests[0] == (now - income_ledger.INITIAL_LOOKBACK_MS, now)
+    assert [cursor for cursor, _ in client.requests] == sorted(cursor for cursor, _ in client.requests)
+    assert len(ledger.records(0, now + 1)) == 23  # The record older than the lookback is not fetched
+
+
+def test_later_syncs_start_at_the_newest_stored_record(ledger):
+    now = 100 * HOUR_MS
+    client = Client([record(i, now - 10 * HOUR_MS + i * 1000, 1) for i in range(3)])
+    ledger.sync(client, end_time=now)
+
+    client.records.append(record(10, now + HOUR_MS, 2))
+    client.requests.clear()
+    assert ledger.sync(client, end_time=now + 2 * HOUR_MS) == 1
+    assert client.requests == [(now - 10 * HOUR_MS + 2000, now + 2 * HOUR_MS)]
+    assert ledger.sync(client, end_time=now + 2 * HOUR_MS) == 0
+
+
+def test_a_full_page_inside_one_millisecond_still_advances(ledger):
+    now = 100 * HOUR_MS
+    client = Client([record(i, now - HOUR_MS, 1) for i in range(5)] + [record(7, now - 10, 1)])
+    assert ledger.sync(client, end_time=now) == 6
+    assert [cursor for cursor, _ in client.requests][1:] == [now - HOUR_MS, now - HOUR_MS + 1]
+
+
+def test_pnl_aggregates_are_local_queries(ledger):
+    # 16:00 and 18:00 UTC on 2026-10-18 fall on different UTC+7 trading days
+    before = calendar.timegm((2026, 10, 18, 16, 0, 0, 0, 0, 0)) * 1000
+    after = before + 2 * HOUR_MS
+    ledger.insert([
+        record(1, before, 3.0, 'AAAUSDT'),
+        record(2, after, -1.0, 'AAAUSDT'),
+        record(3, after, 4.0, 'BBBUSDT'),
+        record(4, after, 0.5, 'BBBUSDT', income_type='FUNDING_FEE'),
+    ])
+    ledger.tag('AAAUSDT', '[Attempt 1]', at=before - 1)
+    ledger.tag('AAAUSDT', '[Attempt 3]', at=after - 1)
+
+    assert [tuple(row) for row in ledger.daily_pnl()] == [('2026-10-18', 3.0, 1), ('2026-10-19', 3.0, 2)]
+    assert [tuple(row) for row in ledger.pnl_by_symbol()] == [('BBBUSDT', 4.0, 1), ('AAAUSDT', 2.0, 2)]
+    assert {row[0]: row[1] for row in ledger.pnl_by_strategy()} == {'untagged': 4.0, '[Attempt 1]': 3.0, '[Attempt 3]': -1.0}
+    assert ledger.insert([record(1, before, 3.0, 'AAAUSDT')]) == 0  # Already stored
+
+
+def test_records_persist_in_the_sqlite_file(tmp_path):
+    path = str(tmp_path / 'ledger' / 'income.sqlite')
+    ledger = IncomeLedger(path)
+    ledger.insert([record(1, 5000, 2.0)])
+    ledger.close()
+
+    reopened = IncomeLedger(path)
+    assert reopened.last_time() == 5000
+    reopened.close()
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import IndicatorBook, INDICATOR_NAMES, compute_indicators, rolling_indicators
+
+BAR_MS = 300_000
+FRAME = 210  # Rows of a live scan frame, the forming candle included
+
+
+def random_walk(bars, seed, start=100.0):
+    steps = np.random.default_rng(seed).normal(0, 0.01, bars)
+    return start * np.exp(np.cumsum(steps))
+
+
+def frame(closes, first, length=FRAME, forming=None):
+    # Rows first..first+length of a kline history; the last row is the forming candle
+    c = closes[first:first + length].copy()
+    if forming is not None:
+        c[-1] = forming
+    return {'c': c, 'close_time': (np.arange(first, first + length, dtype=np.int64) + 1) * BAR_MS - 1}
+
+
+def assert_matches_batch(df, rows=(-2, -1)):
+    expected = compute_indicators(df['c'])
+    for name in INDICATOR_NAMES:
+        for row in rows:
+            np.testing.assert_allclose(df[name][row], expected[name][0][row], rtol=1e-9, atol=1e-9, err_msg=f"{name}[{row}]")
+
+
+def ta_indicators(close):
+    # The reference implementation the engine replaced, on one series
+    trend = pytest.importorskip('ta.trend')
+    momentum = pytest.importorskip('ta.momentum')
+    series = pd.Series(close)
+    macd = trend.MACD(series, window_slow=26, window_fast=12, window_sign=9)
+    return {
+        'EMA20': trend.EMAIndicator(series, 20).ema_indicator(),
+        'EMA50': trend.EMAIndicator(series, 50).ema_indicator(),
+        'EMA200': trend.EMAIndicator(series, 200).ema_indicator(),
+        'RSI': momentum.RSIIndicator(series, 14).rsi(),
+        'MACD': macd.macd(),
+        'Signal': macd.macd_signal(),
+        'Hist': macd.macd_diff(),
+    }
+
+
+@pytest.fixture
+def history():
+    return {symbol: random_walk(600, seed) for seed, symbol in enumerate(['AAAUSDT', 'BBBUSDT', 'CCCUSDT'])}
+
+
+def test_warm_frames_match_a_recompute_of_the_same_frame(history):
+    book = IndicatorBook(capacity=2)
+    assert book.sync({symbol: frame(closes, 0) for symbol, closes in history.items()}) == set()
+
+    for first in range(1, 300):
+        frames = {symbol: frame(closes, first) for symbol, closes in history.items()}
+        assert book.sync(frames) == set(history)
+        for df in frames.values():
+            assert_matches_batch(df)
+            assert np.isnan(df['EMA20'][:-2]).all()
+
+
+def test_forming_candle_updates_leave_the_closed_bars_alone(history):
+    closes = history['AAAUSDT']
+    book = IndicatorBook()
+    book.sync({'AAAUSDT': frame(closes, 0)})
+
+    for forming in (90.0, 120.0, closes[FRAME]):
+        df = frame(closes, 1, forming=forming)
+        assert book.sync({'AAAUSDT': df}) == {'AAAUSDT'}
+        assert_matches_batch(df)
+
+    # The next bar closes at its real price, whatever the forming candle showed before
+    df = frame(closes, 2)
+    book.sync({'AAAUSDT': df})
+    assert_matches_batch(df)
+
+
+def test_missed_bars_and_uneven_frames_are_caught_up(history):
+    book = IndicatorBook()
+    book.sync({'AAAUSDT': frame(history['AAAUSDT'], 0), 'BBBUSDT': frame(history['BBBUSDT'], 0, length=60)})
+
+    frames = {'AAAUSDT': frame(history['AAAUSDT'], 7), 'BBBUSDT': frame(history['BBBUSDT'], 3, length=60)}
+    assert book.sync(frames) == {'AAAUSDT', 'BBBUSDT'}
+    for df in frames.values():
+        assert_matches_batch(df)
+
+
+def test_short_frames_leave_undefined_indicators_nan(history):
+    book = IndicatorBook()
+    book.sync({'AAAUSDT': frame(history['AAAUSDT'], 0, length=30)})
+    df = frame(history['AAAUSDT'], 1, length=30)
+    book.sync({'AAAUSDT': df})
+    assert np.isnan(df['EMA50'][-1]) and np.isnan(df['EMA200'][-1]) and np.isnan(df['Signal'][-1])
+    assert_matches_batch(df)
+
+
+def test_frames_the_state_does_not_cover_are_reseeded(history):
+    closes = history['AAAUSDT']
+    book = IndicatorBook(history=100)
+    book.sync({'AAAUSDT': frame(closes, 50, length=80)})
+
+    # Reaches back before the first seeded bar
+    assert book.sync({'AAAUSDT': frame(closes, 40, length=92)}) == set()
+    # Longer than the recorded history
+    assert book.sync({'AAAUSDT': frame(closes, 1)}) == set()
+    # No overlap with the last committed bar
+    assert book.sync({'AAAUSDT': frame(closes, 400, length=80)}) == set()
+
+    df = frame(closes, 401, length=80)
+    assert book.sync({'AAAUSDT': df}) == {'AAAUSDT'}
+    assert_matches_batch(df)
+
+
+def test_dropped_rows_are_reused_without_stale_history(history):
+    book = IndicatorBook(capacity=1)
+    book.sync({'AAAUSDT': frame(history['AAAUSDT'], 0)})
+    book.drop('AAAUSDT')
+    book.sync({'BBBUSDT': frame(history['BBBUSDT'], 100, length=50)})
+
+    # The same close times as AAAUSDT's recorded bars must not let BBBUSDT reach back into them
+    assert book.sync({'BBBUSDT': frame(history['BBBUSDT'], 50, length=120)}) == set()
+
+
+@pytest.mark.parametrize('gaps', [[], [0, 1, 2, 3], [40, 41, 42, 150], [120, 299, 300, 301], [0, 1, 396, 397, 398, 399]])
+def test_batch_engine_matches_ta(gaps):
+    closes = np.vstack([random_walk(400, seed) for seed in range(4)])
+    closes[:, gaps] = np.nan
+    values = compute_indicators(closes)
+    for row, close in enumerate(closes):
+        for name, expected in ta_indicators(close).items():
+            np.testing.assert_allclose(values[name][row], expected.to_numpy(float), rtol=1e-9, atol=1e-9, err_msg=name)
+
+
+def test_constant_series_has_rsi_100_like_ta():
+    # No losses at all: avg_down == 0 everywhere
+    close = np.full(300, 5.0)
+    values = compute_indicators(close)
+    for name, expected in ta_indicators(close).items():
+        np.testing.assert_allclose(values[name][0], expected.to_numpy(float), rtol=1e-9, atol=1e-9, err_msg=name)
+    assert (values['RSI'][0][13:] == 100.0).all()
+
+
+def test_rolling_indicators_match_a_recompute_of_each_window():
+    closes = np.vstack([random_walk(500, seed) for seed in range(3)])
+    closes[1, :60] = np.nan  # Listed later: its first windows are shorter
+    closes[2, 300] = np.nan  # A missing bar
+    values = rolling_indicators(closes, FRAME, cells=400)  # Also runs in blocks of one symbol
+
+    for row in range(3):
+        for end in (10, 59, 100, 209, 250, 299, 300, 420, 499):
+            window = closes[row, max(0, end - FRAME + 1):end + 1]
+            window = window[np.argmax(~np.isnan(window)):]  # From the listing, as the exchange returns it
+            gapped = np.isnan(window).any()
+            expected = compute_indicators(window)
+            for name in INDICATOR_NAMES:
+                value = values[name][row, end]
+                if gapped:
+                    assert np.isnan(value), f"{name} row {row} bar {end}"
+                else:
+                    np.testing.assert_allclose(value, expected[name][0][-1], rtol=1e-9, atol=1e-9,
+                                               err_msg=f"{name} row {row} bar {end}")
@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from kline_store import INTERVAL_MS, KLINE_COLUMNS, KlineStore, higher_timeframe_klines, resample_klines
+
+BAR_MS = 300_000
+DAY_MS = 86_400_000
+
+
+def rows(first, count, step=BAR_MS):
+    # Closed klines opening at `first`, `first + step`, ...; the close is the bar's index
+    out = np.zeros((count, KLINE_COLUMNS))
+    out[:, 0] = first + np.arange(count) * step
+    out[:, 4] = np.arange(count)
+    out[:, 6] = out[:, 0] + step - 1
+    return out
+
+
+def candles(first, count, step=BAR_MS, seed=0):
+    # Random-walk klines with every column the exchange sends filled in
+    rng = np.random.default_rng(seed)
+    close = 10 + np.cumsum(rng.normal(0, 0.05, count))
+    open_ = np.r_[10, close[:-1]]
+    out = np.zeros((count, KLINE_COLUMNS))
+    out[:, 0] = first + np.arange(count) * step
+    out[:, 1] = open_
+    out[:, 2] = np.maximum(open_, close) + rng.random(count) * 0.05
+    out[:, 3] = np.minimum(open_, close) - rng.random(count) * 0.05
+    out[:, 4] = close
+    out[:, 5] = rng.random(count) * 100
+    out[:, 6] = out[:, 0] + step - 1
+    out[:, 7] = out[:, 5] * close
+    out[:, 8] = rng.integers(1, 50, count)
+    out[:, 9] = out[:, 5] / 2
+    out[:, 10] = out[:, 7] / 2
+    return out
+
+
+class Market:
+    # Serves `interval` candles up to the one forming at `now`; records every request
+    def __init__(self, now):
+        self.now = now
+        self.requests = []
+
+    def klines(self, symbol, interval, limit, startTime=None):
+        self.requests.append((symbol, interval, limit))
+        step = INTERVAL_MS[interval]
+        last = self.now // step * step
+        first = max(startTime or 0, last - (limit - 1) * step)
+        return candles(first, (last - first) // step + 1, step).tolist()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return KlineStore(str(tmp_path / 'klines'))
+
+
+def test_prune_keeps_the_retention_window(store):
+    now = 40 * DAY_MS
+    store.append('AAAUSDT', '5m', rows(now - 35 * DAY_MS, 35 * 288))
+    store.append('AAAUSDT', '4h', rows(now - 35 * DAY_MS, 35 * 6, step=4 * 3_600_000))
+
+    removed = store.prune(30 * DAY_MS, now_ms=now)
+    kept = store.read('AAAUSDT', '5m')
+    assert removed == 5 * 288 + 5 * 6
+    assert len(kept) == 30 * 288 and kept[0, 0] == now - 30 * DAY_MS
+    assert kept[-1, 4] == 35 * 288 - 1  # The newest candles are untouched
+    assert len(store.read('AAAUSDT', '4h')) == 30 * 6
+
+
+def test_prune_removes_files_with_nothing_left(store):
+    now = 40 * DAY_MS
+    store.append('OLDUSDT', '5m', rows(0, 288))  # Delisted long ago
+    store.append('NEWUSDT', '5m', rows(now - DAY_MS, 288))
+
+    assert store.prune(30 * DAY_MS, now_ms=now) == 288
+    assert not os.path.exists(store.path('OLDUSDT', '5m'))
+    assert len(store.read('NEWUSDT', '5m')) == 288
+    assert store.prune(30 * DAY_MS, now_ms=now) == 0
+
+
+def test_appends_continue_after_a_prune(store):
+    now = 40 * DAY_MS
+    store.append('AAAUSDT', '5m', rows(now - 31 * DAY_MS, 31 * 288))
+    store.prune(30 * DAY_MS, now_ms=now)
+    assert store.append('AAAUSDT', '5m', rows(now, 3)) == 3
+    assert store.last_open_time('AAAUSDT', '5m') == now + 2 * BAR_MS
+    assert np.all(np.diff(store.read('AAAUSDT', '5m')[:, 0]) == BAR_MS)
+
+
+# ==== Higher Timeframes ====
+@pytest.mark.parametrize('interval', ['15m', '1h', '4h'])
+def test_resampled_candles_match_a_pandas_resample(interval):
+    base = candles(DAY_MS + 25 * BAR_MS, 3 * 288)  # Starts and ends mid-bucket
+    out = resample_klines(base, '5m', interval)
+
+    frame = pd.DataFrame(base[:, [1, 2, 3, 4, 5, 7, 8, 9, 10]], index=pd.to_datetime(base[:, 0], unit='ms'),
+                         columns=['open', 'high', 'low', 'close', 'volume', 'quote', 'trades', 'taker', 'taker_quote'])
+    rule = {'15m': '15min', '1h': '1h', '4h': '4h'}[interval]
+    expected = frame.resample(rule).agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum',
+                                         'quote': 'sum', 'trades': 'sum', 'taker': 'sum', 'taker_quote': 'sum'})
+    complete = frame['open'].resample(rule).count() == INTERVAL_MS[interval] // BAR_MS
+    expected = expected[complete]
+
+    assert len(out) == len(expected) > 0
+    np.testing.assert_array_equal(out[:, 0], (expected.index - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1))
+    np.testing.assert_allclose(out[:, [1, 2, 3, 4, 5, 7, 8, 9, 10]], expected.to_numpy())
+    np.testing.assert_array_equal(out[:, 6], out[:, 0] + INTERVAL_MS[interval] - 1)
+
+
+def test_resampling_drops_buckets_with_a_missing_bar():
+    base = np.delete(candles(0, 36), 15, axis=0)  # One bar missing from the second hour
+    out = resample_klines(base, '5m', '1h')
+    assert out[:, 0].tolist() == [0, 2 * 3_600_000]
+    assert len(resample_klines(np.empty((0, KLINE_COLUMNS)), '5m', '1h')) == 0
+
+
+def test_higher_timeframes_come_from_stored_base_candles(store):
+    now = 10 * DAY_MS + 7 * BAR_MS
+    store.append('AAAUSDT', '5m', candles(now // BAR_MS * BAR_MS - 2 * DAY_MS, 2 * 288))
+    market = Market(now)
+
+    trend = higher_timeframe_klines(store, market, 'AAAUSDT', '5m', '1h', limit=30, now_ms=now)
+    assert market.requests == []
+    assert len(trend) == 30 and trend[-1, 6] < now
+    assert trend[-1, 0] == now // 3_600_000 * 3_600_000 - 3_600_000  # The newest closed hour
+
+
+def test_short_history_downloads_the_interval_once_per_candle(store):
+    now = 10 * DAY_MS + 7 * BAR_MS
+    store.append('AAAUSDT', '5m', candles(now // BAR_MS * BAR_MS - 288, 288))
+    market = Market(now)
+
+    trend = higher_timeframe_klines(store, market, 'AAAUSDT', '5m', '4h', limit=30, now_ms=now)
+    assert market.requests == [('AAAUSDT', '4h', 31)]
+    assert len(trend) == 30 and trend[-1, 6] < now
+    higher_timeframe_klines(store, market, 'AAAUSDT', '5m', '4h', limit=30, now_ms=now + BAR_MS)
+    assert len(market.requests) == 1  # Reused until the next 4h candle closes
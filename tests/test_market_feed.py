@@ -0,0 +1,115 @@
+import threading
+import time
+import numpy as np
+import pytest
+from market_feed import MarketFeed, FeedReader, INDICATOR_NAMES, TICKER_FIELDS, ACTIVE, PUBLISHED_AT, SEQUENCE, SLOT_FIELDS
+from price_snapshot import PriceSnapshot
+from symbol_filters import SymbolFilters
+
+
+def cycle(value, symbols=('AAAUSDT', 'BBBUSDT'), bars=4):
+    # One publishable cycle where every number equals `value`
+    n = len(symbols)
+    full = np.full((n, bars), float(value))
+    return (
+        list(symbols), full, np.full((n, bars), value, dtype=np.int64), {name: full for name in INDICATOR_NAMES},
+        np.full((n, len(TICKER_FIELDS)), float(value)), np.full(n, float(value)),
+    )
+
+
+@pytest.fixture
+def feed():
+    feed = MarketFeed(capacity=4, bars=4)
+    yield feed
+    feed.close()
+
+
+def test_frames_keep_their_cycle_after_later_publishes(feed):
+    reader = FeedReader(feed.name)
+    feed.publish(*cycle(1))
+    frame = reader.frame('AAAUSDT')
+
+    feed.publish(*cycle(2))
+    feed.publish(*cycle(3))  # Rewrites the slot the first cycle was read from
+    assert frame['c'].tolist() == [1.0] * 4
+    assert frame['EMA20'].tolist() == [1.0] * 4
+    assert reader.frame('AAAUSDT')['c'].tolist() == [3.0] * 4
+    reader.close()
+
+
+def test_reader_waits_out_a_publish_in_progress(feed):
+    reader = FeedReader(feed.name)
+    feed.publish(*cycle(1))
+    slot = int(feed.header[ACTIVE])
+    feed.header[SEQUENCE + slot * SLOT_FIELDS] += 1  # A writer is inside this slot
+
+    def finish():
+        time.sleep(0.05)
+        feed.slots[slot]['close'][:] = 5.0
+        feed.header[SEQUENCE + slot * SLOT_FIELDS] += 1
+    writer = threading.Thread(target=finish)
+    writer.start()
+    # Same generation, so force a fresh read of the active slot
+    reader.current = None
+    assert reader.frame('AAAUSDT')['c'].tolist() == [5.0] * 4
+    writer.join()
+    reader.close()
+
+
+def test_snapshot_is_consistent_under_concurrent_publishes(feed):
+    reader = FeedReader(feed.name)
+    feed.publish(*cycle(0))
+    stop = threading.Event()
+
+    def publish():
+        value = 1
+        while not stop.is_set():
+            feed.publish(*cycle(value))
+            value += 1
+    writer = threading.Thread(target=publish)
+    writer.start()
+    try:
+        for _ in range(500):
+            reader.current = None
+            snapshot = reader.snapshot()
+            # Every array of one snapshot comes from the same cycle
+            values = {float(snapshot.close[0, 0]), float(snapshot.marks[-1]), float(snapshot.tickers[1, -1])}
+            values |= {float(v[-1, -1]) for v in snapshot.indicators.values()}
+            assert len(values) == 1
+    finally:
+        stop.set()
+        writer.join()
+    reader.close()
+
+
+def test_feed_prices_age_from_the_publish_time(feed):
+    reader = FeedReader(feed.name)
+    feed.publish(*cycle(1))
+    feed.header[PUBLISHED_AT + int(feed.header[ACTIVE]) * 3] -= 30_000  # Published 30 s ago
+    reader.current = None
+
+    prices = PriceSnapshot(reader, max_age=10)
+    prices.refresh_marks()
+    assert time.time() - prices.marks['AAAUSDT'][1] >= 29
+    reader.close()
+
+
+def test_exchange_info_is_published_with_the_cycle(feed):
+    reader = FeedReader(feed.name)
+    info = {'symbols': [{'symbol': 'AAAUSDT', 'contractType': 'PERPETUAL', 'quoteAsset': 'USDT', 'filters': []}]}
+    feed.publish(*cycle(1), exchange_info=info)
+    assert reader.exchange_info() == info
+
+    filters = SymbolFilters(reader)
+    assert filters.get('AAAUSDT')['contract_type'] == 'PERPETUAL'
+    reader.close()
+
+
+def test_oversized_exchange_info_falls_back_to_rest(feed):
+    class Client:
+        def exchange_info(self):
+            return {'symbols': []}
+    reader = FeedReader(feed.name, Client())
+    feed.publish(*cycle(1), exchange_info={'symbols': [{'symbol': 'X' * 100}] * 1000})
+    assert reader.exchange_info() == {'symbols': []}
+    reader.close()
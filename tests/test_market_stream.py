@@ -0,0 +1,110 @@
+import json
+import time
+import pytest
+from market_stream import MarketStream, STREAMS
+from replay_server import ReplayServer
+
+
+# Offline: the websocket is a replay_server.py loop of mark prices, REST a stand-in client
+def mark_event(price):
+    return {'e': 'markPriceUpdate', 'E': int(time.time() * 1000), 's': 'AAAUSDT', 'p': str(price), 'i': str(price), 'r': '0', 'T': 0}
+
+
+def kline_row(open_time, close):
+    return [open_time, str(close), str(close), str(close), str(close), '1', open_time + 299_999, '1', 1, '1', '1', '0']
+
+
+def kline_event(open_time, close):
+    return {'t': open_time, 'T': open_time + 299_999, 'i': '5m', 'o': str(close), 'h': str(close), 'l': str(close),
+            'c': str(close), 'v': '1', 'q': '1', 'n': 1, 'V': '1', 'Q': '1'}
+
+
+class RestStandIn:
+    def __init__(self):
+        self.calls = []
+
+    def klines(self, symbol, interval, limit=500, **kwargs):
+        self.calls.append(('klines', symbol))
+        return [kline_row(i * 300_000, 100 + i) for i in range(limit)]
+
+    def mark_price(self, symbol=None):
+        self.calls.append(('mark_price', symbol))
+        return {'symbol': symbol, 'markPrice': '1.0', 'time': int(time.time() * 1000)}
+
+
+@pytest.fixture
+def server():
+    records = [{'t': i * 0.05, 'data': json.dumps([mark_event(100 + i)])} for i in range(2)]
+    server = ReplayServer(records, loop=True)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def rest():
+    return RestStandIn()
+
+
+@pytest.fixture
+def stream(server, rest):
+    stream = MarketStream(rest, '5m', server.url, history=20, reconnect_delay=0.1)
+    stream.start()
+    yield stream
+    stream.stop()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.02)
+
+
+def subscriptions(server):
+    with server.lock:
+        return [set(connection.streams) for connection in server.connections]
+
+
+def test_klines_are_seeded_once_and_subscribed(server, rest, stream):
+    assert len(stream.klines('AAAUSDT', '5m', limit=10)) == 10
+    assert stream.klines('AAAUSDT', '5m', limit=10)[-1][4] == '119'
+    assert rest.calls.count(('klines', 'AAAUSDT')) == 1
+    wait_until(lambda: subscriptions(server) == [set(STREAMS) | {'aaausdt@kline_5m'}])
+
+    # The forming candle and the next one arrive over the stream
+    stream.handle({'e': 'kline', 's': 'AAAUSDT', 'k': kline_event(19 * 300_000, 150)})
+    stream.handle({'e': 'kline', 's': 'AAAUSDT', 'k': kline_event(20 * 300_000, 151)})
+    assert [row[4] for row in stream.klines('AAAUSDT', '5m', limit=2)] == ['150', '151']
+
+
+def test_dropped_connection_is_resumed_with_streams_and_klines(server, rest, stream):
+    stream.klines('AAAUSDT', '5m', limit=10)
+    wait_until(lambda: 'AAAUSDT' in stream.marks)
+    server.drop_connections()
+
+    wait_until(lambda: not stream.connected)
+    assert stream.mark_price('AAAUSDT')['markPrice'] == '1.0'  # REST while the stream is down
+    stream.klines('AAAUSDT', '5m', limit=10)
+    assert rest.calls.count(('klines', 'AAAUSDT')) == 2
+
+    wait_until(lambda: stream.connected and subscriptions(server) == [set(STREAMS) | {'aaausdt@kline_5m'}])
+    wait_until(lambda: 'AAAUSDT' in stream.kline_rows)
+    assert rest.calls.count(('klines', 'AAAUSDT')) == 3  # Re-seeded, since updates may have been missed
+    calls = len(rest.calls)
+    assert len(stream.klines('AAAUSDT', '5m', limit=10)) == 10
+    dropped_at = time.time()
+    wait_until(lambda: stream.marks['AAAUSDT'][1] > dropped_at)
+    assert float(stream.mark_price('AAAUSDT')['markPrice']) in (100, 101)
+    assert len(rest.calls) == calls
+
+
+def test_reconnect_keeps_retrying_until_the_server_is_back(server, rest, stream):
+    stream.stream_url = 'ws://127.0.0.1:9'  # Nothing listens here
+    server.drop_connections()
+    wait_until(lambda: not stream.connected)
+    time.sleep(0.5)
+    assert not stream.connected
+
+    stream.stream_url = server.url
+    wait_until(lambda: stream.connected and subscriptions(server) == [set(STREAMS)])
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+import indicators
+import optimizer
+from kline_store import KlineStore
+from optimizer import grid, sample, select, sweep, walk_forward_folds
+
+DAY = 288  # 5m bars
+
+
+def fold_rows(fold, train, test=None):
+    # Result rows of one fold: train = [(total_pnl, trades, max_drawdown, win_rate)], test pnl = 10 * index
+    rows = []
+    for i, (pnl, trades, drawdown, win_rate) in enumerate(train):
+        rows.append({'rsi_long': 30 + i, 'fold': fold, 'train_total_pnl': pnl, 'train_trades': trades,
+                     'train_max_drawdown': drawdown, 'train_win_rate': win_rate,
+                     'test_total_pnl': 10 * i if test is None else test[i]})
+    return rows
+
+
+# ==== walk_forward_folds ====
+def test_folds_roll_forward_by_the_test_window():
+    folds = walk_forward_folds(30 * DAY, DAY, train_days=14, test_days=7)
+    assert folds == [
+        ((0, 14 * DAY), (14 * DAY, 21 * DAY)),
+        ((7 * DAY, 21 * DAY), (21 * DAY, 28 * DAY)),
+    ]
+
+
+@pytest.mark.parametrize('bar_count', [21 * DAY, 21 * DAY + 1, 100 * DAY - 1, 365 * DAY])
+def test_test_windows_follow_training_and_never_overlap(bar_count):
+    folds = walk_forward_folds(bar_count, DAY, train_days=14, test_days=7)
+    assert folds
+    for (train_start, train_end), (test_start, test_end) in folds:
+        assert train_end - train_start == 14 * DAY and test_end - test_start == 7 * DAY
+        assert test_start == train_end and test_end <= bar_count
+    tests = [test for _, test in folds]
+    assert all(a[1] == b[0] for a, b in zip(tests, tests[1:]))  # Back to back out-of-sample windows
+    assert bar_count - tests[-1][1] < 7 * DAY  # Only a partial window is left unused
+
+
+def test_fold_limit_keeps_the_latest_folds():
+    every = walk_forward_folds(60 * DAY, DAY, 14, 7)
+    assert walk_forward_folds(60 * DAY, DAY, 14, 7, folds=2) == every[-2:]
+    assert walk_forward_folds(20 * DAY, DAY, 14, 7) == []
+
+
+# ==== select ====
+def test_select_picks_each_folds_best_training_set():
+    results = pd.DataFrame(
+        fold_rows(0, [(5.0, 10, 1.0, 0.5), (8.0, 10, 4.0, 0.6), (9.0, 2, 0.5, 0.9)])
+        + fold_rows(1, [(1.0, 6, 0.5, 0.7), (-2.0, 6, 3.0, 0.4), (3.0, 5, 3.0, 0.5)])
+    )
+    best, scored = select(results, 'pnl', min_trades=5)
+    assert best['fold'].tolist() == [0, 1]
+    assert best['rsi_long'].tolist() == [31, 32]  # 9.0 has too few trades
+    assert best['test_total_pnl'].tolist() == [10, 20]
+    assert len(scored) == len(results) and 'train_score' in scored
+
+    best, _ = select(results, 'calmar', min_trades=5)
+    assert best['rsi_long'].tolist() == [30, 30]  # 5/1 beats 8/4; 1/0.5 beats 3/3
+    best, _ = select(results, 'win_rate', min_trades=5)
+    assert best['rsi_long'].tolist() == [31, 30]
+
+
+def test_select_without_enough_trades_picks_nothing():
+    results = pd.DataFrame(fold_rows(0, [(5.0, 1, 1.0, 1.0)]))
+    best, scored = select(results, min_trades=5)
+    assert best.empty and len(scored) == 1
+
+
+def test_calmar_without_drawdown_falls_back_to_pnl():
+    assert optimizer.OBJECTIVES['calmar']({'total_pnl': 2.0, 'max_drawdown': 0.0, 'win_rate': 1.0}) == 2.0
+
+
+# ==== Search space / sweep ====
+def test_grid_and_sample_only_yield_valid_sets():
+    space = dict(optimizer.DEFAULT_SPACE, ema_slow=[10, 50], rsi_long=[40, 60])
+    sets = list(grid(space))
+    assert sets and all(optimizer.valid(params) for params in sets)
+    assert not any(params['ema_slow'] == 10 or params['rsi_long'] > params['rsi_mid'] for params in sets)
+
+    drawn = sample(space, 50, seed=3)
+    assert len(drawn) == 50 and all(params in sets for params in drawn)
+    assert len({tuple(params.values()) for params in drawn}) == 50
+    assert drawn == sample(space, 50, seed=3)
+
+
+def random_walk_store(path, seed, symbols=3, days=6):
+    # A KlineStore of random-walk 5m klines with enough volume for the universe filter
+    rng = np.random.default_rng(seed)
+    store = KlineStore(str(path))
+    for i in range(symbols):
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.006, days * DAY)))
+        rows = np.zeros((days * DAY, 12))
+        rows[:, 0] = np.arange(days * DAY) * 300_000
+        rows[:, 1] = np.r_[close[0], close[:-1]]
+        rows[:, 2] = np.maximum(rows[:, 1], close) * 1.002
+        rows[:, 3] = np.minimum(rows[:, 1], close) * 0.998
+        rows[:, 4] = close
+        rows[:, 6] = rows[:, 0] + 299_999
+        rows[:, 7] = 10_000
+        store.append(f"S{i}USDT", '5m', rows)
+    return store
+
+
+def test_sweep_reports_every_set_on_every_fold(tmp_path):
+    store = random_walk_store(tmp_path / 'klines', seed=5)
+    space = {name: values[:1] for name, values in optimizer.DEFAULT_SPACE.items()}
+    space.update(ema_slow=[50, 60], rsi_long=[35, 40], tp_usdt=[0.25, 0.5])
+    sets = list(grid(space))
+    folds = walk_forward_folds(6 * DAY, DAY, train_days=2, test_days=1)
+    results = sweep(store.root, '5m', sets, folds, workers=1, scan_every=12)
+
+    assert len(results) == len(sets) * len(folds) == 8 * 4
+    assert sorted(results['fold'].unique()) == [0, 1, 2, 3]
+    assert results['train_trades'].sum() > 0
+    best, _ = select(results, min_trades=1)
+    assert set(best['fold']) <= {0, 1, 2, 3}
+
+
+def test_in_process_sweeps_do_not_share_indicators(tmp_path):
+    params = [{name: values[0] for name, values in optimizer.DEFAULT_SPACE.items()}]
+    folds = walk_forward_folds(6 * DAY, DAY, train_days=2, test_days=1)
+    for seed in (1, 2):
+        sweep(random_walk_store(tmp_path / str(seed), seed).root, '5m', params, folds, workers=1, scan_every=12)
+    # The worker state now holds the second store; its cached EMA must come from those closes
+    close = optimizer._data['data']['close']
+    np.testing.assert_array_equal(optimizer._ema(20), indicators.ema(close, 20))
@@ -0,0 +1,52 @@
+import time
+from price_snapshot import PriceSnapshot
+
+
+class Source:
+    # REST stand-in whose exchange clock runs `skew` seconds off this host's
+    def __init__(self, skew=0.0, published_ago=None):
+        self.skew = skew
+        self.published_ago = published_ago
+        self.calls = []
+
+    def mark_price(self, symbol=None):
+        self.calls.append(symbol)
+        marks = [self._mark(s) for s in ('AAAUSDT', 'BBBUSDT')]
+        return marks if symbol is None else self._mark(symbol)
+
+    def _mark(self, symbol):
+        mark = {'symbol': symbol, 'markPrice': '1.0', 'time': int((time.time() + self.skew) * 1000)}
+        if self.published_ago is not None:
+            mark['publishedAt'] = int((time.time() - self.published_ago) * 1000)
+        return mark
+
+
+def test_exchange_clock_skew_does_not_age_the_snapshot():
+    for skew in (-120, 120):
+        source = Source(skew=skew)
+        prices = PriceSnapshot(source, max_age=10)
+        for _ in range(5):
+            prices.mark_price('AAAUSDT')
+            prices.mark_price('BBBUSDT')
+        assert source.calls == [None]  # One bulk refresh, no per-symbol fallbacks
+
+
+def test_feed_marks_age_from_their_publish_time():
+    source = Source(published_ago=30)
+    prices = PriceSnapshot(source, max_age=10)
+    prices.refresh_marks()
+    assert time.time() - prices.marks['AAAUSDT'][1] >= 29
+
+    # Too old for the lookup, so it reads the symbol directly
+    prices.marks_at = time.time()
+    prices.mark_price('AAAUSDT')
+    assert source.calls == [None, 'AAAUSDT']
+
+
+def test_fresh_reads_bypass_the_snapshot():
+    source = Source()
+    prices = PriceSnapshot(source, max_age=10)
+    prices.refresh_marks()
+    time.sleep(0.01)
+    prices.mark_price('AAAUSDT', max_age=0)
+    assert source.calls == [None, 'AAAUSDT']
@@ -0,0 +1,121 @@
+import threading
+import time
+import pytest
+import rate_governor
+from rate_governor import ORDER, SCAN, RateGovernor, request_priority
+
+MINUTE = 6000 * 60  # A window boundary on the fake clock
+
+
+class Clock:
+    # Stands in for time.time/time.sleep; sleeping moves the clock instead of waiting
+    def __init__(self, now):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(MINUTE + 20)
+    monkeypatch.setattr(rate_governor.time, 'time', clock.time)
+    monkeypatch.setattr(rate_governor.time, 'sleep', clock.sleep)
+    return clock
+
+
+def used(governor, weight, orders=0):
+    governor.observe(200, {'X-MBX-USED-WEIGHT-1M': str(weight), 'X-MBX-ORDER-COUNT-1M': str(orders)})
+
+
+def send(governor, priority):
+    governor.acquire(priority)
+    governor.release(priority)
+
+
+def test_order_endpoints_get_order_priority():
+    assert request_priority('https://fapi.binance.com/fapi/v1/order') == ORDER
+    assert request_priority('https://fapi.binance.com/fapi/v1/batchOrders') == ORDER
+    assert request_priority('https://fapi.binance.com/fapi/v1/klines?symbol=BTCUSDT') == SCAN
+    assert request_priority('https://fapi.binance.com/fapi/v1/order/test') == ORDER
+
+
+def test_headers_update_the_live_budget(clock):
+    governor = RateGovernor()
+    governor.observe(200, {'x-mbx-used-weight-1m': '300', 'X-MBX-ORDER-COUNT-1M': '4'})
+    used(governor, 120)
+    assert (governor.used_weight, governor.order_count, governor.peak_weight) == (120, 0, 300)
+
+    clock.now += 40  # Next calendar minute
+    governor.observe(200, {})
+    assert governor.used_weight == 0
+
+
+def test_scans_slow_down_in_proportion_past_the_slowdown_mark(clock):
+    governor = RateGovernor(weight_limit=1000, scan_slowdown=0.6, scan_ceiling=0.8, max_scan_delay=1.0)
+    used(governor, 500)
+    send(governor, SCAN)
+    assert clock.slept == []
+
+    used(governor, 700)  # Halfway from the slowdown mark to the ceiling
+    send(governor, SCAN)
+    assert clock.slept == [pytest.approx(0.5)]
+
+    send(governor, ORDER)  # Orders never back off
+    assert len(clock.slept) == 1
+
+
+def test_scans_pause_until_the_next_minute_at_the_ceiling(clock):
+    governor = RateGovernor(weight_limit=1000, scan_ceiling=0.8, order_ceiling=0.95)
+    used(governor, 850)
+    send(governor, ORDER)
+    assert clock.slept == []
+
+    send(governor, SCAN)
+    assert clock.slept == [pytest.approx(40)]
+    assert clock.now == pytest.approx(MINUTE + 60) and governor.used_weight == 0
+
+    used(governor, 960)
+    send(governor, ORDER)
+    assert clock.slept[-1] == pytest.approx(60)
+
+
+@pytest.mark.parametrize('status, headers, pause', [
+    (429, {'Retry-After': '30'}, 30),
+    (418, {'Retry-After': '120'}, 120),
+    (429, {}, 60),
+])
+def test_a_ban_stops_every_request_until_retry_after(clock, status, headers, pause):
+    governor = RateGovernor()
+    governor.observe(status, headers)
+    send(governor, ORDER)
+    assert clock.slept == [pytest.approx(pause)]
+
+    governor.observe(429, {'Retry-After': '5'})
+    governor.observe(200, {'Retry-After': '500'})  # Only ban responses extend the pause
+    send(governor, SCAN)
+    assert sum(clock.slept) == pytest.approx(pause + 5)
+
+
+def test_scans_wait_while_an_order_is_in_flight():
+    governor = RateGovernor()
+    governor.acquire(ORDER)
+    scanned = threading.Event()
+
+    def scan():
+        send(governor, SCAN)
+        scanned.set()
+
+    threading.Thread(target=scan, daemon=True).start()
+    assert not scanned.wait(0.2)
+    governor.release(ORDER)
+    assert scanned.wait(2)
+
+    started = time.monotonic()
+    send(governor, ORDER)  # Scans never hold back an order
+    assert time.monotonic() - started < 0.1
@@ -0,0 +1,70 @@
+import random
+import pytest
+from scan_planner import ScanQueue, prescreen_scores, signal_target
+
+
+def scan(symbols, prescreen, signals, target, batch_size=2):
+    # The scan loop of main.scan_for_signals: returns (signals ranked like the trading phase, symbols fetched)
+    queue = ScanQueue(prescreen, symbols)
+    found, fetched = [], []
+    while len(queue):
+        batch = queue.pop_batch(batch_size)
+        fetched += batch
+        found += [{'symbol': symbol, 'score': signals[symbol]} for symbol in batch if symbol in signals]
+        if target:
+            queue.settle([pair['symbol'] for pair in found if pair['score'] == 100], target)
+    ranked = sorted(queue.ranked(found), key=lambda pair: pair['score'], reverse=True)
+    return [pair['symbol'] for pair in ranked], fetched
+
+
+def ticker(symbol, volume, change, last=1.0, high=1.1, low=0.9):
+    return {'symbol': symbol, 'volume': volume, 'lastPrice': last, 'priceChangePercent': change,
+            'highPrice': high, 'lowPrice': low}
+
+
+def test_score_ties_go_to_the_higher_volume_symbol():
+    # Volume order; the pre-screen likes the quiet, trending tail best
+    symbols = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT', 'DOGEUSDT', 'PEPEUSDT', 'WIFUSDT', 'BONKUSDT', 'SHIBUSDT', 'FLOKIUSDT']
+    prescreen = dict(zip(symbols, [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.0, 0.0]))
+    signals = {'ETHUSDT': 100, 'XRPUSDT': 100, 'PEPEUSDT': 100, 'WIFUSDT': 100, 'BONKUSDT': 100, 'SOLUSDT': 80}
+
+    chosen, fetched = scan(symbols, prescreen, signals, target=3)
+    assert chosen[:3] == ['ETHUSDT', 'XRPUSDT', 'PEPEUSDT']
+    assert chosen[:3] == scan(symbols, {}, signals, target=0)[0][:3]
+    assert 'BTCUSDT' in fetched and 'SOLUSDT' in fetched  # Ahead of the held ties in volume order
+    assert 'SHIBUSDT' not in fetched and 'FLOKIUSDT' not in fetched
+
+
+def test_symbols_behind_the_held_signals_are_skipped():
+    symbols = [f"S{i}USDT" for i in range(20)]
+    prescreen = {symbol: 1.0 for symbol in symbols[:4]}
+    signals = {symbol: 100 for symbol in symbols[:4]} | {'S10USDT': 100}
+
+    chosen, fetched = scan(symbols, prescreen, signals, target=4, batch_size=4)
+    assert chosen == symbols[:4]
+    assert fetched == symbols[:4]
+
+
+@pytest.mark.parametrize('seed', range(25))
+def test_early_stop_trades_what_a_full_scan_trades(seed):
+    rng = random.Random(seed)
+    symbols = [f"S{i}USDT" for i in range(60)]
+    prescreen = {symbol: rng.random() for symbol in symbols}
+    signals = {symbol: rng.choice([60, 80, 100, 100]) for symbol in rng.sample(symbols, 25)}
+    target = signal_target(rng.randrange(0, 6), 6, spare=2)
+
+    chosen, _ = scan(symbols, prescreen, signals, target, batch_size=rng.randrange(1, 8))
+    full, _ = scan(symbols, {}, signals, 0, batch_size=len(symbols))
+    assert chosen[:target] == full[:target]
+
+
+def test_prescreen_prefers_liquid_moving_symbols_near_their_range_ends():
+    tickers = [
+        ticker('AAAUSDT', 1e9, 8, last=1.1),   # Liquid, moving, at its high
+        ticker('BBBUSDT', 1e9, 0.5, last=1.0),  # Liquid but flat, mid-range
+        ticker('CCCUSDT', 1e3, 8, last=1.1),   # Illiquid
+    ]
+    scores = prescreen_scores(tickers, ['AAAUSDT', 'BBBUSDT', 'CCCUSDT', 'DDDUSDT'])
+    assert max(scores, key=scores.get) == 'AAAUSDT'
+    assert scores['DDDUSDT'] == 0.0  # No ticker: back of the queue
+    assert signal_target(6, 6) == 0 and signal_target(5, 6, spare=2) == 3
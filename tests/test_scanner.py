@@ -0,0 +1,78 @@
+import threading
+import time
+import pytest
+import scanner
+from scanner import WeightBudget, kline_weight, scan_klines
+
+
+class Clock:
+    # Stands in for time.monotonic/time.sleep so the bucket can be driven without waiting
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scanner.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(scanner.time, 'sleep', clock.sleep)
+    return clock
+
+
+@pytest.mark.parametrize('limit, weight', [
+    (1, 1), (99, 1), (100, 2), (210, 2), (499, 2), (500, 5), (1000, 5), (1001, 10), (1500, 10),
+])
+def test_kline_weight_follows_the_limit_brackets(limit, weight):
+    assert kline_weight(limit) == weight
+
+
+def test_budget_allows_a_burst_up_to_the_limit(clock):
+    budget = WeightBudget(limit=10, period=60)
+    for _ in range(5):
+        budget.acquire(2)
+    assert clock.slept == []
+    assert budget.available() == 0
+
+
+def test_budget_waits_for_the_refill(clock):
+    budget = WeightBudget(limit=10, period=60)  # 1 weight every 6 s
+    budget.acquire(10)
+    budget.acquire(2)
+    assert sum(clock.slept) == pytest.approx(12)
+    assert budget.available() == pytest.approx(0)
+
+    clock.now += 600
+    assert budget.available() == 10  # Refill never goes past the capacity
+
+
+def test_scan_keeps_the_input_order_and_reports_errors():
+    def fetch(symbol):
+        if symbol == 'BADUSDT':
+            raise ValueError('no klines')
+        time.sleep(0.02 if symbol == 'AAAUSDT' else 0)  # The first symbol finishes last
+        return symbol.lower()
+
+    results = list(scan_klines(['AAAUSDT', 'BADUSDT', 'CCCUSDT'], fetch, WeightBudget(10 ** 6), max_workers=3))
+    assert [(symbol, df) for symbol, df, _ in results] == [('AAAUSDT', 'aaausdt'), ('BADUSDT', None), ('CCCUSDT', 'cccusdt')]
+    assert isinstance(results[1][2], ValueError)
+
+
+def test_scan_charges_the_budget_per_request():
+    acquired = []
+    lock = threading.Lock()
+
+    class Budget:
+        def acquire(self, weight):
+            with lock:
+                acquired.append(weight)
+
+    list(scan_klines([f"S{i}USDT" for i in range(7)], lambda symbol: symbol, Budget(), limit=500))
+    assert acquired == [5] * 7
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+import strategy
+from strategy import LONG, SHORT, evaluate_signals, signal_notes
+
+INDICATORS = ['EMA20', 'EMA50', 'EMA200', 'RSI', 'MACD', 'Signal', 'Hist']
+
+
+def cascade(latest):
+    # The per-row lambda cascade get_signal ran before evaluate_signals, without its printing
+    ema20, ema50, ema200 = latest['EMA20'], latest['EMA50'], latest['EMA200']
+    rsi, macd, signal_line, hist = latest['RSI'], latest['MACD'], latest['Signal'], latest['Hist']
+    attempts = [
+        lambda: (ema20 > ema50 and rsi < 40 and macd > signal_line and hist > 0, 'long', 'Perfect match for LONG', 100),
+        lambda: (ema20 < ema50 and rsi > 60 and macd < signal_line and hist < 0, 'short', 'Perfect match for SHORT', 100),
+        lambda: (ema20 > ema50 and rsi < 50, 'long', 'Close match for LONG', 80),
+        lambda: (ema20 < ema50 and rsi > 50, 'short', 'Close match for SHORT', 80),
+        lambda: (ema20 > ema50 and rsi < 50, 'long', 'Ignoring MACD - LONG', 60),
+        lambda: (ema20 < ema50 and rsi > 50, 'short', 'Ignoring MACD - SHORT', 60),
+        lambda: (ema20 > ema50, 'long', 'Ignoring RSI - LONG', 40),
+        lambda: (ema20 < ema50, 'short', 'Ignoring RSI - SHORT', 40)
+    ]
+    for i, attempt in enumerate(attempts, start=1):
+        condition, direction, notes, score = attempt()
+        if condition:
+            if direction == 'long' and ema20 > ema200:
+                return direction, f"[Attempt {i}] {notes} | Confirmed by EMA200", score
+            elif direction == 'short' and ema20 < ema200:
+                return direction, f"[Attempt {i}] {notes} | Confirmed by EMA200", score
+    return None, None, 0
+
+
+def random_indicators(rng, shape):
+    # Coarse values so equal EMAs, RSI on a threshold and MACD == Signal all occur; a few NaNs as in warm-up bars
+    ind = {
+        'EMA20': rng.integers(8, 12, shape).astype(float),
+        'EMA50': rng.integers(8, 12, shape).astype(float),
+        'EMA200': rng.integers(8, 12, shape).astype(float),
+        'RSI': rng.choice([20.0, 40.0, 45.0, 50.0, 55.0, 60.0, 80.0], shape),
+        'MACD': rng.integers(-2, 3, shape).astype(float),
+        'Signal': rng.integers(-2, 3, shape).astype(float),
+        'Hist': rng.integers(-1, 2, shape).astype(float),
+    }
+    for name in INDICATORS:
+        ind[name][rng.random(shape) < 0.03] = np.nan
+    return ind
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_vectorized_signals_match_the_per_row_cascade(seed):
+    rng = np.random.default_rng(seed)
+    ind = random_indicators(rng, 4000)
+    direction, attempt, score = evaluate_signals(ind)
+
+    for row in range(4000):
+        expected = cascade({name: ind[name][row] for name in INDICATORS})
+        side = {LONG: 'long', SHORT: 'short'}.get(int(direction[row]))
+        notes = signal_notes(int(attempt[row])) if attempt[row] else None
+        assert (side, notes, int(score[row])) == expected
+
+
+def test_symbol_matrices_evaluate_like_their_rows():
+    ind = random_indicators(np.random.default_rng(11), (6, 300))
+    matrix = evaluate_signals(ind)
+    for row in range(6):
+        rows = evaluate_signals({name: values[row] for name, values in ind.items()})
+        for whole, single in zip(matrix, rows):
+            np.testing.assert_array_equal(whole[row], single)
+
+
+def test_higher_timeframes_veto_only_an_opposing_trend():
+    # A perfect long on every bar; the 1h trend is down, up, and still unknown
+    ind = {name: np.array([value] * 3) for name, value in
+           {'EMA20': 11.0, 'EMA50': 10.0, 'EMA200': 9.0, 'RSI': 30.0, 'MACD': 1.0, 'Signal': 0.5, 'Hist': 0.5}.items()}
+    ind['EMA20_1h'] = np.array([9.0, 11.0, np.nan])
+    ind['EMA50_1h'] = np.array([10.0, 10.0, 10.0])
+
+    direction, attempt, score = evaluate_signals(ind, ['1h'])
+    assert direction.tolist() == [0, LONG, LONG]
+    assert attempt.tolist() == [0, 1, 1] and score.tolist() == [0, 100, 100]
+    assert signal_notes(1, ['1h']).endswith('| Confirmed by EMA200 | 1h trend not opposed')
+
+
+def test_thresholds_move_the_rsi_bands():
+    ind = {name: np.array([value]) for name, value in
+           {'EMA20': 11.0, 'EMA50': 10.0, 'EMA200': 9.0, 'RSI': 42.0, 'MACD': 1.0, 'Signal': 0.5, 'Hist': 0.5}.items()}
+    assert evaluate_signals(ind)[2].tolist() == [80]
+    assert evaluate_signals(ind, rsi_long=45)[2].tolist() == [100]
+
+
+def test_signal_trace_names_the_winning_attempt():
+    latest = {'EMA20': 9.0, 'EMA50': 10.0, 'EMA200': 9.5, 'RSI': 55.0, 'MACD': 0.0, 'Signal': 0.0, 'Hist': 0.0}
+    lines = str(strategy.SignalTrace(latest, 'AAAUSDT')).splitlines()
+    assert lines[0].startswith('  → Indicators AAAUSDT |')
+    assert lines[2] == '    [ATTEMPT 2] [FAIL] Perfect match for SHORT not satisfied'
+    assert lines[-1] == '    [ATTEMPT 4] [MATCH] Close match for SHORT ✅ Confirmed by EMA200'
@@ -0,0 +1,84 @@
+import pytest
+from symbol_filters import SymbolFilters, parse_symbol, step_precision, trim_symbol
+
+BTC = {
+    'symbol': 'BTCUSDT',
+    'contractType': 'PERPETUAL',
+    'quoteAsset': 'USDT',
+    'status': 'TRADING',
+    'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': '0.10', 'minPrice': '556.80', 'maxPrice': '4529764'},
+        {'filterType': 'LOT_SIZE', 'stepSize': '0.001', 'minQty': '0.001', 'maxQty': '1000'},
+        {'filterType': 'MARKET_LOT_SIZE', 'stepSize': '0.001', 'minQty': '0.001', 'maxQty': '120'},
+        {'filterType': 'MAX_NUM_ORDERS', 'limit': 200},
+        {'filterType': 'MIN_NOTIONAL', 'notional': '100'},
+        {'filterType': 'PERCENT_PRICE', 'multiplierUp': '1.0500', 'multiplierDown': '0.9500', 'multiplierDecimal': '4'},
+    ],
+}
+
+
+class Client:
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.calls = 0
+
+    def exchange_info(self):
+        self.calls += 1
+        return {'symbols': self.symbols}
+
+
+@pytest.mark.parametrize('step_size, decimals', [
+    ('1', 0), ('1.0', 0), ('10', 0), ('0.1', 1), ('0.001', 3), ('0.00100', 3), ('0.00001', 5), ('0.0000001', 7),
+])
+def test_step_precision_counts_decimals_from_the_string(step_size, decimals):
+    assert step_precision(step_size) == decimals
+
+
+def test_parse_symbol_reads_every_filter_as_numbers():
+    assert parse_symbol(BTC) == {
+        'symbol': 'BTCUSDT',
+        'contract_type': 'PERPETUAL',
+        'quote_asset': 'USDT',
+        'step_size': 0.001,
+        'min_qty': 0.001,
+        'qty_precision': 3,
+        'tick_size': 0.1,
+        'min_notional': 100.0,
+        'multiplier_up': 1.05,
+        'multiplier_down': 0.95,
+    }
+
+
+def test_parse_symbol_leaves_missing_filters_empty():
+    parsed = parse_symbol({'symbol': 'NEWUSDT', 'filters': [{'filterType': 'LOT_SIZE', 'stepSize': '1', 'minQty': '1'}]})
+    assert parsed['qty_precision'] == 0 and parsed['min_qty'] == 1.0
+    assert parsed['tick_size'] is None and parsed['min_notional'] is None and parsed['multiplier_up'] is None
+    assert parsed['contract_type'] is None
+
+
+def test_trimmed_entries_parse_the_same():
+    assert parse_symbol(trim_symbol(BTC)) == parse_symbol(BTC)
+    assert [f['filterType'] for f in trim_symbol(BTC)['filters']] == ['PRICE_FILTER', 'LOT_SIZE', 'MIN_NOTIONAL', 'PERCENT_PRICE']
+
+
+def test_index_downloads_once_per_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('symbol_filters.time.time', lambda: now[0])
+    client = Client([BTC])
+    filters = SymbolFilters(client, ttl=60)
+
+    assert filters.get('BTCUSDT')['tick_size'] == 0.1
+    assert 'BTCUSDT' in filters and 'ETHUSDT' not in filters
+    assert filters.get('ETHUSDT') is None
+    assert client.calls == 1
+
+    now[0] += 59
+    filters.get('BTCUSDT')
+    assert client.calls == 1
+    now[0] += 1
+    assert filters.is_stale()
+    filters.get('BTCUSDT')
+    assert client.calls == 2
+
+    filters.refresh(force=True)
+    assert client.calls == 3
@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+import pytest
+from telegram_notifier import TelegramNotifier, pack_messages, split_message
+
+
+# ==== Local Telegram Stand-in ====
+# Records every sendMessage post. `status` sets the reply code, `delay` holds
+# each reply for that many seconds and `gate` (an Event) holds replies until set.
+class TelegramStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), TelegramHandler)
+        self.posts = []
+        self.received = threading.Event()
+        self.status = 200
+        self.delay = 0
+        self.gate = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def texts(self):
+        return [post['text'] for post in self.posts]
+
+
+class TelegramHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+        server = self.server
+        server.posts.append({'path': self.path, **{k: v[0] for k, v in parse_qs(body).items()}})
+        server.received.set()
+        if server.gate:
+            server.gate.wait(5)
+        time.sleep(server.delay)
+        self.send_response(server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{"ok": true}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = TelegramStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    if server.gate:
+        server.gate.set()
+    server.shutdown()
+    server.server_close()
+
+
+def notifier(server, **kwargs):
+    return TelegramNotifier('TOKEN', 'CHAT', api_url=server.url, **kwargs)
+
+
+def test_burst_is_batched_into_one_post(server):
+    telegram = notifier(server, batch_window=0.3)
+    for i in range(3):
+        telegram.send(f"message {i}")
+    assert telegram.flush(5)
+    telegram.close()
+
+    assert server.texts() == ["message 0\n\nmessage 1\n\nmessage 2"]
+    assert server.posts[0]['path'] == '/botTOKEN/sendMessage'
+    assert server.posts[0]['chat_id'] == 'CHAT'
+    assert server.posts[0]['parse_mode'] == 'HTML'
+
+
+def test_send_never_blocks_and_drops_on_overflow(server, caplog):
+    server.gate = threading.Event()
+    telegram = notifier(server, max_queue=2, batch_window=0)
+    telegram.send("first")
+    assert server.received.wait(5)  # The worker is now stuck posting "first"
+
+    started = time.perf_counter()
+    with caplog.at_level(logging.WARNING, logger='telegram_notifier'):
+        for text in ("second", "third", "fourth"):
+            telegram.send(text)
+    assert time.perf_counter() - started < 0.1
+    assert any('queue full' in record.getMessage() and 'fourth' in record.getMessage() for record in caplog.records)
+
+    server.gate.set()
+    telegram.close()
+    assert "fourth" not in "".join(server.texts())
+    assert "second" in "".join(server.texts()) and "third" in "".join(server.texts())
+
+
+def test_server_errors_are_logged_and_the_worker_continues(server, caplog):
+    server.status = 500
+    telegram = notifier(server, batch_window=0)
+    with caplog.at_level(logging.ERROR, logger='telegram_notifier'):
+        telegram.send("lost")
+        assert telegram.flush(5)
+    assert any('500' in record.getMessage() for record in caplog.records)
+
+    server.status = 200
+    telegram.send("delivered")
+    telegram.close()
+    assert server.texts() == ["lost", "delivered"]
+
+
+def test_slow_api_times_out_without_blocking_flush_forever(server, caplog):
+    server.delay = 1
+    telegram = notifier(server, batch_window=0, timeout=0.2)
+    with caplog.at_level(logging.ERROR, logger='telegram_notifier'):
+        telegram.send("slow")
+        started = time.perf_counter()
+        assert telegram.flush(5)
+    assert time.perf_counter() - started < 0.9
+    assert any('timed out' in record.getMessage().lower() for record in caplog.records)
+    telegram.close()
+
+
+def test_flush_times_out_while_posts_are_pending(server):
+    server.gate = threading.Event()
+    telegram = notifier(server, batch_window=0)
+    telegram.send("held")
+    assert server.received.wait(5)
+    assert telegram.flush(0.2) is False
+
+    server.gate.set()
+    assert telegram.flush(5)
+    telegram.close()
+
+
+def test_close_delivers_everything_queued(server):
+    telegram = notifier(server, batch_window=0.05)
+    for i in range(20):
+        telegram.send(f"line {i}")
+    telegram.close()
+
+    delivered = "\n\n".join(server.texts()).split("\n\n")
+    assert delivered == [f"line {i}" for i in range(20)]
+    assert not telegram.worker.is_alive()
+
+
+def test_long_message_is_split_into_posts_within_the_limit(server):
+    lines = [f"<code>SYM{i:04d}USDT</code> | Profit: <code>{i}.00 USDT</code>" for i in range(200)]
+    telegram = notifier(server, batch_window=0)
+    telegram.send("\n".join(lines))
+    telegram.close()
+
+    assert len(server.posts) > 1
+    assert all(len(text) <= 4096 for text in server.texts())
+    assert "\n".join(server.texts()).split("\n") == lines
+
+
+def test_split_message_prefers_newlines():
+    assert split_message("aaaa\nbbbbbb\ncc", 10) == ["aaaa", "bbbbbb\ncc"]
+    assert split_message("short", 10) == ["short"]
+    assert split_message("", 10) == [""]
+
+
+def test_split_message_never_cuts_inside_a_tag_or_entity():
+    assert split_message("aaaaaa<code>bbb</code>", 8) == ["aaaaaa", "<code>bb", "b</code>"]
+    assert split_message("aaaaa&amp;bb", 8) == ["aaaaa", "&amp;bb"]
+    for part in split_message("x" * 10 + "<b>" + "y" * 20 + "</b>", 12):
+        assert part.count("<") == part.count(">")
+
+
+def test_pack_messages_joins_up_to_the_limit():
+    assert pack_messages(["a", "b", "c"], limit=4) == ["a\n\nb", "c"]
+    assert pack_messages(["x" * 9000]) == ["x" * 4096, "x" * 4096, "x" * 808]
+    assert pack_messages([]) == []
@@ -0,0 +1,120 @@
+import pytest
+from binance.error import ClientError
+import main
+from metrics import Metrics
+
+
+# ==== Exchange Stand-in ====
+# Records every order request in `calls`. `batch` is what /fapi/v1/batchOrders
+# answers: a list of per-order results, or a ClientError raised for the request.
+class Client:
+    def __init__(self, batch=None):
+        self.calls = []
+        self.batch = batch
+        self.next_order_id = 100
+
+    def new_order_test(self, **params):
+        self.calls.append(('test', params))
+        return {}
+
+    def new_order(self, **params):
+        self.calls.append(('order', params))
+        self.next_order_id += 1
+        return {'orderId': self.next_order_id, 'status': 'FILLED'}
+
+    def new_batch_order(self, batchOrders):
+        self.calls.append(('batch', batchOrders))
+        if isinstance(self.batch, ClientError):
+            raise self.batch
+        return self.batch or [{'orderId': 1}, {'orderId': 2}]
+
+    def orders(self):
+        return [params for kind, params in self.calls if kind == 'order']
+
+
+class Recorder:
+    # Collects the calls made on any method, e.g. universe.exclude or trade_journal.record
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+
+class Prices:
+    def mark_price(self, symbol, max_age=None):
+        return {'symbol': symbol, 'markPrice': '10.0'}
+
+
+class Filters:
+    def get(self, symbol):
+        return {'tick_size': 0.001, 'multiplier_up': 1.05, 'multiplier_down': 0.95, 'min_notional': 5}
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    # main.py's runtime state for one trade; the journal, universe and Telegram only record
+    def install(client):
+        for name, value in {
+            'client': client, 'prices': Prices(), 'symbol_filters': Filters(), 'symbol_precisions': {'AAAUSDT': 3},
+            'metrics': Metrics(), 'universe': Recorder(), 'trade_journal': Recorder(), 'income_ledger': Recorder(),
+            'telegram': Recorder(), 'user_stream': None, 'trades_today': 0, 'RISK_PER_TRADE': 0.5, 'TP_USDT': 0.5,
+        }.items():
+            monkeypatch.setattr(main, name, value)
+        return main
+    return install
+
+
+def journaled(bot):
+    (_, _, entry), = bot.trade_journal.calls
+    return entry
+
+
+def test_protection_goes_out_as_one_batch_after_the_fill(bot):
+    client = Client()
+    bot = bot(client)
+    assert bot.place_trade('AAAUSDT', 'long', 10.0, 2, '[Attempt 1] Perfect match for LONG', score=100)
+
+    kinds = [kind for kind, _ in client.calls]
+    assert kinds == ['test', 'test', 'test', 'order', 'batch']
+    sl, tp = client.calls[-1][1]
+    assert (sl['type'], sl['side'], sl['closePosition']) == ('STOP_MARKET', 'SELL', 'true')
+    assert (tp['type'], tp['side']) == ('TAKE_PROFIT_MARKET', 'SELL')
+    assert float(sl['stopPrice']) < 10.0 < float(tp['stopPrice'])
+    assert bot.trades_today == 1
+    assert journaled(bot)['status'] == 'placed'
+
+
+@pytest.mark.parametrize('batch', [
+    [{'orderId': 1}, {'code': -2021, 'msg': 'Order would immediately trigger.'}],
+    [{'code': -2021, 'msg': 'Order would immediately trigger.'}, {'orderId': 2}],
+    ClientError(400, -1001, 'Internal error; unable to process your request.', {}),
+])
+def test_a_failed_protection_leg_closes_the_position(bot, batch):
+    client = Client(batch)
+    bot = bot(client)
+    assert not bot.place_trade('AAAUSDT', 'long', 10.0, 2, '[Attempt 1] Perfect match for LONG', score=100)
+
+    entry, *closes = client.orders()
+    assert entry == {'symbol': 'AAAUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 2}
+    assert closes and all(close == {'symbol': 'AAAUSDT', 'side': 'SELL', 'type': 'MARKET', 'reduceOnly': True, 'quantity': 2}
+                          for close in closes)
+    assert [kind for kind, _ in client.calls].index('batch') == 4  # Nothing else runs between fill and protection
+    assert journaled(bot)['status'] == 'rejected'
+    assert journaled(bot)['reason'].startswith('Position closed after error:')
+
+
+def test_a_failed_simulation_sends_no_real_order(bot):
+    client = Client()
+    failing = ClientError(400, -4131, 'The counterparty best price does not meet the PERCENT_PRICE filter limit.', {})
+
+    def new_order_test(**params):
+        client.calls.append(('test', params))
+        if params['type'] == 'TAKE_PROFIT_MARKET':
+            raise failing
+    client.new_order_test = new_order_test
+    bot = bot(client)
+
+    assert not bot.place_trade('AAAUSDT', 'long', 10.0, 2, '[Attempt 1] Perfect match for LONG', score=100)
+    assert client.orders() == []
+    assert journaled(bot)['reason'].startswith('Failed to validate take-profit order')
@@ -0,0 +1,85 @@
+import calendar
+import sqlite3
+import threading
+import pytest
+from trade_journal import TradeJournal
+
+# 16:30 UTC is 23:30 in UTC+7; an hour later is the next trading day
+LATE = calendar.timegm((2026, 10, 18, 16, 30, 0, 0, 0, 0)) * 1000
+NEXT_DAY = LATE + 3_600_000
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = TradeJournal(str(tmp_path / 'journal' / 'trades.sqlite'))
+    yield journal
+    journal.close()
+
+
+def placed(journal, symbol, order_id, at=LATE, **fields):
+    journal.record(time=at, symbol=symbol, order_id=order_id, signal='long', score=100, status='placed',
+                   intended_entry=10.0, actual_entry=10.1, **fields)
+
+
+@pytest.mark.parametrize('statement', [
+    "UPDATE trades SET status = 'rejected'",
+    "DELETE FROM trades",
+    "DELETE FROM trades WHERE order_id = 1",
+])
+def test_rows_cannot_be_changed_or_removed(journal, statement):
+    placed(journal, 'AAAUSDT', 1)
+    journal.flush()
+    with pytest.raises(sqlite3.IntegrityError, match='append-only'):
+        with journal.lock, journal.db:
+            journal.db.execute(statement)
+    assert [row['status'] for row in journal.trades()] == ['placed']
+
+
+def test_triggers_hold_for_other_connections(journal):
+    placed(journal, 'AAAUSDT', 1)
+    journal.flush()
+    other = sqlite3.connect(journal.path)
+    with pytest.raises(sqlite3.IntegrityError, match='append-only'):
+        other.execute("DELETE FROM trades")
+    other.close()
+    assert journal.by_order_id(1)['symbol'] == 'AAAUSDT'
+
+
+def test_entries_are_indexed_by_day_symbol_and_order_id(journal):
+    placed(journal, 'AAAUSDT', 1)
+    placed(journal, 'BBBUSDT', 2, at=NEXT_DAY)
+    journal.record(time=NEXT_DAY, symbol='CCCUSDT', status='rejected', reason='Price revalidation failed')
+
+    assert [row['symbol'] for row in journal.trades(day='2026-10-18')] == ['AAAUSDT']
+    assert [row['symbol'] for row in journal.trades(day='2026-10-19')] == ['BBBUSDT', 'CCCUSDT']
+    assert journal.count('2026-10-19') == 1 and journal.count('2026-10-19', 'rejected') == 1
+    assert journal.by_order_id(2)['day'] == '2026-10-19' and journal.by_order_id(3) is None
+    status, attempts, score, _, slippage = journal.summary('2026-10-18')[0]
+    assert (status, attempts, score) == ('placed', 1, 100) and slippage == pytest.approx(1.0)
+
+
+def test_record_rejects_unknown_fields(journal):
+    with pytest.raises(ValueError, match='leverage'):
+        journal.record(symbol='AAAUSDT', status='placed', leverage=20)
+
+
+def test_record_never_waits_for_the_disk(journal):
+    # Hold the database as a slow write would; record() still returns at once
+    with journal.lock:
+        done = threading.Event()
+        threading.Thread(target=lambda: (placed(journal, 'AAAUSDT', 1), done.set()), daemon=True).start()
+        assert done.wait(1)
+    assert journal.flush(5)
+    assert len(journal.trades()) == 1
+
+
+def test_journal_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'trades.sqlite')
+    journal = TradeJournal(path)
+    placed(journal, 'AAAUSDT', 1)
+    journal.close()
+
+    reopened = TradeJournal(path)
+    assert reopened.by_order_id(1)['actual_entry'] == 10.1
+    assert reopened.db.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    reopened.close()
@@ -0,0 +1,95 @@
+import calendar
+import json
+import pytest
+import universe
+from universe import SymbolUniverse, next_day_start, trading_day
+
+
+def utc(*fields):
+    return calendar.timegm((*fields, 0, 0, 0))
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # 16:30 UTC is 23:30 in UTC+7, half an hour before the trading day rolls over
+    clock = Clock(utc(2026, 10, 18, 16, 30, 0))
+    monkeypatch.setattr(universe.time, 'time', clock.time)
+    return clock
+
+
+def test_trading_days_roll_over_at_midnight_utc7():
+    assert next_day_start(utc(2026, 10, 18, 16, 30, 0)) == utc(2026, 10, 18, 17, 0, 0)
+    assert next_day_start(utc(2026, 10, 18, 17, 0, 0)) == utc(2026, 10, 19, 17, 0, 0)
+    assert next_day_start(utc(2026, 10, 18, 3, 0, 0)) == utc(2026, 10, 18, 17, 0, 0)
+    assert trading_day(utc(2026, 10, 18, 16, 59, 59)) == '2026-10-18'
+    assert trading_day(utc(2026, 10, 18, 17, 0, 0)) == '2026-10-19'
+
+
+def test_traded_today_expires_when_the_day_rolls_over(clock):
+    symbols = SymbolUniverse()
+    symbols.exclude_until_day_end('AAAUSDT', 'traded today')
+    assert 'AAAUSDT' in symbols and symbols.reason('AAAUSDT') == 'traded today'
+
+    clock.now += 29 * 60
+    assert symbols.filter(['AAAUSDT', 'BBBUSDT']) == ['BBBUSDT']
+    clock.now += 60
+    assert symbols.filter(['AAAUSDT', 'BBBUSDT']) == ['AAAUSDT', 'BBBUSDT']
+    assert len(symbols) == 0  # The expired entry is dropped on lookup
+
+
+def test_ttl_exclusions_expire_and_never_shorten(clock):
+    symbols = SymbolUniverse()
+    symbols.exclude('AAAUSDT', 'MIN_NOTIONAL too high', ttl=86400)
+    symbols.exclude('AAAUSDT', 'Price revalidation failed')  # Run-only, shorter: ignored
+    symbols.exclude('AAAUSDT', 'MIN_NOTIONAL too high', ttl=60)
+    assert symbols.reason('AAAUSDT') == 'MIN_NOTIONAL too high'
+
+    clock.now += 86399
+    assert 'AAAUSDT' in symbols
+    clock.now += 1
+    assert 'AAAUSDT' not in symbols and symbols.reason('AAAUSDT') is None
+
+
+def test_run_exclusions_last_until_cleared(clock):
+    symbols = SymbolUniverse()
+    symbols.exclude('AAAUSDT', 'Order test failed')
+    symbols.exclude('BBBUSDT', 'MIN_NOTIONAL too high', ttl=3600)
+    clock.now += 10 * 86400
+    assert 'AAAUSDT' in symbols
+    assert symbols.purge() == 1
+
+    symbols.clear_run_exclusions()
+    assert 'AAAUSDT' not in symbols
+    symbols.exclude('AAAUSDT', 'Order test failed')
+    symbols.include('AAAUSDT')
+    assert 'AAAUSDT' not in symbols
+
+
+def test_persisted_exclusions_survive_a_restart(clock, tmp_path):
+    path = tmp_path / 'state' / 'universe.json'
+    symbols = SymbolUniverse(str(path))
+    symbols.exclude('AAAUSDT', 'MIN_NOTIONAL too high', ttl=86400)
+    symbols.exclude_until_day_end('BBBUSDT', 'traded today')
+    symbols.exclude('CCCUSDT', 'Order test failed')  # This run only
+    assert set(json.loads(path.read_text())) == {'AAAUSDT', 'BBBUSDT'}
+
+    restarted = SymbolUniverse(str(path))
+    assert restarted.filter(['AAAUSDT', 'BBBUSDT', 'CCCUSDT']) == ['CCCUSDT']
+    assert restarted.count('traded today') == 1
+
+    clock.now += 3600  # Next trading day: yesterday's trades are forgotten on load
+    assert SymbolUniverse(str(path)).filter(['AAAUSDT', 'BBBUSDT']) == ['BBBUSDT']
+
+
+def test_an_unreadable_store_starts_empty(tmp_path):
+    path = tmp_path / 'universe.json'
+    path.write_text('{not json')
+    assert len(SymbolUniverse(str(path))) == 0
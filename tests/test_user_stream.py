@@ -0,0 +1,226 @@
+import logging
+import time
+import pytest
+from binance.um_futures import UMFutures
+import main
+from mock_binance import MockBinanceServer, LISTEN_KEY_TTL
+from price_snapshot import PriceSnapshot
+from user_stream import UserStream
+
+
+# Offline: the REST endpoints and the user data stream both come from mock_binance.py
+@pytest.fixture
+def server():
+    server = MockBinanceServer(symbols=20, trigger_interval=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    return UMFutures(key='KEY', secret='SECRET', base_url=server.url)
+
+
+@pytest.fixture
+def stream(server, client):
+    stream = UserStream(client, server.stream_url, keepalive=3600)
+    stream.start()
+    wait_until(lambda: subscribed(server, stream.listen_key))
+    yield stream
+    stream.stop()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.02)
+
+
+def subscribed(server, listen_key):
+    with server.user_stream.lock:
+        return any(listen_key in connection.streams for connection in server.user_stream.connections)
+
+
+def stop_market(client, symbol):
+    # An order that stays open until triggered, so it never fills on its own
+    return client.new_order(symbol=symbol, side='SELL', type='STOP_MARKET', stopPrice=1, closePosition='true')
+
+
+def test_market_order_fill_arrives_as_order_trade_update(server, client, stream):
+    response = client.new_order(symbol='SYM0001USDT', side='BUY', type='MARKET', quantity=2)
+
+    order = stream.wait_for_fill(response['orderId'], 5)
+    assert order['status'] == 'FILLED'
+    assert order['avg_price'] == pytest.approx(float(response['avgPrice']))
+    assert order['executed_qty'] == 2
+    wait_until(lambda: stream.position('SYM0001USDT') is not None)
+    assert stream.position('SYM0001USDT')['amount'] == 2
+
+
+def test_triggered_stop_reports_the_closed_position(server, client):
+    closed = []
+    stream = UserStream(client, server.stream_url, on_position_closed=closed.append)
+    stream.start()
+    wait_until(lambda: subscribed(server, stream.listen_key))
+    client.new_order(symbol='SYM0002USDT', side='BUY', type='MARKET', quantity=1)
+    stop = stop_market(client, 'SYM0002USDT')
+
+    server.trigger_order(stop['orderId'])
+    wait_until(lambda: closed)
+    assert closed[0]['symbol'] == 'SYM0002USDT'
+    assert closed[0]['reason'] == 'stop-loss'
+    assert closed[0]['order_id'] == stop['orderId']
+    stream.stop()
+
+
+def test_wait_for_fill_times_out_on_an_unfilled_order(client, stream):
+    order = stop_market(client, 'SYM0003USDT')
+
+    started = time.monotonic()
+    assert stream.wait_for_fill(order['orderId'], 0.3) is None
+    assert 0.25 < time.monotonic() - started < 2
+    wait_until(lambda: stream.order(order['orderId']) is not None)
+    assert stream.order(order['orderId'])['status'] == 'NEW'
+
+
+def test_fill_price_falls_back_to_the_mark_price(monkeypatch, server, client, stream):
+    monkeypatch.setattr(main, 'user_stream', stream)
+    monkeypatch.setattr(main, 'prices', PriceSnapshot(client))
+    monkeypatch.setattr(main, 'FILL_WAIT_TIMEOUT', 0.2)
+    order = stop_market(client, 'SYM0004USDT')
+
+    mark = float(client.mark_price(symbol='SYM0004USDT')['markPrice'])
+    assert main.fill_price('SYM0004USDT', order['orderId']) == pytest.approx(mark, rel=0.01)
+
+    # While a dropped stream is reconnecting the wait fails at once instead of after the timeout
+    monkeypatch.setattr(main, 'FILL_WAIT_TIMEOUT', 30)
+    server.user_stream.drop_connections()
+    wait_until(lambda: not stream.connected)
+    started = time.monotonic()
+    assert main.fill_price('SYM0004USDT', order['orderId']) == pytest.approx(mark, rel=0.01)
+    assert time.monotonic() - started < 5
+
+
+def test_keepalive_extends_the_listen_key(server, client):
+    stream = UserStream(client, server.stream_url, keepalive=0.2)
+    stream.start()
+    key = stream.listen_key
+    expires = server.listen_keys[key]
+
+    wait_until(lambda: server.listen_keys[key] > expires)
+    assert stream.listen_key == key
+    stream.stop()
+    assert key not in server.listen_keys
+
+
+def test_expired_listen_key_is_replaced_and_the_stream_resubscribes(server, client, stream):
+    old_key = stream.listen_key
+    server.expire_listen_keys(now=time.time() + LISTEN_KEY_TTL + 1)
+
+    wait_until(lambda: stream.listen_key != old_key and subscribed(server, stream.listen_key))
+    assert stream.connected
+    assert not subscribed(server, old_key)
+
+    response = client.new_order(symbol='SYM0005USDT', side='BUY', type='MARKET', quantity=1)
+    assert stream.wait_for_fill(response['orderId'], 5)['status'] == 'FILLED'
+
+
+def test_dropped_connection_is_reopened_and_the_book_rebuilt(server, client):
+    stream = UserStream(client, server.stream_url, reconnect_delay=0.1)
+    stream.start()
+    wait_until(lambda: subscribed(server, stream.listen_key))
+    working = stop_market(client, 'SYM0007USDT')
+    wait_until(lambda: stream.order(working['orderId']) is not None)
+
+    server.user_stream.drop_connections()
+    wait_until(lambda: not stream.connected)
+    # Events while the stream is down are only visible through REST
+    opened = client.new_order(symbol='SYM0007USDT', side='BUY', type='MARKET', quantity=3)
+    server.trigger_order(working['orderId'])
+
+    wait_until(lambda: stream.connected and subscribed(server, stream.listen_key))
+    wait_until(lambda: stream.order(working['orderId'])['status'] != 'NEW')
+    assert stream.order(working['orderId'])['status'] == 'FILLED'
+    assert stream.order(opened['orderId']) is None
+    assert stream.position('SYM0007USDT') is None  # The stop closed it while the stream was down
+
+    later = client.new_order(symbol='SYM0008USDT', side='SELL', type='MARKET', quantity=1)
+    assert stream.wait_for_fill(later['orderId'], 5)['status'] == 'FILLED'
+    assert stream.position('SYM0008USDT')['amount'] == -1
+    stream.stop()
+
+
+def test_reconnect_backs_off_while_the_server_is_unreachable(server, client, caplog):
+    stream = UserStream(client, server.stream_url, reconnect_delay=0.1, max_reconnect_delay=0.4)
+    stream.start()
+    wait_until(lambda: subscribed(server, stream.listen_key))
+    stream.stream_url = 'ws://127.0.0.1:9'  # Nothing listens here
+
+    with caplog.at_level(logging.ERROR, logger='user_stream'):
+        server.user_stream.drop_connections()
+        wait_until(lambda: sum('Retrying in 0.4s' in r.getMessage() for r in caplog.records) >= 2)
+    retries = [r.getMessage() for r in caplog.records if 'Retrying' in r.getMessage()]
+    assert [message.rsplit(' ', 1)[1] for message in retries[:3]] == ['0.2s.', '0.4s.', '0.4s.']
+
+    stream.stream_url = server.stream_url
+    wait_until(lambda: stream.connected and subscribed(server, stream.listen_key))
+    stream.stop()
+
+
+def test_failed_keepalive_requests_a_new_listen_key(server, client):
+    stream = UserStream(client, server.stream_url, keepalive=0.2)
+    stream.start()
+    old_key = stream.listen_key
+    with server.lock:
+        del server.listen_keys[old_key]  # Gone without a listenKeyExpired event
+
+    wait_until(lambda: stream.listen_key != old_key and subscribed(server, stream.listen_key))
+    response = client.new_order(symbol='SYM0006USDT', side='BUY', type='MARKET', quantity=1)
+    assert stream.wait_for_fill(response['orderId'], 5)['status'] == 'FILLED'
+    stream.stop()
+
+
+@pytest.fixture
+def bot(monkeypatch, tmp_path, server):
+    # main.py configured against the mock, with everything it writes under tmp_path
+    for name in ('telegram', 'metrics', 'income_ledger', 'governor', 'client', 'market', 'feed', 'user_stream',
+                 'current_day', 'trade_journal', 'weight_budget', 'indicator_book', 'kline_store', 'prices',
+                 'universe', 'symbol_filters', 'board', 'symbol_precisions', 'trades_today'):
+        monkeypatch.setattr(main, name, getattr(main, name))
+    monkeypatch.setattr(main, 'setup_logging', lambda *args: None)
+    monkeypatch.setenv('TELEGRAM_API_URL', 'http://127.0.0.1:9')
+    settings = {
+        'API_KEY': 'KEY', 'API_SECRET': 'SECRET', 'BINANCE_BASE_URL': server.url, 'MARKET_FEED': None, 'SHARD_COUNT': 1, 'SHARD_INDEX': 0, 'METRICS_PORT': 0,
+        'TRADE_JOURNAL_PATH': '', 'INCOME_LEDGER_PATH': '', 'UNIVERSE_PATH': '', 'KLINE_STORE_DIR': '',
+        'METRICS_SUMMARY_PATH': str(tmp_path / 'metrics_summary.json'),
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(main, name, value)
+    # Every market stream the bot starts is stopped afterwards, even one it lost track of
+    streams = []
+
+    class TrackedMarketStream(main.MarketStream):
+        def start(self):
+            streams.append(self)
+            return super().start()
+    monkeypatch.setattr(main, 'MarketStream', TrackedMarketStream)
+    yield main
+    try:
+        main.shutdown()
+    finally:
+        for stream in streams:
+            stream.stop()
+
+
+def test_bot_keeps_its_market_stream_when_the_user_stream_cannot_start(monkeypatch, server, bot):
+    monkeypatch.setattr(bot, 'STREAMING', True)
+    monkeypatch.setattr(bot, 'STREAM_URL', server.stream_url)
+    monkeypatch.setattr(bot, 'USER_STREAM', True)
+    monkeypatch.setattr(bot, 'USER_STREAM_URL', 'ws://127.0.0.1:9')  # Nothing listens here
+
+    bot.initialize()
+    assert bot.user_stream is None
+    assert isinstance(bot.market, bot.MarketStream)
+    assert bot.prices.source is bot.market
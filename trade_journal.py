@@ -0,0 +1,149 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from universe import DAY_OFFSET_HOURS, trading_day
+
+log = logging.getLogger(__name__)
+
+
+# ==== Trade Journal ====
+# Append-only record of every place_trade attempt in SQLite (WAL mode for a
+# file), indexed by symbol, trading day and orderId. record() only enqueues; a
+# background worker writes whatever has queued up in one transaction, so the
+# order path never waits on the disk. Queries flush the queue first.
+COLUMNS = (
+    'time', 'day', 'symbol', 'order_id', 'signal', 'score', 'notes', 'status', 'reason',
+    'intended_entry', 'actual_entry', 'sl_price', 'tp_price', 'qty', 'rr',
+    'fill_latency_ms', 'duration_ms',
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    time INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    order_id INTEGER,
+    signal TEXT,
+    score INTEGER,
+    notes TEXT,
+    status TEXT NOT NULL,
+    reason TEXT,
+    intended_entry REAL,
+    actual_entry REAL,
+    sl_price REAL,
+    tp_price REAL,
+    qty REAL,
+    rr REAL,
+    fill_latency_ms REAL,
+    duration_ms REAL
+);
+CREATE INDEX IF NOT EXISTS trades_symbol_time ON trades (symbol, time);
+CREATE INDEX IF NOT EXISTS trades_day ON trades (day);
+CREATE INDEX IF NOT EXISTS trades_order_id ON trades (order_id);
+CREATE TRIGGER IF NOT EXISTS trades_no_update BEFORE UPDATE ON trades
+BEGIN SELECT RAISE(ABORT, 'trade journal is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS trades_no_delete BEFORE DELETE ON trades
+BEGIN SELECT RAISE(ABORT, 'trade journal is append-only'); END;
+"""
+
+
+class TradeJournal:
+    def __init__(self, path=':memory:', offset_hours=DAY_OFFSET_HOURS):
+        self.path = path
+        self.offset_hours = offset_hours
+        directory = os.path.dirname(path) if path != ':memory:' else ''
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            if path != ':memory:':
+                self.db.execute("PRAGMA journal_mode=WAL")
+                self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript(SCHEMA)
+
+        self.queue = queue.Queue()
+        self.stopping = threading.Event()
+        self.worker = threading.Thread(target=self._run, name='trade-journal', daemon=True)
+        self.worker.start()
+
+    def record(self, **fields):
+        # Non-blocking; `time` (epoch ms) defaults to now and decides the trading day
+        unknown = set(fields) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown trade journal fields: {sorted(unknown)}")
+        fields.setdefault('time', int(time.time() * 1000))
+        fields.setdefault('day', trading_day(fields['time'] / 1000, self.offset_hours))
+        self.queue.put(tuple(fields.get(column) for column in COLUMNS))
+
+    def flush(self, timeout=None):
+        # Wait until every queued entry is written
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=10):
+        self.flush(timeout)
+        self.stopping.set()
+        self.worker.join(timeout=1)
+        with self.lock:
+            self.db.close()
+
+    def _run(self):
+        while not self.stopping.is_set():
+            try:
+                batch = [self.queue.get(timeout=0.2)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self.lock, self.db:
+                    self.db.executemany(
+                        f"INSERT INTO trades ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", batch
+                    )
+            except sqlite3.Error as e:
+                log.error(f"[JOURNAL] Failed to write {len(batch)} entries: {e}")
+            for _ in batch:
+                self.queue.task_done()
+
+    # ==== Queries ====
+    def _query(self, sql, params=()):
+        self.flush()
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def trades(self, day=None, symbol=None, status=None):
+        # Journal entries oldest first, filtered by any of trading day, symbol and status
+        filters = [(name, value) for name, value in (('day', day), ('symbol', symbol), ('status', status)) if value is not None]
+        where = ' AND '.join(f"{name} = ?" for name, _ in filters) or '1'
+        return self._query(f"SELECT * FROM trades WHERE {where} ORDER BY time, id", [value for _, value in filters])
+
+    def count(self, day, status='placed'):
+        return self._query("SELECT COUNT(*) FROM trades WHERE day = ? AND status = ?", (day, status))[0][0]
+
+    def by_order_id(self, order_id):
+        rows = self._query("SELECT * FROM trades WHERE order_id = ?", (order_id,))
+        return rows[0] if rows else None
+
+    def summary(self, day):
+        # [(status, attempts, mean score, mean fill latency ms, mean slippage %)] for one trading day
+        return self._query(
+            "SELECT status, COUNT(*), AVG(score), AVG(fill_latency_ms), "
+            "AVG(ABS(actual_entry - intended_entry) / intended_entry * 100) "
+            "FROM trades WHERE day = ? GROUP BY status ORDER BY status",
+            (day,),
+        )
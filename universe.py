@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+# ==== Symbol Universe ====
+# Exclusions keyed by symbol with a reason and an expiry time, checked with one
+# dict lookup. Exclusions with an expiry are written to a small JSON file so the
+# next run skips them too (e.g. "MIN_NOTIONAL too high" for 24h, "traded today"
+# until the trading day rolls over). Exclusions without one last for this run.
+DAY_OFFSET_HOURS = 7  # Trading days roll over at 00:00 UTC+7
+
+
+def next_day_start(now=None, offset_hours=DAY_OFFSET_HOURS):
+    # Epoch seconds of the next trading day boundary
+    now = time.time() if now is None else now
+    offset = offset_hours * 3600
+    return ((now + offset) // 86400 + 1) * 86400 - offset
+
+
+def trading_day(now=None, offset_hours=DAY_OFFSET_HOURS):
+    # Calendar date of the trading day containing `now`
+    now = time.time() if now is None else now
+    return time.strftime('%Y-%m-%d', time.gmtime(now + offset_hours * 3600))
+
+
+class SymbolUniverse:
+    def __init__(self, path=None, offset_hours=DAY_OFFSET_HOURS):
+        self.path = path
+        self.offset_hours = offset_hours
+        self.lock = threading.Lock()
+        self.entries = {}  # symbol -> (reason, expires_at or None for this run only)
+        if path:
+            self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"[UNIVERSE] Could not read {self.path}, starting empty: {e}")
+            return
+        now = time.time()
+        with self.lock:
+            for symbol, entry in stored.items():
+                if entry['expires_at'] > now:
+                    self.entries[symbol] = (entry['reason'], entry['expires_at'])
+        log.info(f"[UNIVERSE] Restored {len(self.entries)} exclusions from {self.path}")
+
+    def save(self):
+        if not self.path:
+            return
+        now = time.time()
+        with self.lock:
+            stored = {
+                symbol: {'reason': reason, 'expires_at': expires_at}
+                for symbol, (reason, expires_at) in self.entries.items()
+                if expires_at is not None and expires_at > now
+            }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(stored, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def exclude(self, symbol, reason, ttl=None, until=None):
+        # ttl (seconds) or until (epoch) persist the exclusion; neither keeps it for this run only
+        expires_at = until if until is not None else (time.time() + ttl if ttl is not None else None)
+        with self.lock:
+            current = self.entries.get(symbol)
+            if current and current[1] is not None and (expires_at is None or current[1] >= expires_at):
+                return  # Never shorten an existing persisted exclusion
+            self.entries[symbol] = (reason, expires_at)
+        if expires_at is not None:
+            self.save()
+
+    def exclude_until_day_end(self, symbol, reason):
+        self.exclude(symbol, reason, until=next_day_start(offset_hours=self.offset_hours))
+
+    def include(self, symbol):
+        with self.lock:
+            removed = self.entries.pop(symbol, None)
+        if removed and removed[1] is not None:
+            self.save()
+
+    def reason(self, symbol):
+        entry = self.entries.get(symbol)
+        if entry and (entry[1] is None or entry[1] > time.time()):
+            return entry[0]
+        return None
+
+    def __contains__(self, symbol):
+        entry = self.entries.get(symbol)
+        if entry is None:
+            return False
+        if entry[1] is not None and entry[1] <= time.time():
+            with self.lock:
+                if self.entries.get(symbol) is entry:
+                    del self.entries[symbol]
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.entries)
+
+    def count(self, reason):
+        # Active exclusions recorded with exactly this reason
+        return sum(1 for symbol, (r, _) in list(self.entries.items()) if r == reason and symbol in self)
+
+    def filter(self, symbols):
+        return [symbol for symbol in symbols if symbol not in self]
+
+    def purge(self):
+        # Drop expired exclusions; returns how many were removed
+        now = time.time()
+        with self.lock:
+            expired = [s for s, (_, expires_at) in self.entries.items() if expires_at is not None and expires_at <= now]
+            for symbol in expired:
+                del self.entries[symbol]
+        if expired:
+            self.save()
+        return len(expired)
+
+    def clear_run_exclusions(self):
+        # Forget exclusions that were only meant for the current run
+        with self.lock:
+            self.entries = {s: e for s, e in self.entries.items() if e[1] is not None}
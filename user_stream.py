@@ -0,0 +1,279 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from binance.error import ClientError
+from binance.websocket.um_futures.websocket_client import UMFuturesWebsocketClient
+
+log = logging.getLogger(__name__)
+
+
+# ==== User Data Stream ====
+# Order and position book of the account, fed by the futures user data stream.
+# ORDER_TRADE_UPDATE keeps every recent order (status, average fill price,
+# realized PnL) and ACCOUNT_UPDATE keeps the open positions, so place_trade can
+# read the real fill of its market order and closed positions are reported as
+# they happen instead of being polled for. The listenKey is created on start(),
+# kept alive every `keepalive` seconds (Binance expires it after 60 minutes),
+# replaced when the stream reports it expired and closed on stop(). A dropped
+# connection (Binance closes every one after 24 hours) is reopened with a new
+# listenKey, retrying with exponential backoff, and the book is rebuilt from
+# REST: open positions, and the status of every order that was still working.
+FINAL_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED', 'EXPIRED_IN_MATCH')
+
+# How a closing order's type reads in position-closed reports
+CLOSE_REASONS = {'STOP_MARKET': 'stop-loss', 'TAKE_PROFIT_MARKET': 'take-profit'}
+
+
+class UserStream:
+    def __init__(self, client, stream_url='wss://fstream.binance.com', keepalive=1800, history=1000,
+                 on_position_closed=None, reconnect_delay=1, max_reconnect_delay=60):
+        self.client = client
+        self.stream_url = stream_url
+        self.keepalive = keepalive
+        self.history = history
+        self.on_position_closed = on_position_closed
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.lock = threading.Condition()
+        self.orders = OrderedDict()
+        self.positions = {}
+        self.exits = {}  # symbol -> latest fill reducing its position
+        self.flat = {}  # symbol -> position that went to zero, waiting for its closing fill
+        self.listen_key = None
+        self.ws = None
+        self.connected = False
+        self.stopping = threading.Event()
+        self.reconnecting = threading.Lock()  # Held by the one thread reopening a dropped connection
+
+    def start(self):
+        self._connect()
+        threading.Thread(target=self._keep_alive, name='user-stream-keepalive', daemon=True).start()
+
+    def stop(self):
+        self.stopping.set()
+        self.connected = False
+        self._close_ws()
+        if self.listen_key:
+            try:
+                self.client.close_listen_key(self.listen_key)
+            except ClientError as e:
+                log.warning(f"[USER] Could not close the listenKey: {e.error_message}")
+            self.listen_key = None
+
+    def _connect(self):
+        self.listen_key = self.client.new_listen_key()['listenKey']
+        if self.ws is None:
+            self.ws = UMFuturesWebsocketClient(
+                stream_url=self.stream_url,
+                on_message=self._on_message,
+                on_close=self._on_close,
+                on_error=self._on_error,
+            )
+        self.ws.user_data(listen_key=self.listen_key)
+        with self.lock:
+            self.connected = True
+        log.info(f"[USER] Listening to the user data stream on {self.stream_url}")
+
+    def _close_ws(self):
+        if self.ws:
+            try:
+                self.ws.stop()
+            except Exception as e:
+                log.error(f"[USER] Error while closing websocket: {e}")
+            self.ws = None
+
+    def _keep_alive(self):
+        while not self.stopping.wait(self.keepalive):
+            if self.reconnecting.locked():
+                continue  # A dropped connection is being reopened with a fresh listenKey
+            try:
+                self.client.renew_listen_key(self.listen_key)
+            except ClientError as e:
+                log.warning(f"[USER] listenKey keepalive failed: {e.error_message}. Requesting a new one.")
+                self._reconnect()
+
+    def _reconnect(self):
+        try:
+            if self.ws:
+                self.ws.user_data(listen_key=self.listen_key, action=UMFuturesWebsocketClient.ACTION_UNSUBSCRIBE)
+            self._connect()
+        except Exception as e:
+            log.error(f"[USER] Could not resubscribe to the user data stream: {e}")
+            self._disconnect()
+
+    def _reopen(self):
+        # Replace a dropped connection; events missed meanwhile are recovered from REST
+        delay = self.reconnect_delay
+        try:
+            while not self.stopping.wait(delay):
+                try:
+                    self._close_ws()
+                    self._connect()
+                    self.resync()
+                    return
+                except Exception as e:
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    log.error(f"[USER] Could not reopen the user data stream: {e}. Retrying in {delay}s.")
+        finally:
+            self.reconnecting.release()
+
+    def resync(self):
+        # Rebuild positions, and the status of every order still working, from REST
+        positions = self.client.get_position_risk()
+        with self.lock:
+            working = [(o['symbol'], o['order_id']) for o in self.orders.values() if o['status'] not in FINAL_STATUSES]
+        orders = [self.client.query_order(symbol=symbol, orderId=order_id) for symbol, order_id in working]
+
+        with self.lock:
+            live = {}
+            for p in positions:
+                amount = float(p['positionAmt'])
+                if amount:
+                    live[p['symbol']] = {'symbol': p['symbol'], 'amount': amount, 'entry_price': float(p['entryPrice']),
+                                         'update_time': p.get('updateTime', 0)}
+            missed = [symbol for symbol in self.positions if symbol not in live]
+            self.positions = live
+            for o in orders:
+                order = self.orders.get(int(o['orderId']))
+                if order:
+                    order.update(status=o['status'], avg_price=float(o['avgPrice']), executed_qty=float(o['executedQty']),
+                                 update_time=o['updateTime'])
+            self.lock.notify_all()
+        for symbol in missed:
+            log.warning(f"[USER] {symbol} position closed while the stream was down; its exit is not reported.")
+        log.info(f"[USER] Book rebuilt from REST: {len(live)} open positions, {len(orders)} working orders refreshed")
+
+    # ==== Book reads ====
+    def order(self, order_id):
+        with self.lock:
+            order = self.orders.get(int(order_id))
+            return dict(order) if order else None
+
+    def position(self, symbol):
+        with self.lock:
+            position = self.positions.get(symbol)
+            return dict(position) if position else None
+
+    def wait_for_fill(self, order_id, timeout):
+        # The order once it is FILLED, or None if it ends otherwise or the stream is not up
+        order_id = int(order_id)
+        with self.lock:
+            self.lock.wait_for(
+                lambda: not self.connected or self.orders.get(order_id, {}).get('status') in FINAL_STATUSES, timeout
+            )
+            order = self.orders.get(order_id)
+            return dict(order) if order and order['status'] == 'FILLED' else None
+
+    # ==== Stream handling ====
+    def _on_message(self, _, message):
+        try:
+            self.handle(json.loads(message))
+        except Exception as e:
+            log.error(f"[USER] Failed to handle message: {e}")
+
+    def _on_close(self, manager):
+        if self.stopping.is_set() or not self._current(manager):
+            return
+        log.warning("[USER] User data stream closed. Reconnecting; fill prices fall back to the mark price meanwhile.")
+        self._disconnect()
+
+    def _on_error(self, manager, error):
+        if self.stopping.is_set() or not self._current(manager):
+            return
+        log.error(f"[USER] User data stream error: {error}. Reconnecting; fill prices fall back to the mark price meanwhile.")
+        self._disconnect()
+
+    def _current(self, manager):
+        # Callbacks of a connection that was already replaced are ignored
+        return self.ws is not None and self.ws.socket_manager is manager
+
+    def _disconnect(self):
+        with self.lock:
+            self.connected = False
+            self.lock.notify_all()
+        if self.reconnecting.acquire(blocking=False):
+            threading.Thread(target=self._reopen, name='user-stream-reconnect', daemon=True).start()
+
+    def handle(self, event):
+        event_type = event.get('e') if isinstance(event, dict) else None
+        closed = []
+        with self.lock:
+            if event_type == 'ORDER_TRADE_UPDATE':
+                closed = self._apply_order(event['o'])
+            elif event_type == 'ACCOUNT_UPDATE':
+                closed = self._apply_account(event['a'], event['E'])
+            self.lock.notify_all()
+        if event_type == 'listenKeyExpired' and not self.stopping.is_set():
+            log.warning("[USER] listenKey expired. Requesting a new one.")
+            threading.Thread(target=self._reconnect, daemon=True).start()
+
+        # Callbacks run outside the lock; they may read the book
+        for closure in closed:
+            log.info(
+                f"[USER] {closure['symbol']} position closed by {closure['reason']} at {closure['exit_price']} | "
+                f"PnL: {closure['realized_pnl']:.4f} USDT"
+            )
+            if self.on_position_closed:
+                try:
+                    self.on_position_closed(closure)
+                except Exception as e:
+                    log.error(f"[USER] Position-closed handler failed: {e}")
+
+    def _apply_order(self, o):
+        order_id = int(o['i'])
+        order = self.orders.pop(order_id, None) or {'realized_pnl': 0.0}
+        order.update(
+            order_id=order_id,
+            symbol=o['s'],
+            side=o['S'],
+            type=o.get('ot') or o['o'],
+            status=o['X'],
+            avg_price=float(o['ap']),
+            executed_qty=float(o['z']),
+            stop_price=float(o.get('sp') or 0),
+            update_time=o['T'],
+        )
+        order['realized_pnl'] += float(o.get('rp') or 0)
+        self.orders[order_id] = order
+        while len(self.orders) > self.history:
+            self.orders.popitem(last=False)
+
+        # A fill against the open (or just closed) position is the candidate closing fill
+        if o['x'] == 'TRADE':
+            amount = self.positions.get(o['s'], {}).get('amount') or self.flat.get(o['s'], {}).get('amount', 0)
+            if amount and (amount > 0) == (o['S'] == 'SELL'):
+                self.exits[o['s']] = order
+        return self._settle(o['s'])
+
+    def _apply_account(self, account, event_time):
+        closed = []
+        for p in account.get('P', []):
+            symbol, amount = p['s'], float(p['pa'])
+            previous = self.positions.get(symbol)
+            if amount:
+                self.positions[symbol] = {'symbol': symbol, 'amount': amount, 'entry_price': float(p['ep']), 'update_time': event_time}
+                continue
+            self.positions.pop(symbol, None)
+            if previous:
+                self.flat[symbol] = previous
+                closed += self._settle(symbol)
+        return closed
+
+    def _settle(self, symbol):
+        # Report a closed position once both its zero amount and its closing fill are in, in either order
+        if symbol not in self.flat or symbol not in self.exits or self.exits[symbol]['status'] != 'FILLED':
+            return []
+        position = self.flat.pop(symbol)
+        exit_order = self.exits.pop(symbol)
+        return [{
+            'symbol': symbol,
+            'amount': position['amount'],
+            'entry_price': position['entry_price'],
+            'exit_price': exit_order['avg_price'],
+            'realized_pnl': exit_order['realized_pnl'],
+            'reason': CLOSE_REASONS.get(exit_order['type'], 'market order'),
+            'order_id': exit_order['order_id'],
+            'time': exit_order['update_time'],
+        }]